@@ -13,9 +13,17 @@ import re
 import tomllib
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import httpx
-import packaging.version
+from scripts import config, metrics
+from scripts.snapshots import save_snapshot
+
+# httpx and packaging are imported where they are used so that loading this
+# module (e.g. from the CLI parser) stays cheap.
+if TYPE_CHECKING:
+    import httpx
+
+    from scripts.snapshot_schema import SnapshotLite
 
 # ---------------------------------------------------------------------------
 # Package name normalisation (PEP 503)
@@ -93,6 +101,8 @@ def classify_version_jump(old: str, new: str) -> str:
 
     Returns one of ``"major"``, ``"minor"``, ``"patch"``, or ``"none"``.
     """
+    import packaging.version
+
     v_old = packaging.version.Version(old)
     v_new = packaging.version.Version(new)
 
@@ -105,6 +115,43 @@ def classify_version_jump(old: str, new: str) -> str:
     return "none"
 
 
+def pinned_version(spec: str) -> str | None:
+    """Return the first ``X.Y[.Z]`` version named in *spec*, if any.
+
+    >>> pinned_version(">=2.1,<3")
+    '2.1'
+    """
+    version_match = re.search(r"[\d]+\.[\d]+(?:\.[\d]+)?", spec)
+    return version_match.group(0) if version_match else None
+
+
+def pin_jump(spec: str, latest: str) -> str | None:
+    """Classify the jump from the version pinned in *spec* to *latest*.
+
+    Returns ``None`` when *spec* names no version or *latest* is unknown.
+
+    Examples
+    --------
+    >>> pin_jump(">=2.1", "3.0.1")
+    'major'
+    >>> pin_jump("", "3.0.1") is None
+    True
+    """
+    pinned = pinned_version(spec)
+    if not pinned or not latest:
+        return None
+
+    # Pad both versions to 3 components
+    parts = pinned.split(".")
+    while len(parts) < 3:
+        parts.append("0")
+    latest_parts = latest.split(".")
+    while len(latest_parts) < 3:
+        latest_parts.append("0")
+
+    return classify_version_jump(".".join(parts), ".".join(latest_parts[:3]))
+
+
 # ---------------------------------------------------------------------------
 # Dependency extraction – requirements.txt
 # ---------------------------------------------------------------------------
@@ -119,8 +166,13 @@ def extract_deps_from_requirements(path: Path) -> dict[str, str]:
         Mapping of normalised package name to version specifier string.
         An empty string means no version was pinned.
     """
+    return parse_requirements(Path(path).read_text())
+
+
+def parse_requirements(text: str) -> dict[str, str]:
+    """Parse ``requirements.txt`` content; see :func:`extract_deps_from_requirements`."""
     deps: dict[str, str] = {}
-    for raw_line in Path(path).read_text().splitlines():
+    for raw_line in text.splitlines():
         line = raw_line.strip()
         # Skip blank, comments, -r includes, -- flags
         if not line or line.startswith("#") or line.startswith("-r") or line.startswith("--"):
@@ -154,10 +206,26 @@ def extract_deps_from_environment_yml(path: Path) -> dict[str, str]:
     dict[str, str]
         Mapping of normalised package name to version specifier string.
     """
-    deps: dict[str, str] = {}
+    return parse_environment_yml(Path(path).read_text())
+
+
+def parse_environment_yml(text: str) -> dict[str, str]:
+    """Parse ``sepal_environment.yml`` content; see :func:`extract_deps_from_environment_yml`."""
+    conda, pip = split_environment_yml(text)
+    return {**conda, **pip}
+
+
+def split_environment_yml(text: str) -> tuple[dict[str, str], dict[str, str]]:
+    """Parse ``sepal_environment.yml`` content into its conda and pip deps.
+
+    >>> split_environment_yml("dependencies:\\n  - gdal=3.8.3\\n  - pip:\\n    - solara>=1.0\\n")
+    ({'gdal': '=3.8.3'}, {'solara': '>=1.0'})
+    """
+    conda: dict[str, str] = {}
+    pip: dict[str, str] = {}
     in_pip = False
 
-    for raw_line in Path(path).read_text().splitlines():
+    for raw_line in text.splitlines():
         line = raw_line.strip()
 
         if not line or line.startswith("#"):
@@ -179,7 +247,7 @@ def extract_deps_from_environment_yml(path: Path) -> dict[str, str]:
             if in_pip:
                 # Pip deps use standard specifiers
                 name, spec = _split_dep(pkg)
-                deps[name] = spec
+                pip[name] = spec
             else:
                 # Conda deps use single = for version
                 # Check if we left the dependencies section
@@ -191,16 +259,16 @@ def extract_deps_from_environment_yml(path: Path) -> dict[str, str]:
                     eq_idx = pkg.index("=")
                     name = pkg[:eq_idx]
                     spec = pkg[eq_idx:]  # includes the leading =
-                    deps[_normalise(name)] = spec
+                    conda[_normalise(name)] = spec
                 else:
-                    deps[_normalise(pkg)] = ""
+                    conda[_normalise(pkg)] = ""
         else:
             # If we hit a non-"- " line (like "dependencies:" or "name:"),
             # reset pip context if we're done with deps
             if not line.startswith(" ") and ":" in line:
                 in_pip = False
 
-    return deps
+    return conda, pip
 
 
 # ---------------------------------------------------------------------------
@@ -219,7 +287,12 @@ def extract_deps_from_pyproject(path: Path) -> dict[str, str]:
     dict[str, str]
         Mapping of normalised package name to version specifier string.
     """
-    data = tomllib.loads(Path(path).read_text())
+    return parse_pyproject(Path(path).read_text())
+
+
+def parse_pyproject(text: str) -> dict[str, str]:
+    """Parse ``pyproject.toml`` content; see :func:`extract_deps_from_pyproject`."""
+    data = tomllib.loads(text)
     raw_deps = data.get("project", {}).get("dependencies", [])
     deps: dict[str, str] = {}
     for dep_str in raw_deps:
@@ -228,11 +301,46 @@ def extract_deps_from_pyproject(path: Path) -> dict[str, str]:
     return deps
 
 
+# Dependency file name -> content parser, in the priority order used by
+# scan_module_deps
+DEP_FILE_PARSERS = {
+    "pyproject.toml": parse_pyproject,
+    "requirements.txt": parse_requirements,
+    "sepal_environment.yml": parse_environment_yml,
+}
+
+
 # ---------------------------------------------------------------------------
 # PyPI fetching (async)
 # ---------------------------------------------------------------------------
 
 
+def release_size(files: list[dict]) -> int | None:
+    """Size in bytes of the file a Linux install of a release downloads.
+
+    Prefers an x86_64 manylinux wheel, then any Linux wheel, then a pure
+    Python wheel, then the sdist.  Returns ``None`` if there is none.
+    """
+    ranked = []
+    for f in files:
+        name = f.get("filename", "")
+        if f.get("packagetype") == "bdist_wheel":
+            if "linux" in name and "x86_64" in name:
+                rank = 0
+            elif "linux" in name:
+                rank = 1
+            elif name.endswith("-none-any.whl"):
+                rank = 2
+            else:
+                continue
+        elif f.get("packagetype") == "sdist":
+            rank = 3
+        else:
+            continue
+        ranked.append((rank, f.get("size") or 0))
+    return min(ranked)[1] if ranked else None
+
+
 async def fetch_pypi_info(client: httpx.AsyncClient, package_name: str) -> dict:
     """Fetch version information for *package_name* from PyPI.
 
@@ -246,9 +354,13 @@ async def fetch_pypi_info(client: httpx.AsyncClient, package_name: str) -> dict:
     Returns
     -------
     dict
-        Keys: ``latest``, ``latest_release_date``, ``all_versions``.
+        Keys: ``latest``, ``latest_release_date``, ``all_versions`` and
+        ``release_sizes`` (version -> bytes, see :func:`release_size`).
         On error, returns ``{"error": "..."}``.
     """
+    import httpx
+    import packaging.version
+
     try:
         resp = await client.get(f"https://pypi.org/pypi/{package_name}/json")
     except httpx.HTTPError as exc:
@@ -279,10 +391,17 @@ async def fetch_pypi_info(client: httpx.AsyncClient, package_name: str) -> dict:
 
     all_versions = sorted(releases.keys(), key=_sort_key)
 
+    release_sizes = {}
+    for version, files in releases.items():
+        size = release_size(files)
+        if size is not None:
+            release_sizes[version] = size
+
     return {
         "latest": latest,
         "latest_release_date": latest_release_date,
         "all_versions": all_versions,
+        "release_sizes": release_sizes,
     }
 
 
@@ -305,6 +424,8 @@ def scan_module_deps(modules_json_path: Path, base_dir: Path) -> dict:
     -------
     dict
         Mapping of module name to ``{"file": ..., "packages": ...}``.
+        Modules using ``sepal_environment.yml`` also list the names of
+        their conda (non-pip) deps under ``"conda"``.
     """
     data = json.loads(modules_json_path.read_text())
     result: dict[str, dict] = {}
@@ -331,15 +452,110 @@ def scan_module_deps(modules_json_path: Path, base_dir: Path) -> dict:
                 deps = extract_deps_from_requirements(requirements)
                 result[module["name"]] = {"file": "requirements.txt", "packages": deps}
             elif environment_yml.exists():
-                deps = extract_deps_from_environment_yml(environment_yml)
+                conda, pip = split_environment_yml(environment_yml.read_text())
                 result[module["name"]] = {
                     "file": "sepal_environment.yml",
-                    "packages": deps,
+                    "packages": {**conda, **pip},
+                    "conda": sorted(conda),
                 }
 
     return result
 
 
+# ---------------------------------------------------------------------------
+# Install footprint
+# ---------------------------------------------------------------------------
+
+# Flag a module when upgrading its watched deps grows their size by more than this
+FOOTPRINT_GROWTH_THRESHOLD = 0.2
+
+
+def _sized_version(spec: str, sizes: dict[str, int], latest: str) -> str | None:
+    """Release of *sizes* that a module declaring *spec* installs.
+
+    Specs that allow *latest* (open floors such as ``>=1.0``, or no
+    spec at all) install it.  Exact pins and upper-bounded specs
+    (``==``, ``~=``, ``<``) install the highest release of *sizes* they
+    allow.  Returns ``None`` when no such release has a known size.
+
+    >>> _sized_version(">=1.0", {"1.0": 1, "2.0": 2}, "2.0")
+    '2.0'
+    >>> _sized_version("<2", {"1.0": 1, "1.5": 1, "2.0": 2}, "2.0")
+    '1.5'
+    """
+    from packaging.version import InvalidVersion, Version
+
+    from scripts.resolver import module_specifier
+
+    specifier = module_specifier(spec)
+    allowed = []
+    for version in {*sizes, latest}:
+        try:
+            parsed = Version(version)
+        except InvalidVersion:
+            continue
+        if specifier.contains(parsed, prereleases=True):
+            allowed.append((parsed, version))
+    if any(version == latest for _, version in allowed):
+        return latest if latest in sizes else None
+    return max(allowed)[1] if allowed else None
+
+
+def module_footprints(packages: dict, module_deps: dict,
+                      threshold: float = FOOTPRINT_GROWTH_THRESHOLD) -> dict:
+    """Estimate each module's install footprint from watched package sizes.
+
+    The footprint is the sum of the download sizes (see
+    :func:`release_size`) of the module's watched dependencies, at the
+    version the module's spec installs (see :func:`_sized_version`) and
+    at the latest one; unpinned deps and open floors such as ``>=1.0``
+    count at their latest size in both.
+
+    Returns
+    -------
+    dict
+        Mapping of module name to ``pinned_bytes``, ``latest_bytes``,
+        ``growth_ratio``, ``flagged`` (growth above *threshold*),
+        ``growth`` (per-package size changes, largest first) and
+        ``unknown`` (watched deps with no size for the needed version).
+    """
+    footprints = {}
+    for module, info in module_deps.items():
+        pinned_total = latest_total = 0
+        growth, unknown = [], []
+        for pkg_name, spec in info.get("packages", {}).items():
+            pkg = packages.get(pkg_name)
+            if pkg is None:
+                continue
+            sizes = pkg.get("sizes", {})
+            latest_size = sizes.get(pkg["latest"])
+            pinned = _sized_version(spec, sizes, pkg["latest"])
+            if latest_size is None or pinned is None:
+                unknown.append(pkg_name)
+                continue
+            pinned_size = sizes[pinned]
+            pinned_total += pinned_size
+            latest_total += latest_size
+            if latest_size != pinned_size:
+                growth.append({
+                    "package": pkg_name,
+                    "pinned": pinned,
+                    "latest": pkg["latest"],
+                    "pinned_bytes": pinned_size,
+                    "latest_bytes": latest_size,
+                })
+        ratio = (latest_total - pinned_total) / pinned_total if pinned_total else 0.0
+        footprints[module] = {
+            "pinned_bytes": pinned_total,
+            "latest_bytes": latest_total,
+            "growth_ratio": round(ratio, 4),
+            "flagged": ratio > threshold,
+            "growth": sorted(growth, key=lambda g: g["latest_bytes"] - g["pinned_bytes"], reverse=True),
+            "unknown": sorted(unknown),
+        }
+    return footprints
+
+
 # ---------------------------------------------------------------------------
 # Snapshot building
 # ---------------------------------------------------------------------------
@@ -349,6 +565,7 @@ def build_snapshot(
     pypi_data: dict,
     module_deps: dict,
     watchlist_flat: dict,
+    footprint_threshold: float = FOOTPRINT_GROWTH_THRESHOLD,
 ) -> dict:
     """Build the snapshot structure from PyPI data, module deps, and watchlist.
 
@@ -356,17 +573,25 @@ def build_snapshot(
     ----------
     pypi_data : dict
         Mapping of package name to PyPI info dict (``latest``, etc.).
+        Entries with a ``source`` (e.g. conda packages from
+        :func:`conda_repodata.conda_info`) keep it; others are ``"pypi"``.
     module_deps : dict
         Mapping of module name to ``{"file": ..., "packages": ...}``.
     watchlist_flat : dict
         Mapping of package name to ``{"tier": ..., "github": ...}``.
+    footprint_threshold : float
+        Relative footprint growth above which a module is flagged (see
+        :func:`module_footprints`).
 
     Returns
     -------
     dict
         Full snapshot with ``scan_date``, ``packages``, ``module_deps``,
-        ``summary``.
+        ``footprint``, ``summary`` and ``schema_version`` (see
+        :mod:`snapshot_schema`).
     """
+    from scripts.snapshot_schema import SCHEMA_VERSION
+
     packages: dict[str, dict] = {}
 
     # Tier counters for summary
@@ -393,50 +618,54 @@ def build_snapshot(
         for _mod_name, mod_info in module_deps.items():
             mod_pkgs = mod_info.get("packages", {})
             if pkg_name in mod_pkgs:
-                spec = mod_pkgs[pkg_name]
-                # Extract the version number from the specifier
-                version_match = re.search(r"[\d]+\.[\d]+(?:\.[\d]+)?", spec)
-                if version_match and latest:
-                    pinned = version_match.group(0)
-                    # Pad to 3 components if needed
-                    parts = pinned.split(".")
-                    while len(parts) < 3:
-                        parts.append("0")
-                    pinned = ".".join(parts)
-
-                    latest_parts = latest.split(".")
-                    while len(latest_parts) < 3:
-                        latest_parts.append("0")
-                    latest_padded = ".".join(latest_parts[:3])
-
-                    version_jump = classify_version_jump(pinned, latest_padded)
+                try:
+                    jump = pin_jump(mod_pkgs[pkg_name], latest)
+                except ValueError:  # non-PEP 440 version (e.g. some conda builds)
+                    jump = "unknown"
+                if jump is not None:
+                    version_jump = jump
                     break
 
         # Count updates per tier
         if version_jump not in ("none", "unknown") and tier in tier_update_counts:
             tier_update_counts[tier] += 1
 
+        # Keep sizes only for the latest release and the versions modules pin
+        release_sizes = pypi_info.get("release_sizes", {})
+        wanted = {latest} | {
+            _sized_version(mod_info["packages"][pkg_name], release_sizes, latest)
+            for mod_info in module_deps.values()
+            if pkg_name in mod_info.get("packages", {})
+        }
+
         packages[pkg_name] = {
+            "source": pypi_info.get("source", "pypi"),
             "tier": tier,
             "latest": latest,
             "latest_release_date": pypi_info.get("latest_release_date"),
             "version_jump": version_jump,
             "changelog_url": changelog_url,
             "all_versions": pypi_info.get("all_versions", []),
+            "sizes": {v: release_sizes[v] for v in sorted(wanted - {None}) if v in release_sizes},
         }
 
+    footprint = module_footprints(packages, module_deps, footprint_threshold)
+
     summary = {
         "critical_updates": tier_update_counts["critical"],
         "important_updates": tier_update_counts["important"],
         "ecosystem_updates": tier_update_counts["ecosystem"],
         "ai_ml_updates": tier_update_counts["ai_ml"],
         "total_packages_scanned": len(packages),
+        "footprint_flags": sum(1 for entry in footprint.values() if entry["flagged"]),
     }
 
     return {
+        "schema_version": SCHEMA_VERSION,
         "scan_date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S") + "Z",
         "packages": packages,
         "module_deps": module_deps,
+        "footprint": footprint,
         "summary": summary,
     }
 
@@ -454,56 +683,68 @@ _TIER_DISPLAY = {
 }
 
 
-def print_summary(snapshot: dict) -> None:
-    """Print a human-readable summary of *snapshot* to stdout."""
-    scan_date = snapshot["scan_date"][:10]
-    header = f"Dependency Scan \u2014 {scan_date}"
+def print_summary(snapshot: dict | SnapshotLite, path: Path | None = None) -> None:
+    """Print a human-readable summary of *snapshot* to stdout.
+
+    *snapshot* is a snapshot dict or a :class:`snapshot_schema.SnapshotLite`
+    (e.g. from ``load_snapshot(path, lite=True)``); *path* is where the
+    snapshot was saved, if it was.
+    """
+    from scripts.snapshot_schema import SnapshotLite
+
+    if isinstance(snapshot, dict):
+        snapshot = SnapshotLite.model_validate(snapshot)
+
+    header = f"Dependency Scan \u2014 {snapshot.scan_date[:10]}"
     print(header)
     print("=" * len(header))
     print()
 
-    packages = snapshot.get("packages", {})
-
-    # Group packages by tier
-    by_tier: dict[str, list[tuple[str, dict]]] = {
-        t: [] for t in _TIER_DISPLAY
+    def pinned_for(pkg_name: str) -> str:
+        # The first module pinning a version, for display
+        for mod_info in snapshot.module_deps.values():
+            version = pinned_version(mod_info.packages.get(pkg_name, ""))
+            if version:
+                return version
+        return "?"
+
+    updates = {
+        name: pkg for name, pkg in snapshot.packages.items()
+        if pkg.version_jump not in ("none", "unknown")
     }
-    for pkg_name, pkg_info in packages.items():
-        tier = pkg_info.get("tier", "unknown")
-        if tier in by_tier:
-            by_tier[tier].append((pkg_name, pkg_info))
-
     for tier_key, display_name in _TIER_DISPLAY.items():
-        tier_pkgs = by_tier.get(tier_key, [])
-        updates = [
-            (n, p) for n, p in tier_pkgs if p.get("version_jump") not in ("none", "unknown")
-        ]
-        count = len(updates)
-
-        if updates:
+        tier_updates = [(n, p) for n, p in updates.items() if p.tier == tier_key]
+        count = len(tier_updates)
+        if tier_updates:
             print(f"{display_name} ({count} update{'s' if count != 1 else ''}):")
-            # Find the pinned version from module_deps for display
-            module_deps = snapshot.get("module_deps", {})
-            for pkg_name, pkg_info in updates:
-                latest = pkg_info.get("latest", "?")
-                jump = pkg_info.get("version_jump", "?")
-                # Try to find a pinned version from any module
-                pinned = "?"
-                for _mod, mod_info in module_deps.items():
-                    spec = mod_info.get("packages", {}).get(pkg_name, "")
-                    if spec:
-                        version_match = re.search(r"[\d]+\.[\d]+(?:\.[\d]+)?", spec)
-                        if version_match:
-                            pinned = version_match.group(0)
-                            break
-                print(f"  {pkg_name:<20s} {pinned} \u2192 {latest}  ({jump})")
-            print()
+            for pkg_name, pkg in tier_updates:
+                print(f"  {pkg_name:<20s} {pinned_for(pkg_name)} \u2192 {pkg.latest}  ({pkg.version_jump})")
         else:
             print(f"{display_name} (0 updates)")
-            print()
+        print()
+
+    conda_updates = [
+        (n, p) for n, p in updates.items() if p.source != "pypi" and p.tier not in _TIER_DISPLAY
+    ]
+    if conda_updates:
+        print(f"CONDA ({len(conda_updates)} update{'s' if len(conda_updates) != 1 else ''}):")
+        for pkg_name, pkg in conda_updates:
+            print(f"  {pkg_name:<20s} {pkg.latest}  ({pkg.version_jump}, {pkg.source})")
+        print()
+
+    flagged = {m: f for m, f in snapshot.footprint.items() if f.flagged}
+    if flagged:
+        print(f"FOOTPRINT ({len(flagged)} module{'s' if len(flagged) != 1 else ''} growing):")
+        for module, footprint in flagged.items():
+            print(
+                f"  {module:<30s} {footprint.pinned_bytes / 1e6:7.1f} MB \u2192 "
+                f"{footprint.latest_bytes / 1e6:7.1f} MB  (+{footprint.growth_ratio:.0%})"
+            )
+        print()
 
     print(f"Security: 0 advisories")
-    print(f"Snapshot saved to monitoring/snapshots/{scan_date}.json")
+    if path is not None:
+        print(f"Snapshot saved to {path}")
 
 
 # ---------------------------------------------------------------------------
@@ -513,14 +754,16 @@ def print_summary(snapshot: dict) -> None:
 
 async def main(args: argparse.Namespace) -> None:
     """Orchestrate the full scan pipeline."""
-    # Resolve paths relative to CWD
+    import httpx
+
     watchlist_path = Path(args.watchlist)
     modules_json_path = Path(args.modules_json)
     output_dir = Path(args.output)
     base_dir = Path(args.base_dir)
 
     # 1. Load watchlist
-    watchlist = load_watchlist(watchlist_path)
+    with metrics.span("load_watchlist"):
+        watchlist = load_watchlist(watchlist_path)
 
     # Build flat lookup: package_name -> {tier, github}
     watchlist_flat: dict[str, dict] = {}
@@ -534,60 +777,135 @@ async def main(args: argparse.Namespace) -> None:
             }
             all_package_names.append(pkg.get("pypi", pkg["name"]))
 
-    # 2. Fetch PyPI info for all watched packages
+    # 2. Scan module dependencies
+    with metrics.span("scan_modules"):
+        module_deps = scan_module_deps(modules_json_path, base_dir)
+    metrics.count("modules", len(module_deps))
+
+    # In used-only mode, fetch what modules declare instead of the watchlist;
+    # unwatched packages get the tier their usage suggests
+    if args.used_only:
+        from scripts.watchlist_usage import proposed_tier, usage_counts, used_packages
+
+        usage = usage_counts(module_deps)
+        used = used_packages(module_deps)
+        all_package_names = [
+            name for name in all_package_names if _normalise(name) in used
+        ] + sorted(used - watchlist_flat.keys())
+        for name in used - watchlist_flat.keys():
+            watchlist_flat[name] = {"tier": proposed_tier(usage[name]), "github": ""}
+
+    # 3. Fetch PyPI info for the packages (only those changed on PyPI if incremental)
     pypi_data: dict[str, dict] = {}
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        tasks = {
-            _normalise(name): fetch_pypi_info(client, name)
-            for name in all_package_names
-        }
-        results = await asyncio.gather(*tasks.values())
-        for key, result in zip(tasks.keys(), results):
-            pypi_data[key] = result
+    with metrics.span("fetch_pypi"):
+        async with httpx.AsyncClient(
+            timeout=30.0, event_hooks=metrics.httpx_event_hooks()
+        ) as client:
+            if args.incremental:
+                from scripts.pypi_changes import load_state, save_state, sync_packages
+
+                state = load_state(Path(args.pypi_state))
+                pypi_data = await sync_packages(
+                    client, {_normalise(name): name for name in all_package_names}, state
+                )
+                save_state(state, Path(args.pypi_state))
+            else:
+                tasks = {
+                    _normalise(name): fetch_pypi_info(client, name)
+                    for name in all_package_names
+                }
+                results = await asyncio.gather(*tasks.values())
+                for key, result in zip(tasks.keys(), results):
+                    pypi_data[key] = result
+
+    # 4. Add conda-pinned packages PyPI does not cover from local repodata
+    if args.conda_repodata:
+        from scripts.conda_repodata import conda_info
 
-    # 3. Scan module dependencies
-    module_deps = scan_module_deps(modules_json_path, base_dir)
+        conda_names = {
+            name for mod_info in module_deps.values() for name in mod_info.get("conda", [])
+        } - {name for name, info in pypi_data.items() if "error" not in info}
+        with metrics.span("conda_repodata"):
+            pypi_data.update(conda_info([Path(p) for p in args.conda_repodata], conda_names))
+    metrics.count("packages", len(pypi_data))
 
-    # 4. Build snapshot
-    snapshot = build_snapshot(pypi_data, module_deps, watchlist_flat)
+    # 5. Build snapshot
+    with metrics.span("build_snapshot"):
+        snapshot = build_snapshot(
+            pypi_data, module_deps, watchlist_flat, footprint_threshold=args.footprint_threshold
+        )
 
-    # 5. Save snapshot
-    output_dir.mkdir(parents=True, exist_ok=True)
-    scan_date = snapshot["scan_date"][:10]
-    out_file = output_dir / f"{scan_date}.json"
-    out_file.write_text(json.dumps(snapshot, indent=2) + "\n")
+    # 6. Save snapshot
+    with metrics.span("write_snapshot"):
+        out_file = save_snapshot(snapshot, output_dir)
 
-    # 6. Print summary
-    print_summary(snapshot)
+    # 7. Print summary
+    print_summary(snapshot, out_file)
 
 
 # ---------------------------------------------------------------------------
 # CLI entry point
 # ---------------------------------------------------------------------------
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(
-        description="Scan PyPI for dependency updates"
-    )
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the scanner options on *parser*."""
     parser.add_argument(
         "--output",
-        default="monitoring/snapshots/",
+        default=str(config.SNAPSHOTS_DIR),
         help="Output directory for snapshots",
     )
     parser.add_argument(
         "--watchlist",
-        default="monitoring/watchlist.json",
+        default=str(config.WATCHLIST),
         help="Watchlist JSON path",
     )
     parser.add_argument(
         "--modules-json",
-        default="modules.json",
+        default=str(config.MODULES_JSON),
         help="modules.json path",
     )
     parser.add_argument(
         "--base-dir",
-        default="/home/dguerrero/1_modules",
+        default=str(config.base_dir()),
         help="Base directory for module repos",
     )
+    parser.add_argument(
+        "--footprint-threshold",
+        type=float,
+        default=FOOTPRINT_GROWTH_THRESHOLD,
+        help="Flag modules whose watched deps grow by more than this fraction when upgraded",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Re-fetch only packages changed on PyPI since the last incremental scan",
+    )
+    parser.add_argument(
+        "--pypi-state",
+        default=str(config.CACHE_DIR / "pypi_state.json"),
+        help="State file of --incremental (last PyPI serial and package info)",
+    )
+    parser.add_argument(
+        "--used-only",
+        action="store_true",
+        help="Fetch only the packages modules declare (watched or not), "
+        "see the watchlist command",
+    )
+    parser.add_argument(
+        "--conda-repodata",
+        nargs="*",
+        default=[str(p) for p in config.conda_repodata()],
+        metavar="PATH",
+        help="Local conda-forge repodata.json files used to check conda pins "
+        "(default: $MODULE_MONITOR_CONDA_REPODATA)",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Scan PyPI for dependency updates"
+    )
+    add_arguments(parser)
     args = parser.parse_args()
     asyncio.run(main(args))
@@ -1,22 +1,30 @@
 #!/usr/bin/env python3
 """Check which modules are deployed on prod (sepal.io) and test (test.sepal.io)."""
 
+from __future__ import annotations
+
+import argparse
 import base64
 import json
 import os
+import time
 import urllib.request
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from models import DeployStatus, SepalAppList, get_deploy_status
+from scripts import config, metrics
 
-SECRETS_FILE = Path.home() / "1_modules/scripts/sepal-contrib/set_environment/my.secrets.env"
+# The pydantic models are only needed once the app lists are fetched
+if TYPE_CHECKING:
+    from scripts.models import SepalAppList
 
 
-def load_secrets() -> dict[str, str]:
+def load_secrets(path: Path | None = None) -> dict[str, str]:
     """Load key=value pairs from the secrets env file."""
+    path = path or config.secrets_file()
     secrets = {}
-    if SECRETS_FILE.exists():
-        for line in SECRETS_FILE.read_text().splitlines():
+    if path.exists():
+        for line in path.read_text().splitlines():
             line = line.strip()
             if line and not line.startswith("#") and "=" in line:
                 key, _, value = line.partition("=")
@@ -31,16 +39,27 @@ def get_credential(key: str, secrets: dict[str, str]) -> str | None:
 
 def fetch_apps(host: str, user: str, password: str) -> SepalAppList:
     """Fetch and parse the app list from a SEPAL server."""
+    from scripts.models import SepalAppList
+
     url = f"https://{host}/api/apps/list"
     credentials = base64.b64encode(f"{user}:{password}".encode()).decode()
     req = urllib.request.Request(url, headers={"Authorization": f"Basic {credentials}"})
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        data = json.loads(resp.read())
-    return SepalAppList.model_validate(data)
+    start = time.perf_counter()
+    status = None
+    body = b""
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            status = resp.status
+            body = resp.read()
+    finally:
+        metrics.record_request(url, time.perf_counter() - start, len(body), status)
+    return SepalAppList.model_validate(json.loads(body))
+
 
+def main(args: argparse.Namespace) -> None:
+    from scripts.models import get_deploy_status
 
-def main():
-    secrets = load_secrets()
+    secrets = load_secrets(Path(args.secrets) if args.secrets else None)
 
     user = get_credential("SEPAL_USER", secrets)
     password = get_credential("SEPAL_PASSWORD", secrets)
@@ -53,36 +72,54 @@ def main():
         raise SystemExit("SEPAL_USER_TESTENV and SEPAL_PASSWORD_TESTENV must be set (env or secrets file)")
 
     print("Fetching app list from sepal.io …")
-    prod_apps = fetch_apps("sepal.io", user, password)
+    with metrics.span("fetch_prod"):
+        prod_apps = fetch_apps("sepal.io", user, password)
     prod_by_repo = prod_apps.by_repo()
 
     print("Fetching app list from test.sepal.io …")
-    test_apps = fetch_apps("test.sepal.io", user_test, password_test)
+    with metrics.span("fetch_test"):
+        test_apps = fetch_apps("test.sepal.io", user_test, password_test)
     test_by_repo = test_apps.by_repo()
 
-    project_root = Path(__file__).parent.parent
-    modules_path = project_root / "modules.json"
+    modules_path = Path(args.modules_json)
     with open(modules_path) as f:
         data = json.load(f)
 
     updated = 0
-    for cat in data["categories"]:
-        for mod in cat["modules"]:
-            github_url = mod.get("github_url", "")
-            prod_status = get_deploy_status(prod_by_repo.get(github_url)).value
-            test_status = get_deploy_status(test_by_repo.get(github_url)).value
+    with metrics.span("update_modules"):
+        for cat in data["categories"]:
+            for mod in cat["modules"]:
+                github_url = mod.get("github_url", "")
+                prod_status = get_deploy_status(prod_by_repo.get(github_url)).value
+                test_status = get_deploy_status(test_by_repo.get(github_url)).value
+
+                if mod.get("on_prod") != prod_status or mod.get("on_test") != test_status:
+                    updated += 1
+                mod["on_prod"] = prod_status
+                mod["on_test"] = test_status
+
+        with open(modules_path, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+    metrics.count("modules_updated", updated)
 
-            if mod.get("on_prod") != prod_status or mod.get("on_test") != test_status:
-                updated += 1
-            mod["on_prod"] = prod_status
-            mod["on_test"] = test_status
+    print(f"Updated {updated} module(s) in modules.json")
 
-    with open(modules_path, "w") as f:
-        json.dump(data, f, indent=2)
-        f.write("\n")
 
-    print(f"Updated {updated} module(s) in modules.json")
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the server check options on *parser*."""
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path (updated in place)",
+    )
+    parser.add_argument(
+        "--secrets",
+        help=f"Secrets env file (default: {config.secrets_file()})",
+    )
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Check module deployment on SEPAL servers")
+    add_arguments(parser)
+    main(parser.parse_args())
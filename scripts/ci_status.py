@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Collect the latest GitHub Actions run of every module workflow.
+
+For each workflow shown in the README (see
+:func:`generate_readme.get_workflows`), the latest run is read from
+``GET /repos/{owner}/{repo}/actions/workflows/{workflow}/runs``.
+Requests are conditional: the ``ETag`` of every response is kept with
+its result in ``monitoring/cache/ci_status.json`` and sent back as
+``If-None-Match``, so unchanged workflows cost a ``304`` that GitHub
+does not count against the rate limit.  Requests run concurrently up to
+``--concurrency``; the ``X-RateLimit-*`` headers are tracked and once
+the budget is spent the remaining workflows keep their cached result.
+
+The state of each workflow is stored under ``ci_status`` in
+``modules.json``; ``module-monitor readme --ci-status`` renders it as
+text in the Status column instead of the remote badge images.
+
+The token comes from ``GITHUB_TOKEN`` (environment or secrets file);
+without one, requests are anonymous and limited to 60 an hour.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from scripts import config, metrics
+from scripts.check_server_apps import get_credential, load_secrets
+from scripts.generate_readme import get_workflows
+
+API_URL = "https://api.github.com"
+CACHE_PATH = config.CACHE_DIR / "ci_status.json"
+
+# Run conclusion -> state stored in modules.json
+_CONCLUSION_STATES = {
+    "success": "passing",
+    "failure": "failing",
+    "timed_out": "failing",
+    "startup_failure": "failing",
+    "cancelled": "cancelled",
+    "skipped": "skipped",
+}
+
+
+def repo_slug(github_url: str) -> str | None:
+    """``owner/repo`` of a GitHub URL, or ``None``."""
+    prefix = "https://github.com/"
+    if not github_url.startswith(prefix):
+        return None
+    return "/".join(github_url[len(prefix):].strip("/").split("/")[:2])
+
+
+def run_state(data: dict) -> dict:
+    """Summarise a workflow runs API response into the stored state."""
+    runs = data.get("workflow_runs") or []
+    if not runs:
+        return {"state": "no runs"}
+    run = runs[0]
+    if run.get("status") != "completed":
+        state = "running"
+    else:
+        state = _CONCLUSION_STATES.get(run.get("conclusion"), run.get("conclusion") or "unknown")
+    return {
+        "state": state,
+        "conclusion": run.get("conclusion"),
+        "branch": run.get("head_branch"),
+        "run_number": run.get("run_number"),
+        "updated_at": run.get("updated_at"),
+        "url": run.get("html_url"),
+    }
+
+
+def load_cache(path: Path = CACHE_PATH) -> dict:
+    """Load the ``url -> {"etag", "result"}`` cache, or ``{}``."""
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+class RateLimit:
+    """Track the GitHub API budget from response headers."""
+
+    def __init__(self):
+        self.remaining: int | None = None
+        self.reset: int | None = None
+
+    def update(self, headers) -> None:
+        if "x-ratelimit-remaining" in headers:
+            remaining = int(headers["x-ratelimit-remaining"])
+            self.remaining = remaining if self.remaining is None else min(self.remaining, remaining)
+        if "x-ratelimit-reset" in headers:
+            self.reset = int(headers["x-ratelimit-reset"])
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining is not None and self.remaining <= 0
+
+
+async def collect(
+    workflows: dict[str, list[str]],
+    cache: dict,
+    token: str | None = None,
+    api_url: str = API_URL,
+    concurrency: int = 8,
+    transport=None,
+) -> tuple[dict, RateLimit]:
+    """Fetch the latest run of each workflow, conditionally.
+
+    Parameters
+    ----------
+    workflows : dict
+        Mapping of ``owner/repo`` to workflow file names.
+    cache : dict
+        As returned by :func:`load_cache`; updated in place.
+    transport : httpx.AsyncBaseTransport, optional
+        Transport of the HTTP client (a stand-in API in tests).
+
+    Returns
+    -------
+    tuple
+        ``{repo: {workflow: state}}`` and the final :class:`RateLimit`.
+        A workflow that could not be refreshed keeps its cached state
+        with ``"stale": true``, or gets ``{"state": "unknown"}``.
+    """
+    import httpx
+
+    headers = {"Accept": "application/vnd.github+json", "X-GitHub-Api-Version": "2022-11-28"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    semaphore = asyncio.Semaphore(concurrency)
+    limit = RateLimit()
+
+    async def fetch(client, repo, workflow):
+        url = f"{api_url}/repos/{repo}/actions/workflows/{workflow}/runs?per_page=1"
+        cached = cache.get(url)
+        fallback = dict(cached["result"], stale=True) if cached else {"state": "unknown"}
+        async with semaphore:
+            if limit.exhausted:
+                metrics.count("github_rate_limited")
+                return fallback
+            request_headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+            try:
+                resp = await client.get(url, headers=request_headers)
+            except httpx.HTTPError:
+                return fallback
+        limit.update(resp.headers)
+        if resp.status_code == 304 and cached:
+            metrics.count("github_not_modified")
+            return cached["result"]
+        if resp.status_code in (403, 429) and resp.headers.get("x-ratelimit-remaining") == "0":
+            metrics.count("github_rate_limited")
+            return fallback
+        if resp.status_code != 200:
+            return {"state": "unknown", "error": f"HTTP {resp.status_code}"}
+        result = run_state(resp.json())
+        cache[url] = {"etag": resp.headers.get("etag"), "result": result}
+        return result
+
+    jobs = [(repo, workflow) for repo, names in workflows.items() for workflow in names]
+    async with httpx.AsyncClient(
+        headers=headers, timeout=30.0, transport=transport,
+        event_hooks=metrics.httpx_event_hooks(),
+    ) as client:
+        results = await asyncio.gather(*(fetch(client, repo, wf) for repo, wf in jobs))
+
+    status: dict[str, dict] = {}
+    for (repo, workflow), result in zip(jobs, results):
+        status.setdefault(repo, {})[workflow] = result
+    return status, limit
+
+
+def main(args: argparse.Namespace) -> dict:
+    secrets = load_secrets(Path(args.secrets) if args.secrets else None)
+    token = get_credential("GITHUB_TOKEN", secrets)
+
+    modules_path = Path(args.modules_json)
+    data = json.loads(modules_path.read_text())
+    modules = [mod for cat in data["categories"] for mod in cat["modules"]]
+    workflows = {}
+    for mod in modules:
+        slug = repo_slug(mod.get("github_url", ""))
+        if slug and get_workflows(mod):
+            workflows[slug] = get_workflows(mod)
+
+    cache_path = Path(args.cache)
+    cache = load_cache(cache_path)
+    with metrics.span("fetch"):
+        status, limit = asyncio.run(collect(
+            workflows, cache, token=token, api_url=args.api_url, concurrency=args.concurrency
+        ))
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps(cache, indent=1) + "\n")
+
+    updated = 0
+    with metrics.span("update_modules"):
+        for mod in modules:
+            slug = repo_slug(mod.get("github_url", ""))
+            if slug not in status:
+                continue
+            if mod.get("ci_status") != status[slug]:
+                updated += 1
+            mod["ci_status"] = status[slug]
+        if updated:
+            modules_path.write_text(json.dumps(data, indent=2) + "\n")
+    metrics.count("modules_updated", updated)
+
+    for mod in modules:
+        for workflow, state in (mod.get("ci_status") or {}).items():
+            if state["state"] in ("failing", "unknown"):
+                print(f"{state['state'].upper():<8s} {mod['name']:<30s} {workflow}  {state.get('url') or ''}")
+    if limit.remaining is not None:
+        print(f"GitHub API budget left: {limit.remaining} request(s)")
+    print(f"Updated {updated} module(s) in modules.json")
+    return status
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the CI status options on *parser*."""
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path (updated in place)",
+    )
+    parser.add_argument(
+        "--secrets",
+        help=f"Secrets env file holding GITHUB_TOKEN (default: {config.secrets_file()})",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(CACHE_PATH),
+        help="ETag cache path",
+    )
+    parser.add_argument(
+        "--api-url",
+        default=API_URL,
+        help="GitHub API base URL",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum number of requests in flight",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect the latest CI run of every module workflow")
+    add_arguments(parser)
+    main(parser.parse_args())
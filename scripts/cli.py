@@ -0,0 +1,166 @@
+"""``module-monitor`` command line entry point.
+
+Each subcommand lives in its own module exposing ``add_arguments(parser)``
+and ``main(args)``.  Only the module of the subcommand being run is
+imported, and those modules defer httpx, pydantic and jinja2 until they
+need them, so quick commands such as ``module-monitor modules`` start
+without loading the HTTP or validation stack.
+
+Every subcommand run writes its phase timings, HTTP counters and peak RSS
+to ``monitoring/reports/metrics/`` (see :mod:`scripts.metrics`);
+``--profile`` also dumps cProfile stats next to that file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import inspect
+import json
+import sys
+
+from scripts import config, metrics
+
+# Subcommand name -> (implementing module, help text); None = defined here
+COMMANDS = {
+    "modules": (None, "List the modules tracked in modules.json"),
+    "deps": ("scripts.check_deps", "Scan PyPI for dependency updates"),
+    "servers": ("scripts.check_server_apps", "Check module deployment on SEPAL servers"),
+    "readme": ("scripts.generate_readme", "Generate README.rst from modules.json"),
+    "sync-ci": ("scripts.sync_ci", "Sync CI workflows to module repos"),
+    "audit": ("scripts.gather_repo_data", "Gather audit data from module repos"),
+    "ci": ("scripts.ci_status", "Collect the latest CI run of module workflows"),
+    "weight": ("scripts.repo_weight", "Report git object weight of module repos"),
+    "imports": ("scripts.import_index", "Index module imports and check deps"),
+    "watchlist": ("scripts.watchlist_usage", "Propose watchlist changes from module usage"),
+    "resolve": ("scripts.resolver", "Check module upgrades offline from cached metadata"),
+    "pin-age": ("scripts.pin_age", "Report how long module pins have been frozen"),
+    "plan-envs": ("scripts.env_planner", "Plan shared environments for module containers"),
+    "snapshots": ("scripts.snapshots", "List or compact the snapshot store"),
+    "drift": ("scripts.drift", "Show pin drift over the snapshot history"),
+    "diff": ("scripts.snapshot_diff", "Diff two snapshots and draft issues"),
+    "pipeline": ("scripts.pipeline", "Run the nightly steps, skipping unchanged ones"),
+    "serve": ("scripts.query_server", "Serve module status and deps as JSON over HTTP"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Built-in "modules" command
+# ---------------------------------------------------------------------------
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the ``modules`` options on *parser*."""
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the module entries as JSON",
+    )
+
+
+def main_modules(args: argparse.Namespace) -> None:
+    """Print one line per module: category, name, local dir, deploy status."""
+    with open(args.modules_json) as f:
+        data = json.load(f)
+
+    if args.json:
+        print(json.dumps(
+            [dict(mod, category=cat["name"]) for cat in data["categories"] for mod in cat["modules"]],
+            indent=2,
+        ))
+        return
+
+    for cat in data["categories"]:
+        print(cat["name"])
+        for mod in cat["modules"]:
+            print(
+                f"  {mod['name']:<30s} {mod.get('local_dir') or '-':<30s} "
+                f"prod={mod.get('on_prod', '-'):<8s} test={mod.get('on_test', '-')}"
+            )
+
+
+# ---------------------------------------------------------------------------
+# Dispatch
+# ---------------------------------------------------------------------------
+
+
+def _command_from_argv(argv: list[str]) -> str | None:
+    """Return the first argument naming a subcommand, if any."""
+    return next((arg for arg in argv if arg in COMMANDS), None)
+
+
+def build_parser(command: str | None = None) -> argparse.ArgumentParser:
+    """Build the CLI parser.
+
+    Every subcommand is listed, but only *command* gets its options,
+    which requires importing its module.
+    """
+    parser = argparse.ArgumentParser(
+        prog="module-monitor",
+        description="Tracking and tooling for SEPAL modules across sepal-contrib",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the command with cProfile and dump the stats next to its metrics",
+    )
+    parser.add_argument(
+        "--no-metrics",
+        action="store_true",
+        help="Do not write the per-run metrics file",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+    for name, (module_name, help_text) in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        if name == command:
+            module = importlib.import_module(module_name) if module_name else None
+            (module.add_arguments if module else add_arguments)(sub)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the ``module-monitor`` CLI."""
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser(_command_from_argv(argv)).parse_args(argv)
+
+    if args.command == "modules":
+        main_modules(args)
+        return
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    metrics.reset(args.command, argv)
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        result = module.main(args)
+        if inspect.isawaitable(result):
+            import asyncio
+
+            asyncio.run(result)
+    finally:
+        if profiler:
+            profiler.disable()
+        if not args.no_metrics:
+            path = metrics.write()
+            print(f"Metrics written to {path}", file=sys.stderr)
+            if profiler:
+                profile_path = path.with_suffix(".prof")
+                profiler.dump_stats(profile_path)
+                print(f"Profile written to {profile_path}", file=sys.stderr)
+        elif profiler:
+            import pstats
+
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
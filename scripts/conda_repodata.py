@@ -0,0 +1,218 @@
+"""Conda package versions from local ``repodata.json`` files.
+
+A conda channel publishes one ``repodata.json`` (or the smaller
+``current_repodata.json``) per platform subdir; for conda-forge these are
+hundreds of megabytes.  :func:`index_repodata` walks a file with
+:class:`jsonstream.JsonStream` and only decodes the ``name``,
+``version`` and ``timestamp`` of each package record, skipping
+dependencies, hashes and every other field, so memory stays bounded by
+the resulting index rather than the file.
+
+The index (package name -> sorted versions, latest release and its
+date) is cached in ``monitoring/cache/conda/`` under the SHA-256 of the
+repodata file.  The hash itself is remembered per path, size and
+modification time, so an unchanged file is neither hashed nor parsed
+again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+
+from scripts import config
+from scripts.jsonstream import JsonStream
+
+CACHE_DIR = config.CACHE_DIR / "conda"
+INDEX_VERSION = 2
+
+# Top-level repodata keys holding package records (.tar.bz2 and .conda builds)
+_RECORD_KEYS = ("packages", "packages.conda")
+_RECORD_FIELDS = ("name", "version", "timestamp")
+_SEGMENT_RE = re.compile(r"\d+|[a-z]+")
+
+
+def _version_key(version: str) -> tuple:
+    """Sort key putting unparsable versions first, then PEP 440 order.
+
+    Unparsable versions (``1.1.1w``, ``9e``) are ordered among themselves
+    by their numeric and alphabetic segments, then by the raw string, so
+    the order never depends on set iteration.
+
+    >>> sorted(["1.1.1w", "3.0.1", "1.1.1v", "1.1.10a"], key=_version_key)
+    ['1.1.1v', '1.1.1w', '1.1.10a', '3.0.1']
+    """
+    import packaging.version
+
+    try:
+        return (1, packaging.version.Version(version), ())
+    except packaging.version.InvalidVersion:
+        segments = tuple(
+            (1, int(part), "") if part.isdigit() else (0, 0, part)
+            for part in _SEGMENT_RE.findall(version.lower())
+        )
+        return (0, segments, version)
+
+
+def _latest(versions: list[str]) -> str | None:
+    """Highest final release in sorted *versions*, else the highest version."""
+    import packaging.version
+
+    for version in reversed(versions):
+        try:
+            v = packaging.version.Version(version)
+        except packaging.version.InvalidVersion:
+            continue
+        if not v.is_prerelease and not v.is_devrelease:
+            return version
+    return versions[-1] if versions else None
+
+
+def _date(timestamp: int | None) -> str | None:
+    """ISO date of a repodata timestamp (milliseconds, or seconds in old records)."""
+    if not timestamp:
+        return None
+    if timestamp > 1e11:
+        timestamp /= 1000
+    return datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+
+
+def index_repodata(path: Path) -> dict[str, dict]:
+    """Build the version index of one repodata file by streaming it.
+
+    Returns
+    -------
+    dict
+        Mapping of normalised package name to ``versions`` (distinct
+        versions, oldest first), ``latest`` and ``latest_release_date``.
+    """
+    from scripts.check_deps import _normalise
+
+    versions: dict[str, set[str]] = {}
+    released: dict[tuple[str, str], int] = {}
+    with open(path, "rb") as f:
+        stream = JsonStream(f)
+        for key in stream.iter_object():
+            if key not in _RECORD_KEYS:
+                continue
+            for _filename in stream.iter_object():
+                record = {}
+                for field in stream.iter_object():
+                    if field in _RECORD_FIELDS:
+                        record[field] = stream.read_value()
+                name, version = record.get("name"), record.get("version")
+                if not name or not version:
+                    continue
+                name = _normalise(name)
+                versions.setdefault(name, set()).add(version)
+                timestamp = record.get("timestamp") or 0
+                if timestamp > released.get((name, version), 0):
+                    released[name, version] = timestamp
+
+    index = {}
+    for name in sorted(versions):
+        ordered = sorted(versions[name], key=_version_key)
+        latest = _latest(ordered)
+        index[name] = {
+            "versions": ordered,
+            "latest": latest,
+            "latest_release_date": _date(released.get((name, latest))),
+        }
+    return index
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of the file at *path*, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load_json(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def load_index(path: Path, cache_dir: Path = CACHE_DIR) -> dict[str, dict]:
+    """Return the index of the repodata file at *path*, from cache if possible."""
+    path = Path(path)
+    cache_dir = Path(cache_dir)
+    stat = path.stat()
+    files_path = cache_dir / "files.json"
+    files = _load_json(files_path)
+    known = files.get(str(path.resolve()), {})
+    if known.get("size") == stat.st_size and known.get("mtime_ns") == stat.st_mtime_ns:
+        digest = known["sha256"]
+    else:
+        digest = file_digest(path)
+
+    index_path = cache_dir / f"{digest}.json"
+    cached = _load_json(index_path)
+    if cached.get("version") == INDEX_VERSION:
+        index = cached["packages"]
+    else:
+        index = index_repodata(path)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        index_path.write_text(json.dumps({"version": INDEX_VERSION, "packages": index}) + "\n")
+
+    if known.get("sha256") != digest or known.get("mtime_ns") != stat.st_mtime_ns:
+        files[str(path.resolve())] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+        }
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        files_path.write_text(json.dumps(files, indent=1) + "\n")
+    return index
+
+
+def merge_indexes(indexes: list[dict[str, dict]]) -> dict[str, dict]:
+    """Merge the indexes of several subdirs (e.g. ``linux-64`` and ``noarch``)."""
+    merged: dict[str, dict] = {}
+    for index in indexes:
+        for name, info in index.items():
+            current = merged.get(name)
+            if current is None:
+                merged[name] = dict(info)
+                continue
+            versions = sorted(set(current["versions"]) | set(info["versions"]), key=_version_key)
+            latest = _latest(versions)
+            dates = [i["latest_release_date"] for i in (current, info)
+                     if i["latest"] == latest and i["latest_release_date"]]
+            merged[name] = {
+                "versions": versions,
+                "latest": latest,
+                "latest_release_date": max(dates) if dates else None,
+            }
+    return merged
+
+
+def conda_info(paths: list[Path], names: set[str], channel: str = "conda-forge",
+               cache_dir: Path = CACHE_DIR) -> dict[str, dict]:
+    """Version info for the conda packages *names*, shaped like PyPI info.
+
+    Returns
+    -------
+    dict
+        Mapping of each name found in the repodata files to ``latest``,
+        ``latest_release_date``, ``all_versions`` and ``source`` (the
+        *channel*); see :func:`check_deps.fetch_pypi_info`.
+    """
+    index = merge_indexes([load_index(path, cache_dir) for path in paths])
+    return {
+        name: {
+            "latest": index[name]["latest"],
+            "latest_release_date": index[name]["latest_release_date"],
+            "all_versions": index[name]["versions"],
+            "source": channel,
+        }
+        for name in sorted(names)
+        if name in index
+    }
@@ -0,0 +1,55 @@
+"""Shared paths and settings for the module-monitor commands.
+
+Project files (modules.json, monitoring/) are resolved relative to this
+checkout, never to the current working directory.  Machine-specific
+locations come from environment variables:
+
+``MODULE_MONITOR_BASE_DIR``
+    Directory holding the module repo checkouts (default ``~/1_modules``).
+``MODULE_MONITOR_SECRETS``
+    ``KEY=value`` file with SEPAL credentials (default
+    ``<base dir>/scripts/sepal-contrib/set_environment/my.secrets.env``).
+``MODULE_MONITOR_CONDA_REPODATA``
+    Local conda-forge ``repodata.json`` files, separated by ``os.pathsep``
+    (default none: conda pins are not checked).
+
+This module must stay free of third-party imports: the CLI loads it
+before knowing which subcommand will run.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = PROJECT_ROOT / "scripts"
+MODULES_JSON = PROJECT_ROOT / "modules.json"
+README = PROJECT_ROOT / "README.rst"
+
+MONITORING_DIR = PROJECT_ROOT / "monitoring"
+WATCHLIST = MONITORING_DIR / "watchlist.json"
+SNAPSHOTS_DIR = MONITORING_DIR / "snapshots"
+REPORTS_DIR = MONITORING_DIR / "reports"
+DRAFT_ISSUES_DIR = MONITORING_DIR / "draft-issues"
+CACHE_DIR = MONITORING_DIR / "cache"
+
+
+def base_dir() -> Path:
+    """Directory where the module repos are cloned."""
+    env = os.environ.get("MODULE_MONITOR_BASE_DIR")
+    return Path(env).expanduser() if env else Path.home() / "1_modules"
+
+
+def secrets_file() -> Path:
+    """Env file holding the SEPAL server credentials."""
+    env = os.environ.get("MODULE_MONITOR_SECRETS")
+    if env:
+        return Path(env).expanduser()
+    return base_dir() / "scripts" / "sepal-contrib" / "set_environment" / "my.secrets.env"
+
+
+def conda_repodata() -> list[Path]:
+    """Local conda channel repodata files to read conda versions from."""
+    env = os.environ.get("MODULE_MONITOR_CONDA_REPODATA", "")
+    return [Path(p).expanduser() for p in env.split(os.pathsep) if p]
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""Columnar time series of how far module pins fall behind.
+
+Every snapshot contributes one row per ``(module, package)`` pin of a
+watched package.  Rows are stored column by column as flat binary files
+that are memory-mapped with NumPy:
+
+``scan`` (int32)
+    Index into the ``scans`` list of ``meta.json``.
+``module``, ``package`` (int32)
+    Indexes into the ``modules`` and ``packages`` lists of ``meta.json``.
+``behind`` (int16)
+    Number of stable releases newer than the pin, up to the latest.
+``jump`` (int8)
+    Jump from the pin to the latest release, see :data:`JUMPS`.
+
+The store lives in ``monitoring/cache/drift/`` and is derived from the
+snapshots: :func:`update_store` only reads snapshots that are not in it
+yet and adds their rows (merging late, older ones in scan order), so
+snapshots deleted by compaction keep their history.  Queries select rows with boolean masks and aggregate
+per scan with :func:`numpy.bincount`, so they stay vectorised however
+many scans accumulate.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from scripts import config, metrics
+from scripts.check_deps import pin_jump, pinned_version
+from scripts.snapshots import load_manifest, load_snapshot
+
+STORE_DIR = config.CACHE_DIR / "drift"
+STORE_VERSION = 1
+
+# Column name -> dtype; each column is STORE_DIR/<name>.bin
+COLUMNS = {
+    "scan": np.int32,
+    "module": np.int32,
+    "package": np.int32,
+    "behind": np.int16,
+    "jump": np.int8,
+}
+
+# Jump class codes of the ``jump`` column
+JUMPS = ("none", "patch", "minor", "major", "unknown")
+_JUMP_CODES = {name: code for code, name in enumerate(JUMPS)}
+
+
+def _empty_meta() -> dict:
+    return {"version": STORE_VERSION, "rows": 0, "scans": [], "modules": [], "packages": []}
+
+
+def load_meta(store_dir: Path = STORE_DIR) -> dict:
+    """Load the store metadata, or an empty store's."""
+    try:
+        meta = json.loads((Path(store_dir) / "meta.json").read_text())
+    except (OSError, ValueError):
+        return _empty_meta()
+    return meta if meta.get("version") == STORE_VERSION else _empty_meta()
+
+
+def _stable_versions(versions: list[str]) -> list:
+    """Parse and sort the final releases in *versions*."""
+    import packaging.version
+
+    parsed = []
+    for version in versions:
+        try:
+            v = packaging.version.Version(version)
+        except packaging.version.InvalidVersion:
+            continue
+        if not v.is_prerelease and not v.is_devrelease:
+            parsed.append(v)
+    return sorted(parsed)
+
+
+def snapshot_rows(snapshot: dict) -> list[tuple[str, str, int, str]]:
+    """Return ``(module, package, behind, jump)`` for each pin in *snapshot*."""
+    import packaging.version
+
+    packages = snapshot.get("packages", {})
+    releases = {}
+    rows = []
+    for module, info in snapshot.get("module_deps", {}).items():
+        for package, spec in info.get("packages", {}).items():
+            latest = packages.get(package, {}).get("latest")
+            pinned = pinned_version(spec)
+            if not latest or not pinned:
+                continue
+            if package not in releases:
+                releases[package] = _stable_versions(packages[package].get("all_versions", []))
+            stable = releases[package]
+            try:
+                pin = packaging.version.Version(pinned)
+                jump = pin_jump(spec, latest)
+                top = packaging.version.Version(latest)
+            except ValueError:
+                rows.append((module, package, 0, "unknown"))
+                continue
+            behind = max(0, bisect.bisect_right(stable, top) - bisect.bisect_right(stable, pin))
+            rows.append((module, package, behind, jump or "unknown"))
+    return rows
+
+
+def _write_sorted(store_dir: Path, meta: dict, columns: dict[str, list]) -> None:
+    """Merge new rows into the stored columns, rewriting them sorted by scan.
+
+    Used when a snapshot older than the newest stored scan turns up; the
+    stored rows are kept (their snapshots may be gone) and every column
+    file is rewritten with the scans renumbered in date order.
+    """
+    scans = meta["scans"]
+    order = sorted(range(len(scans)), key=lambda i: (scans[i]["scan_date"], scans[i]["id"]))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    merged = {}
+    for name, dtype in COLUMNS.items():
+        path = store_dir / f"{name}.bin"
+        stored = np.fromfile(path, dtype=dtype, count=meta["rows"]) if meta["rows"] else np.empty(0, dtype)
+        merged[name] = np.concatenate([stored, np.asarray(columns[name], dtype=dtype)])
+    merged["scan"] = rank[merged["scan"]].astype(COLUMNS["scan"])
+    perm = np.argsort(merged["scan"], kind="stable")
+    for name in COLUMNS:
+        tmp = store_dir / f"{name}.bin.tmp"
+        merged[name][perm].tofile(tmp)
+        tmp.replace(store_dir / f"{name}.bin")
+    meta["scans"] = [scans[i] for i in order]
+
+
+def update_store(snapshots_dir: Path = config.SNAPSHOTS_DIR, store_dir: Path = STORE_DIR,
+                 rebuild: bool = False) -> int:
+    """Add the rows of snapshots not yet in the store.
+
+    Snapshots are ingested in scan order and appended.  If a snapshot
+    older than the newest one already stored turns up, its rows are
+    merged in and the columns rewritten sorted by scan, so the rows of
+    snapshots already compacted away are kept.
+
+    *rebuild* starts over from the snapshots on disk.  It refuses to run
+    when the store holds scans the manifest no longer has, since their
+    history would be lost; delete the store directory to discard it.
+
+    Returns
+    -------
+    int
+        Number of snapshots added.
+
+    Raises
+    ------
+    ValueError
+        On *rebuild* when stored scans are missing from the manifest.
+    """
+    store_dir = Path(store_dir)
+    meta = load_meta(store_dir)
+    entries = load_manifest(snapshots_dir)
+    if rebuild:
+        lost = {scan["id"] for scan in meta["scans"]} - {entry["id"] for entry in entries}
+        if lost:
+            raise ValueError(
+                f"the drift store holds {len(lost)} scan(s) no longer in the snapshot manifest; "
+                f"rebuilding would lose their history (delete {store_dir} to discard it)"
+            )
+        if store_dir.exists():
+            shutil.rmtree(store_dir)
+        meta = _empty_meta()
+    known = {scan["id"] for scan in meta["scans"]}
+    new = [entry for entry in entries if entry["id"] not in known]
+    if not new:
+        return 0
+    out_of_order = bool(meta["scans"]) and new[0]["scan_date"] < meta["scans"][-1]["scan_date"]
+
+    store_dir.mkdir(parents=True, exist_ok=True)
+    modules = {name: code for code, name in enumerate(meta["modules"])}
+    packages = {name: code for code, name in enumerate(meta["packages"])}
+    columns = {name: [] for name in COLUMNS}
+    for entry in new:
+        snapshot = load_snapshot(Path(snapshots_dir) / entry["file"]).model_dump()
+        scan = len(meta["scans"])
+        meta["scans"].append({"id": entry["id"], "scan_date": entry["scan_date"]})
+        for module, package, behind, jump in snapshot_rows(snapshot):
+            columns["scan"].append(scan)
+            columns["module"].append(modules.setdefault(module, len(modules)))
+            columns["package"].append(packages.setdefault(package, len(packages)))
+            columns["behind"].append(min(behind, np.iinfo(np.int16).max))
+            columns["jump"].append(_JUMP_CODES[jump])
+
+    if out_of_order:
+        _write_sorted(store_dir, meta, columns)
+    else:
+        for name, dtype in COLUMNS.items():
+            path = store_dir / f"{name}.bin"
+            path.touch()
+            with open(path, "r+b") as f:
+                # Drop bytes left by an interrupted update before appending
+                f.truncate(meta["rows"] * np.dtype(dtype).itemsize)
+                f.seek(0, 2)
+                np.asarray(columns[name], dtype=dtype).tofile(f)
+    meta["rows"] += len(columns["scan"])
+    meta["modules"] = list(modules)
+    meta["packages"] = list(packages)
+    # Written last, so an interrupted update leaves the old row count in place
+    (store_dir / "meta.json").write_text(json.dumps(meta) + "\n")
+    return len(new)
+
+
+def load_store(store_dir: Path = STORE_DIR) -> dict:
+    """Memory-map the store.
+
+    Returns
+    -------
+    dict
+        The metadata plus ``columns`` (name -> read-only array) and
+        ``scan_dates`` (``datetime64[s]`` per scan).
+    """
+    store_dir = Path(store_dir)
+    meta = load_meta(store_dir)
+    rows = meta["rows"]
+    meta["columns"] = {
+        name: np.memmap(store_dir / f"{name}.bin", dtype=dtype, mode="r", shape=(rows,))
+        if rows else np.empty(0, dtype=dtype)
+        for name, dtype in COLUMNS.items()
+    }
+    meta["scan_dates"] = np.array(
+        [datetime.fromisoformat(s["scan_date"].replace("Z", "")) for s in meta["scans"]],
+        dtype="datetime64[s]",
+    )
+    return meta
+
+
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+
+def _mask(store: dict, module: str | None = None, package: str | None = None) -> np.ndarray:
+    cols = store["columns"]
+    mask = np.ones(store["rows"], dtype=bool)
+    for key, name in (("module", module), ("package", package)):
+        if name is None:
+            continue
+        if name not in store[f"{key}s"]:
+            return np.zeros(store["rows"], dtype=bool)
+        mask &= cols[key] == store[f"{key}s"].index(name)
+    return mask
+
+
+def _per_scan(store: dict, mask: np.ndarray) -> dict:
+    """Aggregate the rows selected by *mask* per scan."""
+    cols = store["columns"]
+    n = len(store["scans"])
+    scan = cols["scan"][mask]
+    behind = cols["behind"][mask]
+    pins = np.bincount(scan, minlength=n)
+    total = np.bincount(scan, weights=behind, minlength=n)
+    worst = np.zeros(n, dtype=np.int64)
+    np.maximum.at(worst, scan, behind)
+    jumps = np.bincount(
+        scan.astype(np.int64) * len(JUMPS) + cols["jump"][mask], minlength=n * len(JUMPS)
+    ).reshape(n, len(JUMPS))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(pins > 0, total / pins, np.nan)
+    present = pins > 0
+    return {
+        "scan_date": store["scan_dates"][present],
+        "pins": pins[present],
+        "behind_pins": np.bincount(scan[behind > 0], minlength=n)[present],
+        "total_behind": total[present].astype(np.int64),
+        "mean_behind": mean[present],
+        "max_behind": worst[present],
+        "jumps": {name: jumps[present, code] for code, name in enumerate(JUMPS)},
+    }
+
+
+def module_series(store: dict, module: str, package: str | None = None) -> dict:
+    """Per-scan drift of *module*'s pins (only *package* if given)."""
+    return _per_scan(store, _mask(store, module=module, package=package))
+
+
+def package_series(store: dict, package: str) -> dict:
+    """Per-scan drift of *package* across all modules pinning it."""
+    return _per_scan(store, _mask(store, package=package))
+
+
+def fleet_series(store: dict) -> dict:
+    """Per-scan drift of every pin of every module."""
+    return _per_scan(store, _mask(store))
+
+
+def latest_by_module(store: dict, package: str | None = None) -> dict[str, int]:
+    """Releases behind per module at the latest scan, summed over packages."""
+    cols = store["columns"]
+    if not store["scans"]:
+        return {}
+    mask = _mask(store, package=package) & (cols["scan"] == len(store["scans"]) - 1)
+    totals = np.bincount(cols["module"][mask], weights=cols["behind"][mask],
+                         minlength=len(store["modules"]))
+    return {
+        store["modules"][code]: int(totals[code])
+        for code in np.unique(cols["module"][mask])
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    with metrics.span("update"):
+        try:
+            added = update_store(Path(args.snapshots_dir), Path(args.store), rebuild=args.rebuild)
+        except ValueError as exc:
+            raise SystemExit(f"Not rebuilding: {exc}")
+    with metrics.span("query"):
+        store = load_store(Path(args.store))
+        if args.module:
+            title = f"{args.module}" + (f" / {args.package}" if args.package else "")
+            series = module_series(store, args.module, args.package)
+        elif args.package:
+            title = args.package
+            series = package_series(store, args.package)
+        else:
+            title = "all modules"
+            series = fleet_series(store)
+
+    print(f"Drift store: {len(store['scans'])} scan(s), {store['rows']} row(s), {added} new")
+    print(f"\n{title}")
+    print(f"{'scan':<20s} {'pins':>5s} {'behind':>6s} {'total':>6s} {'mean':>6s} {'max':>5s}  major minor patch")
+    n = len(series["scan_date"])
+    for j in range(max(0, n - args.last) if args.last else 0, n):
+        print(
+            f"{str(series['scan_date'][j]):<20s} {series['pins'][j]:5d} {series['behind_pins'][j]:6d} "
+            f"{series['total_behind'][j]:6d} {series['mean_behind'][j]:6.1f} {series['max_behind'][j]:5d}  "
+            f"{series['jumps']['major'][j]:5d} {series['jumps']['minor'][j]:5d} {series['jumps']['patch'][j]:5d}"
+        )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the drift store options on *parser*."""
+    parser.add_argument("--module", help="Show the drift of this module's pins")
+    parser.add_argument("--package", help="Show the drift of this package (across modules)")
+    parser.add_argument(
+        "--last",
+        type=int,
+        default=20,
+        help="Number of most recent scans printed (0 for all)",
+    )
+    parser.add_argument(
+        "--snapshots-dir",
+        default=str(config.SNAPSHOTS_DIR),
+        help="Snapshot directory",
+    )
+    parser.add_argument(
+        "--store",
+        default=str(STORE_DIR),
+        help="Drift store directory",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the store from all snapshots (refused if it would drop compacted history)",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chart pin drift across snapshot history")
+    add_arguments(parser)
+    main(parser.parse_args())
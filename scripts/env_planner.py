@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Plan shared base environments for module containers.
+
+Each module runs in its own environment unless it is merged into a
+bundle (``migration.merge_target`` in ``modules.json``).  This planner
+takes the deps every module declares (see
+:func:`check_deps.scan_module_deps`) and groups the modules whose
+constraints can be met by one environment:
+
+- two sets of constraints on a package conflict when no version
+  satisfies all of them.  When the resolver's metadata cache
+  (``monitoring/cache/metadata/``, filled by ``module-monitor resolve
+  --fetch``) lists the package's releases, those are the candidates.
+  Otherwise the specifiers are intersected directly: every version they
+  name (and the bounds implied by ``~=`` and ``.*``) is tried, along with
+  one version inside each gap between them, so ``>1.0`` and ``<2`` are
+  compatible even though neither names a version the other allows;
+- modules are placed first-fit into groups, most conflicted first, which
+  keeps the number of distinct environments low;
+- each group's base layer is the set of packages every member declares,
+  pinned to the newest version that satisfies all of them;
+- for every pair of groups, and for every module with a pending merge
+  target, the packages whose constraints cannot be met together are
+  reported as the conflicts blocking that merge.
+
+Modules already merged into their target (migration status ``done``) no
+longer run their own environment and are left out of the plan.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from itertools import combinations
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from scripts import config, metrics
+from scripts.check_deps import scan_module_deps
+from scripts.resolver import METADATA_DIR, MetadataCache, module_specifier
+
+if TYPE_CHECKING:
+    from packaging.version import Version
+
+def known_versions(module_deps: dict, cache: MetadataCache | None = None) -> dict[str, list]:
+    """Released versions of every declared package in *cache*, newest first.
+
+    Packages the cache knows nothing about are left out; their specs are
+    compared with :func:`spec_candidates` instead.
+    """
+    from packaging.version import InvalidVersion, Version
+
+    versions: dict[str, list] = {}
+    if cache is None:
+        return versions
+    packages = {package for info in module_deps.values() for package in info.get("packages", {})}
+    for package in sorted(packages):
+        found = set()
+        for name in cache.versions(package) or {}:
+            try:
+                found.add(Version(name))
+            except InvalidVersion:
+                continue
+        if found:
+            versions[package] = sorted(found, reverse=True)
+    return versions
+
+
+def _version(release: tuple) -> Version:
+    from packaging.version import Version
+
+    return Version(".".join(map(str, release)))
+
+
+def _spec_points(specs: list[str]) -> tuple[set, set]:
+    """Versions named by *specs*, and the upper bounds implied by ``~=`` and ``.*``."""
+    from packaging.version import InvalidVersion, Version
+
+    named, implied = set(), set()
+    for spec in specs:
+        for specifier in module_specifier(spec):
+            text = specifier.version
+            try:
+                version = Version(text.removesuffix(".*"))
+            except InvalidVersion:
+                continue
+            named.add(version)
+            release = version.release
+            if text.endswith(".*"):
+                implied.add(_version(release[:-1] + (release[-1] + 1,)))
+            elif specifier.operator == "~=" and len(release) > 1:
+                implied.add(_version(release[:-2] + (release[-2] + 1,)))
+    return named, implied
+
+
+def spec_candidates(specs: list[str]) -> list:
+    """Versions that decide whether *specs* can be met together, newest first.
+
+    The versions named by the specs (plus the upper bounds implied by
+    ``~=X.Y`` and ``==X.Y.*``) split the version line into points and
+    gaps; the candidates are those points, one version inside each gap,
+    ``0`` and the major release after the highest point.  Some candidate
+    satisfies every spec exactly when the specs intersect.
+    """
+    from packaging.version import Version
+
+    named, implied = _spec_points(specs)
+    points = named | implied
+    candidates = points | {Version("0")}
+    candidates.update(_version(point.release + (0, 0, 0, 1)) for point in points)
+    if points:
+        candidates.add(_version((max(points).release[0] + 1,)))
+    return sorted(candidates, reverse=True)
+
+
+def satisfying(specs: list[str], candidates: list) -> list | None:
+    """Candidates allowed by every spec in *specs*, or ``None`` if nothing constrains."""
+    sets = [module_specifier(spec) for spec in specs if spec.strip()]
+    if not sets:
+        return None
+    return [v for v in candidates if all(s.contains(v, prereleases=True) for s in sets)]
+
+
+def conflicts(left: dict[str, list[str]], right: dict[str, list[str]], versions: dict) -> list[dict]:
+    """Packages whose constraints in *left* and *right* no version satisfies together.
+
+    Both arguments map package to the specs collected from a group of
+    modules.  Candidates are the package's releases in *versions* (see
+    :func:`known_versions`), else :func:`spec_candidates`.
+    """
+    found = []
+    for package in sorted(left.keys() & right.keys()):
+        specs = left[package] + right[package]
+        allowed = satisfying(specs, versions.get(package) or spec_candidates(specs))
+        if allowed is not None and not allowed:
+            found.append({
+                "package": package,
+                "left": sorted(set(left[package]) - {""}),
+                "right": sorted(set(right[package]) - {""}),
+            })
+    return found
+
+
+def _specs(packages: dict[str, str]) -> dict[str, list[str]]:
+    return {package: [spec] for package, spec in packages.items()}
+
+
+def plan_groups(module_deps: dict, versions: dict) -> list[dict]:
+    """Group modules whose constraints fit in one environment.
+
+    Returns
+    -------
+    list
+        Groups with ``modules`` (names) and ``specs`` (package -> every
+        spec declared by a member).
+    """
+    names = sorted(module_deps)
+    specs = {name: _specs(module_deps[name].get("packages", {})) for name in names}
+    clashes = {name: 0 for name in names}
+    for a, b in combinations(names, 2):
+        if conflicts(specs[a], specs[b], versions):
+            clashes[a] += 1
+            clashes[b] += 1
+
+    groups: list[dict] = []
+    # Most conflicted first: they are the hardest to place
+    for name in sorted(names, key=lambda n: (-clashes[n], -len(specs[n]), n)):
+        for group in groups:
+            if not conflicts(group["specs"], specs[name], versions):
+                group["modules"].append(name)
+                for package, declared in specs[name].items():
+                    group["specs"].setdefault(package, []).extend(declared)
+                break
+        else:
+            groups.append({"modules": [name], "specs": {p: list(s) for p, s in specs[name].items()}})
+    for group in groups:
+        group["modules"].sort()
+    return groups
+
+
+def base_layer(group: dict, module_deps: dict, versions: dict) -> dict[str, str]:
+    """Packages every member of *group* declares, with the pin they can share.
+
+    The pin is ``==<newest allowed version>`` among the package's known
+    releases (or, without any, the versions its specs name), else the
+    members' specs joined.
+    """
+    members = [set(module_deps[m].get("packages", {})) for m in group["modules"]]
+    layer = {}
+    for package in sorted(set.intersection(*members)):
+        specs = group["specs"][package]
+        named = sorted(_spec_points(specs)[0], reverse=True)
+        allowed = satisfying(specs, versions.get(package) or named)
+        if allowed:
+            layer[package] = f"=={allowed[0]}"
+        else:
+            layer[package] = ",".join(sorted(set(specs) - {""}))
+    return layer
+
+
+def merge_targets(modules_json: Path) -> dict[str, dict]:
+    """Modules with a merge target, keyed by name.
+
+    Returns
+    -------
+    dict
+        Mapping of module name to ``target`` (module name of the target,
+        matched on its GitHub URL, or the raw target) and ``done``.
+    """
+    data = json.loads(Path(modules_json).read_text())
+    modules = [mod for cat in data["categories"] for mod in cat["modules"]]
+    by_repo = {
+        mod.get("github_url", "").removeprefix("https://github.com/"): mod["name"]
+        for mod in modules
+    }
+    targets = {}
+    for mod in modules:
+        migration = mod.get("migration") or {}
+        target = migration.get("merge_target")
+        if target:
+            targets[mod["name"]] = {
+                "target": by_repo.get(target, target),
+                "done": migration.get("status") == "done",
+            }
+    return targets
+
+
+def plan(module_deps: dict, targets: dict[str, dict], versions: dict) -> dict:
+    """Build the full plan.
+
+    Returns
+    -------
+    dict
+        ``groups`` (``modules``, ``base`` layer and per-module ``extra``
+        packages), ``blocked`` (conflicts between each pair of groups),
+        ``merge_targets`` (conflicts of each pending merge) and
+        ``merged`` (modules already living in their target).
+    """
+    merged = sorted(name for name, t in targets.items() if t["done"])
+    active = {name: info for name, info in module_deps.items() if name not in merged}
+    groups = plan_groups(active, versions)
+
+    planned = []
+    for group in groups:
+        base = base_layer(group, active, versions)
+        planned.append({
+            "modules": group["modules"],
+            "base": base,
+            "extra": {
+                name: sorted(set(active[name].get("packages", {})) - base.keys())
+                for name in group["modules"]
+            },
+        })
+    blocked = [
+        {"left": groups[i]["modules"], "right": groups[j]["modules"],
+         "conflicts": conflicts(groups[i]["specs"], groups[j]["specs"], versions)}
+        for i, j in combinations(range(len(groups)), 2)
+    ]
+    pending = {}
+    for name, target in sorted(targets.items()):
+        if target["done"] or name not in active or target["target"] not in active:
+            continue
+        pending[name] = {
+            "target": target["target"],
+            "conflicts": conflicts(
+                _specs(active[name]["packages"]), _specs(active[target["target"]]["packages"]), versions
+            ),
+        }
+    return {"groups": planned, "blocked": blocked, "merge_targets": pending, "merged": merged}
+
+
+def main(args: argparse.Namespace) -> dict:
+    with metrics.span("scan_modules"):
+        module_deps = scan_module_deps(Path(args.modules_json), Path(args.base_dir))
+    with metrics.span("plan"):
+        versions = known_versions(module_deps, MetadataCache(Path(args.cache)))
+        report = plan(module_deps, merge_targets(Path(args.modules_json)), versions)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+
+    active = sum(len(group["modules"]) for group in report["groups"])
+    print(f"{active} environment(s) -> {len(report['groups'])} shared environment(s)"
+          f" ({len(report['merged'])} module(s) already merged)")
+    for i, group in enumerate(report["groups"], 1):
+        print(f"\nENV {i}: {', '.join(group['modules'])}")
+        print(f"  base ({len(group['base'])}): "
+              + ", ".join(f"{p}{pin}" for p, pin in group["base"].items()))
+    for entry in report["blocked"]:
+        if entry["conflicts"]:
+            blockers = ", ".join(c["package"] for c in entry["conflicts"])
+            print(f"\nBLOCKED ENV {{{', '.join(entry['left'])}}} + {{{', '.join(entry['right'])}}}: {blockers}")
+    for name, entry in report["merge_targets"].items():
+        state = ", ".join(c["package"] for c in entry["conflicts"]) or "compatible"
+        print(f"MERGE   {name} -> {entry['target']}: {state}")
+    print(f"\nPlan written to {output}")
+    return report
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the environment planner options on *parser*."""
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--base-dir",
+        default=str(config.base_dir()),
+        help="Base directory for module repos",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(METADATA_DIR),
+        help="Resolver metadata cache directory (release lists used as candidates)",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(config.REPORTS_DIR / "env_plan.json"),
+        help="Output JSON path",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan shared module environments")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -1,19 +1,31 @@
 #!/usr/bin/env python3
-"""Gather structured data from all module repos for audit."""
+"""Gather structured data from all module repos for audit.
 
+Every ``local_dir`` listed in modules.json is analysed, optionally in a
+process pool.  Each finished repo is appended to a JSON Lines stream as
+soon as it is done, so one failing repo never loses the others, and the
+combined ``audit_data.json`` is written at the end.
+
+Results are cached per repo under its git HEAD plus a fingerprint of the
+dirty working tree and the entry notebook audited; repos whose state did not change since the last run
+are served from the cache unless ``--force`` is given.
+"""
+
+import argparse
+import ast
+import hashlib
 import json
 import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
-BASE = Path("/home/dguerrero/1_modules")
+from scripts import config, metrics
+from scripts.notebooks import iter_code_sources, notebook_load_metrics
 
-REPOS = [
-    "sepal_pysmm", "gfc_wrapper_python", "vector_manager", "clip-time-series",
-    "alos_mosaics", "sdg_15.3.1", "tmf_sepal", "planet-order",
-    "coverage_analysis", "fcdm", "basin-rivers", "gee_source",
-    "active-fires-explorer", "sepal_smfm_biota", "gwb", "cumsum_change",
-    "weplan", "sepal-leafmap", "eSBAE_notebooks", "deforestation-alerts-module",
-]
+# Bump whenever analyze_repo output changes so stale cache entries are dropped
+CACHE_VERSION = 3
 
 
 def safe_read(path, max_lines=200):
@@ -28,39 +40,142 @@ def safe_read(path, max_lines=200):
         return None
 
 
-def get_tree(root, max_depth=3, prefix=""):
-    """Get directory tree as string."""
-    entries = []
+# Directories never worth walking: VCS metadata, caches, vendored deps
+# and virtualenvs.
+SKIP_DIRS = {
+    ".git", "__pycache__", ".ipynb_checkpoints", "node_modules", ".mypy_cache",
+    ".ruff_cache", ".pytest_cache", ".tox", ".nox", ".venv", "venv", "env",
+    "site-packages", ".eggs",
+}
+
+
+def imports_from_source(source):
+    """Return the top-level names of every absolute import in *source*.
+
+    IPython magics and shell escapes (``%``/``!`` lines, as found in
+    notebook cells) are dropped before parsing.  Unparseable sources
+    yield an empty set.
+    """
+    lines = [
+        "" if line.lstrip().startswith(("%", "!")) else line
+        for line in source.splitlines()
+    ]
     try:
-        items = sorted(os.listdir(root))
-    except PermissionError:
+        tree = ast.parse("\n".join(lines))
+    except (SyntaxError, ValueError):
+        return set()
+
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module.split(".")[0])
+    return names
+
+
+def detect_gee(imports):
+    """Check if a file importing *imports* uses the Earth Engine API."""
+    return "ee" in imports
+
+
+def detect_planet(imports):
+    """Check if a file importing *imports* uses the Planet SDK."""
+    return "planet" in imports
+
+
+# Import detectors run over every .py file; result key -> predicate on the
+# file's import names (see imports_from_source)
+DETECTORS = {
+    "uses_gee": detect_gee,
+    "uses_planet": detect_planet,
+}
+
+
+def walk_repo(root, detectors=DETECTORS):
+    """Walk *root* once with ``os.scandir``, pruning :data:`SKIP_DIRS`.
+
+    Every ``.py`` file is read and parsed at most once, and its import
+    names are handed to all detectors that have not matched yet; reading
+    stops as soon as every detector has matched.  Symlinked directories are listed but not followed.
+
+    Returns
+    -------
+    dict
+        ``listing`` maps each visited directory path to its sorted
+        ``(name, is_dir)`` entries (``None`` when it could not be read),
+        ``flags`` maps each detector key to a bool.
+    """
+    listing = {}
+    flags = {key: False for key in detectors}
+    pending = dict(detectors)
+    stack = [root]
+
+    while stack:
+        path = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = []
+                for entry in it:
+                    if entry.name in SKIP_DIRS:
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    entries.append((entry.name, is_dir))
+                    if is_dir:
+                        if not entry.is_symlink():
+                            stack.append(entry.path)
+                    elif pending and entry.name.endswith(".py"):
+                        try:
+                            with open(entry.path, errors="ignore") as f:
+                                content = f.read()
+                        except OSError:
+                            continue
+                        imports = imports_from_source(content)
+                        for key, detect in list(pending.items()):
+                            if detect(imports):
+                                flags[key] = True
+                                del pending[key]
+        except OSError:
+            listing[path] = None
+            continue
+        entries.sort()
+        listing[path] = entries
+
+    return {"listing": listing, "flags": flags}
+
+
+def render_tree(listing, root, max_depth=3, prefix=""):
+    """Render the directory tree below *root* from a :func:`walk_repo` listing."""
+    items = listing.get(root)
+    if items is None:
         return ["[permission denied]"]
 
-    # Skip common non-essential dirs
-    skip = {".git", "__pycache__", ".ipynb_checkpoints", "node_modules", ".mypy_cache", ".ruff_cache"}
-    items = [i for i in items if i not in skip]
-
-    for i, item in enumerate(items):
-        path = os.path.join(root, item)
+    lines = []
+    for i, (item, is_dir) in enumerate(items):
         is_last = i == len(items) - 1
         connector = "└── " if is_last else "├── "
-        entries.append(f"{prefix}{connector}{item}")
-        if os.path.isdir(path) and max_depth > 1:
-            extension = "    " if is_last else "│   "
-            entries.extend(get_tree(path, max_depth - 1, prefix + extension))
-    return entries
+        lines.append(f"{prefix}{connector}{item}")
+        if is_dir and max_depth > 1:
+            path = os.path.join(root, item)
+            if path in listing:
+                extension = "    " if is_last else "│   "
+                lines.extend(render_tree(listing, path, max_depth - 1, prefix + extension))
+    return lines
 
 
-def count_component_files(comp_dir):
+def count_component_files(listing, comp_dir):
     """Count tiles, models, widgets, scripts in component/."""
     counts = {"tiles": 0, "models": 0, "widgets": 0, "scripts": 0, "other": 0}
-    if not comp_dir.is_dir():
-        return counts
-    for sub in comp_dir.iterdir():
-        if sub.is_dir():
-            name = sub.name.lower()
-            py_files = list(sub.glob("*.py"))
-            n = len([f for f in py_files if f.name != "__init__.py"])
+    for sub, is_dir in listing.get(comp_dir) or []:
+        if is_dir:
+            name = sub.lower()
+            n = len([
+                f for f, f_is_dir in listing.get(os.path.join(comp_dir, sub)) or []
+                if not f_is_dir and f.endswith(".py") and f != "__init__.py"
+            ])
             if "tile" in name:
                 counts["tiles"] = n
             elif "model" in name:
@@ -71,35 +186,11 @@ def count_component_files(comp_dir):
                 counts["scripts"] = n
             else:
                 counts["other"] += n
-        elif sub.suffix == ".py" and sub.name != "__init__.py":
+        elif sub.endswith(".py") and sub != "__init__.py":
             counts["other"] += 1
     return counts
 
 
-def check_gee_usage(repo_path):
-    """Check if repo uses GEE."""
-    for py_file in repo_path.rglob("*.py"):
-        try:
-            content = py_file.read_text(errors="ignore")
-            if "import ee" in content or "ee.Initialize" in content:
-                return True
-        except Exception:
-            pass
-    return False
-
-
-def check_planet_usage(repo_path):
-    """Check if repo uses Planet API."""
-    for py_file in repo_path.rglob("*.py"):
-        try:
-            content = py_file.read_text(errors="ignore")
-            if "planet" in content.lower() and ("api" in content.lower() or "Planet" in content):
-                return True
-        except Exception:
-            pass
-    return False
-
-
 def get_sepal_ui_version(repo_path):
     """Extract sepal_ui version from requirements."""
     for fname in ["requirements.txt", "sepal_environment.yml"]:
@@ -112,34 +203,57 @@ def get_sepal_ui_version(repo_path):
     return None
 
 
-def analyze_repo(local_dir):
+def load_local_dirs(modules_json=config.MODULES_JSON):
+    """Return every distinct ``local_dir`` in modules.json, in file order."""
+    with open(modules_json) as f:
+        data = json.load(f)
+    local_dirs = []
+    for cat in data["categories"]:
+        for mod in cat["modules"]:
+            local_dir = mod.get("local_dir")
+            if local_dir and local_dir not in local_dirs:
+                local_dirs.append(local_dir)
+    return local_dirs
+
+
+def load_entry_notebooks(modules_json=config.MODULES_JSON):
+    """Map each ``local_dir`` to its entry notebook (``ci.notebook``)."""
+    with open(modules_json) as f:
+        data = json.load(f)
+    notebooks = {}
+    for cat in data["categories"]:
+        for mod in cat["modules"]:
+            notebook = (mod.get("ci") or {}).get("notebook")
+            if mod.get("local_dir") and notebook:
+                notebooks.setdefault(mod["local_dir"], notebook)
+    return notebooks
+
+
+def analyze_repo(local_dir, base=None, notebook="ui.ipynb"):
     """Analyze a single repo."""
-    repo = BASE / local_dir
+    repo = Path(base or config.base_dir()) / local_dir
     if not repo.is_dir():
         return {"error": f"Directory not found: {repo}"}
 
     data = {"local_dir": local_dir, "path": str(repo)}
 
+    # Single pass over the repo: directory listing + content detectors
+    walk = walk_repo(str(repo))
+    listing = walk["listing"]
+
     # Tree structure (depth 3)
-    data["tree"] = "\n".join(get_tree(str(repo), max_depth=3))
+    data["tree"] = "\n".join(render_tree(listing, str(repo), max_depth=3))
 
-    # ui.ipynb
-    ui_path = repo / "ui.ipynb"
+    # Entry notebook (ui.ipynb unless modules.json says otherwise)
+    ui_path = repo / notebook
     if ui_path.exists():
-        raw = safe_read(ui_path, max_lines=300)
-        if raw:
-            # Extract just the source cells (not outputs)
-            try:
-                nb = json.loads(raw if "total lines" not in raw else open(ui_path).read())
-                sources = []
-                for cell in nb.get("cells", []):
-                    if cell.get("cell_type") == "code":
-                        src = "".join(cell.get("source", []))
-                        if src.strip():
-                            sources.append(src)
-                data["ui_ipynb"] = "\n---\n".join(sources)
-            except Exception:
-                data["ui_ipynb"] = "[parse error]"
+        # Extract just the source cells (outputs are never loaded)
+        try:
+            sources = [src for src in iter_code_sources(ui_path) if src.strip()]
+            data["ui_ipynb"] = "\n---\n".join(sources)
+            data["notebook_load"] = {notebook: notebook_load_metrics(ui_path)}
+        except (OSError, ValueError):
+            data["ui_ipynb"] = "[parse error]"
     else:
         # Check for alternative entry points
         for alt in ["app.py", "solara_app.py", "main.py"]:
@@ -148,10 +262,10 @@ def analyze_repo(local_dir):
                 data[f"entry_{alt}"] = safe_read(alt_path, max_lines=100)
 
     # Component structure
-    comp_dir = repo / "component"
-    if comp_dir.is_dir():
-        data["component_tree"] = "\n".join(get_tree(str(comp_dir), max_depth=3))
-        data["component_counts"] = count_component_files(comp_dir)
+    comp_dir = str(repo / "component")
+    if comp_dir in listing:
+        data["component_tree"] = "\n".join(render_tree(listing, comp_dir, max_depth=3))
+        data["component_counts"] = count_component_files(listing, comp_dir)
     else:
         data["component_tree"] = "[no component/ directory]"
         data["component_counts"] = {}
@@ -163,8 +277,7 @@ def analyze_repo(local_dir):
             data[fname.replace(".", "_")] = safe_read(fpath, max_lines=80)
 
     # GEE and Planet
-    data["uses_gee"] = check_gee_usage(repo)
-    data["uses_planet"] = check_planet_usage(repo)
+    data.update(walk["flags"])
     data["sepal_ui_version"] = get_sepal_ui_version(repo)
 
     # .gitignore
@@ -200,18 +313,259 @@ def analyze_repo(local_dir):
     return data
 
 
-def main():
-    results = {}
-    for local_dir in REPOS:
-        print(f"Analyzing {local_dir}...")
-        results[local_dir] = analyze_repo(local_dir)
+def repo_state_key(repo, notebook="ui.ipynb"):
+    """Return a cache key for the current state of the git repo at *repo*.
+
+    The key is the HEAD commit plus a fingerprint of ``git status``
+    (untracked directories expanded to their files), the size/mtime of
+    every dirty or untracked path and the audit options (*notebook*), so
+    new commits, local edits and a different entry notebook all
+    invalidate it.  Returns ``None`` when *repo* is not a git checkout.
+    """
+    try:
+        head = subprocess.run(
+            ["git", "-C", str(repo), "rev-parse", "HEAD"],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "-C", str(repo), "status", "--porcelain=v1", "-z", "-uall"],
+            check=True, capture_output=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    digest = hashlib.sha256(status)
+    digest.update(f"notebook={notebook};".encode())
+    records = iter(status.split(b"\0"))
+    for record in records:
+        if len(record) < 4:
+            continue
+        paths = [record[3:]]
+        # Renames and copies are followed by their source path, unprefixed
+        if b"R" in record[:2] or b"C" in record[:2]:
+            paths.append(next(records, b""))
+        for path in paths:
+            try:
+                st = os.stat(os.path.join(repo, os.fsdecode(path)))
+            except OSError:
+                continue
+            digest.update(f"{st.st_size}:{st.st_mtime_ns};".encode())
+    return f"{head}:{digest.hexdigest()[:16]}"
 
-    output_path = BASE / "module_monitor" / "audit_data.json"
-    with open(output_path, "w") as f:
-        json.dump(results, f, indent=2, default=str)
+
+def load_cache(path):
+    """Load the audit cache, returning ``{}`` when missing or outdated."""
+    try:
+        data = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("repos", {})
+
+
+def save_cache(path, repos):
+    """Write the audit cache entries in *repos* to *path*."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(
+        json.dumps({"version": CACHE_VERSION, "repos": repos}, default=str) + "\n"
+    )
+
+
+def timed_analyze(local_dir, base=None, notebook="ui.ipynb"):
+    """Run :func:`analyze_repo`, turning any exception into an error entry.
+
+    Returns
+    -------
+    tuple
+        ``(local_dir, data, seconds)``.
+    """
+    start = time.perf_counter()
+    try:
+        data = analyze_repo(local_dir, base, notebook)
+    except Exception as exc:
+        data = {"error": f"{type(exc).__name__}: {exc}"}
+    return local_dir, data, round(time.perf_counter() - start, 3)
+
+
+def audit_repos(
+    local_dirs, base=None, workers=1, cache=None, force=False, notebooks=None
+):
+    """Analyze *local_dirs* and yield results as each repo finishes.
+
+    *notebooks* maps a ``local_dir`` to its entry notebook when it is not
+    ``ui.ipynb`` (see :func:`load_entry_notebooks`).
+
+    When a *cache* dict (see :func:`load_cache`) is given, repos whose
+    :func:`repo_state_key` matches their cached entry are yielded first
+    with ``audit_cached`` set, and *cache* is updated in place with every
+    fresh result.  *force* re-analyzes everything.
+
+    With ``workers > 1`` the remaining repos are fanned out over a
+    process pool and yielded in completion order; otherwise they run
+    serially in order.
+
+    Yields
+    ------
+    tuple
+        ``(local_dir, data, seconds)`` as returned by :func:`timed_analyze`.
+    """
+    base = Path(base or config.base_dir())
+    notebooks = notebooks or {}
+    keys = {}
+    todo = list(local_dirs)
+    if cache is not None:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            keys = dict(zip(todo, pool.map(
+                lambda d: repo_state_key(Path(base) / d, notebooks.get(d, "ui.ipynb")), todo
+            )))
+        todo = []
+        for local_dir in local_dirs:
+            entry = cache.get(local_dir)
+            key = keys[local_dir]
+            if not force and key and entry and entry.get("key") == key:
+                yield local_dir, dict(entry["data"], audit_cached=True), 0.0
+            else:
+                todo.append(local_dir)
+
+    def _store(local_dir, data):
+        if cache is not None and keys.get(local_dir) and "error" not in data:
+            cache[local_dir] = {"key": keys[local_dir], "data": dict(data)}
+        return data
+
+    if workers <= 1:
+        for local_dir in todo:
+            local_dir, data, seconds = timed_analyze(
+                local_dir, base, notebooks.get(local_dir, "ui.ipynb")
+            )
+            yield local_dir, _store(local_dir, data), seconds
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                timed_analyze, local_dir, base, notebooks.get(local_dir, "ui.ipynb")
+            ): local_dir
+            for local_dir in todo
+        }
+        for future in as_completed(futures):
+            try:
+                local_dir, data, seconds = future.result()
+            except Exception as exc:
+                # The worker process itself died (e.g. killed or OOM)
+                yield futures[future], {"error": f"{type(exc).__name__}: {exc}"}, None
+                continue
+            yield local_dir, _store(local_dir, data), seconds
+
+
+def rank_notebooks(results):
+    """Flatten per-repo ``notebook_load`` metrics, heaviest file first."""
+    ranked = [
+        {"local_dir": local_dir, "notebook": notebook, **metrics}
+        for local_dir, data in results.items()
+        for notebook, metrics in (data.get("notebook_load") or {}).items()
+    ]
+    ranked.sort(key=lambda entry: entry["file_bytes"], reverse=True)
+    return ranked
+
+
+def main(args):
+    with metrics.span("load_modules"):
+        local_dirs = load_local_dirs(Path(args.modules_json))
+        notebooks = load_entry_notebooks(Path(args.modules_json))
+    output_path = Path(args.output)
+    stream_path = output_path.with_suffix(".jsonl")
+    cache_path = Path(args.cache)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    cache = load_cache(cache_path)
+    results = {}
+    start = time.perf_counter()
+    with metrics.span("audit"), open(stream_path, "w") as stream:
+        for local_dir, data, seconds in audit_repos(
+            local_dirs,
+            Path(args.base_dir),
+            workers=args.workers,
+            cache=cache,
+            force=args.force,
+            notebooks=notebooks,
+        ):
+            data["audit_seconds"] = seconds
+            results[local_dir] = data
+            stream.write(json.dumps({"local_dir": local_dir, **data}, default=str) + "\n")
+            stream.flush()
+            if "error" in data:
+                status = "ERROR"
+            elif data.get("audit_cached"):
+                status = "cache"
+            else:
+                status = "done "
+            print(f"{status} {local_dir} ({seconds if seconds is not None else '?'}s)")
+
+    ordered = {local_dir: results[local_dir] for local_dir in local_dirs}
+    with metrics.span("write"):
+        save_cache(cache_path, cache)
+        with open(output_path, "w") as f:
+            json.dump(ordered, f, indent=2, default=str)
+
+        ranked = rank_notebooks(ordered)
+        notebook_path = output_path.with_name("notebook_load.json")
+        notebook_path.write_text(json.dumps(ranked, indent=2) + "\n")
+    heavy = [entry for entry in ranked if entry["heavy"]]
+    if heavy:
+        print(f"\nHeavy notebooks ({len(heavy)}):")
+        for entry in heavy:
+            print(
+                f"  {entry['local_dir']}/{entry['notebook']:<12s} "
+                f"{entry['file_bytes'] / 1e6:6.1f} MB  {', '.join(entry['flags'])}"
+            )
+
+    cached = sum(1 for data in ordered.values() if data.get("audit_cached"))
+    metrics.count("repos", len(ordered))
+    metrics.count("cached", cached)
     print(f"\nData written to {output_path}")
-    print(f"Repos analyzed: {len(results)}")
+    print(
+        f"Repos analyzed: {len(ordered)} ({cached} from cache) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+def add_arguments(parser):
+    """Register the audit options on *parser*."""
+    parser.add_argument(
+        "--base-dir",
+        default=str(config.base_dir()),
+        help="Base directory for module repos",
+    )
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(config.PROJECT_ROOT / "audit_data.json"),
+        help="Output JSON path (results are also streamed to a .jsonl next to it)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of repos analysed in parallel (1 = serial)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(config.CACHE_DIR / "audit_cache.json"),
+        help="Audit cache path",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ignore the cache and re-analyze every repo",
+    )
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Gather audit data from module repos")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 """Generate README.rst from modules.json and README.rst.j2."""
 
+import argparse
 import json
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+
+from scripts import config, metrics
 
 
 def badge_ref(name: str, workflow: str = "") -> str:
@@ -41,6 +43,22 @@ def badge_cells(mod: dict) -> str:
     return "  ".join(parts)
 
 
+_CI_ICONS = {"passing": "\u2713", "failing": "\u2717", "running": "\u25cf"}
+
+
+def ci_label(mod: dict, workflow: str) -> str:
+    """Text shown for a workflow when rendering collected CI states.
+
+    Uses ``ci_status`` as stored by ``module-monitor ci``, e.g.
+    ``✓ ci passing``; ``? ci`` when no state was collected.
+    """
+    name = workflow.replace(".yaml", "").replace(".yml", "")
+    state = (mod.get("ci_status") or {}).get(workflow, {}).get("state")
+    if not state:
+        return f"? {name}"
+    return f"{_CI_ICONS.get(state, '-')} {name} {state}"
+
+
 def server_icon(mod: dict, key: str) -> str:
     """Return an icon for the module's deployment status on a server.
 
@@ -71,10 +89,10 @@ def migration_label(mod: dict) -> str:
     return status
 
 
-def main():
-    scripts_dir = Path(__file__).parent
-    project_root = scripts_dir.parent
-    with open(project_root / "modules.json") as f:
+def main(args: argparse.Namespace) -> None:
+    from jinja2 import Environment, FileSystemLoader
+
+    with metrics.span("load_modules"), open(args.modules_json) as f:
         data = json.load(f)
 
     # Flatten all modules across categories for the link/badge sections
@@ -84,7 +102,7 @@ def main():
             all_modules.append(mod)
 
     env = Environment(
-        loader=FileSystemLoader(scripts_dir),
+        loader=FileSystemLoader(config.SCRIPTS_DIR),
         keep_trailing_newline=True,
     )
     env.filters["badge_ref"] = badge_ref
@@ -93,13 +111,39 @@ def main():
     env.globals["get_workflows"] = get_workflows
     env.globals["badge_cells"] = badge_cells
     env.globals["server_icon"] = server_icon
+    env.globals["ci_label"] = ci_label
     env.globals["migration_label"] = migration_label
 
-    template = env.get_template("README.rst.j2")
-    output = template.render(categories=data["categories"], all_modules=all_modules)
-    (project_root / "README.rst").write_text(output)
-    print("README.rst generated successfully.")
+    with metrics.span("render"):
+        template = env.get_template("README.rst.j2")
+        output = template.render(
+            categories=data["categories"], all_modules=all_modules, ci_status=args.ci_status
+        )
+    with metrics.span("write"):
+        Path(args.output).write_text(output)
+    print(f"{Path(args.output).name} generated successfully.")
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the README generator options on *parser*."""
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(config.README),
+        help="Generated README path",
+    )
+    parser.add_argument(
+        "--ci-status",
+        action="store_true",
+        help="Show the CI states collected by the ci command instead of remote badge images",
+    )
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate README.rst from modules.json")
+    add_arguments(parser)
+    main(parser.parse_args())
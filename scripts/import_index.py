@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""Index the packages each module actually imports and check them against its deps.
+
+Every ``.py`` file and notebook code cell of each module repo is parsed
+with :mod:`ast`; the top-level imported names are cached per file content
+hash, so unchanged files are never parsed twice.  Imports are mapped to
+distribution names and compared with the dependencies declared in the
+module's dependency file (see :func:`check_deps.scan_module_deps`) to
+report undeclared and unused dependencies.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from scripts import config
+from scripts.check_deps import _normalise, scan_module_deps
+from scripts.gather_repo_data import imports_from_source, walk_repo
+from scripts.notebooks import iter_code_sources
+
+CACHE_PATH = config.CACHE_DIR / "imports.json"
+
+# Import names whose distribution name differs from the normalised import
+IMPORT_TO_DIST = {
+    "ee": "earthengine-api",
+    "osgeo": "gdal",
+    "yaml": "pyyaml",
+    "sklearn": "scikit-learn",
+    "skimage": "scikit-image",
+    "cv2": "opencv-python",
+    "PIL": "pillow",
+    "dateutil": "python-dateutil",
+    "dotenv": "python-dotenv",
+    "bs4": "beautifulsoup4",
+    "magic": "python-magic",
+}
+
+# Declared deps that provide a runtime or tooling rather than an importable package
+RUNTIME_ONLY = {
+    "python", "pip", "setuptools", "wheel", "ipykernel", "jupyter",
+    "jupyterlab", "notebook", "nbconvert", "voila", "nodejs",
+}
+
+_IGNORED = set(sys.stdlib_module_names) | {"__future__"}
+
+
+def import_to_dist(name):
+    """Map a top-level import name to its (normalised) distribution name."""
+    return IMPORT_TO_DIST.get(name) or _normalise(name)
+
+
+def _source_files(repo):
+    """Return the ``.py`` and ``.ipynb`` files under *repo*, skip dirs pruned."""
+    listing = walk_repo(str(repo), detectors={})["listing"]
+    files = []
+    for path, entries in listing.items():
+        for name, is_dir in entries or []:
+            if not is_dir and name.endswith((".py", ".ipynb")):
+                files.append(os.path.join(path, name))
+    return files, listing.get(str(repo)) or []
+
+
+def index_repo(repo, known=None):
+    """Collect the third-party imports of the repo at *repo*.
+
+    Parameters
+    ----------
+    repo : Path
+        Module checkout.
+    known : dict, optional
+        Cache mapping file content hash to its sorted import names.
+
+    Returns
+    -------
+    dict
+        ``imports`` (sorted third-party import names), ``files`` (number
+        of files scanned) and ``new`` (cache entries for files that had
+        to be parsed).
+    """
+    known = known or {}
+    files, root_entries = _source_files(repo)
+    # Top-level packages and modules of the repo itself are not deps
+    local = {name.removesuffix(".py") for name, _ in root_entries}
+
+    imports = set()
+    new = {}
+    for path in files:
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError:
+            continue
+        digest = hashlib.sha256(raw).hexdigest()
+        names = known.get(digest)
+        if names is None:
+            names = new.get(digest)
+        if names is None:
+            if path.endswith(".ipynb"):
+                try:
+                    found = set()
+                    for source in iter_code_sources(path):
+                        found |= imports_from_source(source)
+                except ValueError:
+                    found = set()
+            else:
+                found = imports_from_source(raw.decode(errors="ignore"))
+            names = new[digest] = sorted(found)
+        imports.update(names)
+
+    return {
+        "imports": sorted(imports - local - _IGNORED),
+        "files": len(files),
+        "new": new,
+    }
+
+
+def cross_check(imports, declared):
+    """Compare imported names with the declared dependency mapping.
+
+    Returns
+    -------
+    dict
+        ``dists`` (distributions implied by the imports), ``undeclared``
+        (imported but not declared) and ``unused`` (declared but never
+        imported, runtime-only packages excepted).
+    """
+    dists = {import_to_dist(name) for name in imports}
+    declared_names = set(declared)
+    return {
+        "dists": sorted(dists),
+        "undeclared": sorted(dists - declared_names),
+        "unused": sorted(declared_names - dists - RUNTIME_ONLY),
+    }
+
+
+def load_cache(path=CACHE_PATH):
+    """Load the per-file import cache, or ``{}``."""
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def build_index(modules_json, base, cache=None, workers=4):
+    """Index every module with a ``local_dir`` and cross-check its deps.
+
+    *cache* (see :func:`load_cache`) is updated in place with newly
+    parsed files.
+
+    Returns
+    -------
+    dict
+        Mapping of module name to ``declared_file``, ``imports`` and the
+        :func:`cross_check` result, or to ``{"error": ...}``.
+    """
+    cache = {} if cache is None else cache
+    data = json.loads(Path(modules_json).read_text())
+    local_dirs = {
+        mod["name"]: mod["local_dir"]
+        for cat in data["categories"]
+        for mod in cat["modules"]
+        if mod.get("local_dir") and (base / mod["local_dir"]).is_dir()
+    }
+    declared = scan_module_deps(Path(modules_json), base)
+
+    index = {}
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            name: pool.submit(index_repo, base / local_dir, cache)
+            for name, local_dir in local_dirs.items()
+        }
+        for name, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as exc:
+                index[name] = {"error": f"{type(exc).__name__}: {exc}"}
+                continue
+            cache.update(result["new"])
+            deps = declared.get(name, {})
+            index[name] = {
+                "declared_file": deps.get("file"),
+                "imports": result["imports"],
+                **cross_check(result["imports"], deps.get("packages", {})),
+            }
+    return index
+
+
+def main(args):
+    cache_path = Path(args.cache)
+    cache = load_cache(cache_path)
+    index = build_index(
+        Path(args.modules_json), Path(args.base_dir), cache=cache, workers=args.workers
+    )
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps(cache) + "\n")
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(index, indent=2) + "\n")
+
+    for name, entry in index.items():
+        if "error" in entry:
+            print(f"ERROR  {name}: {entry['error']}")
+            continue
+        if entry["unused"]:
+            print(f"UNUSED     {name}: {', '.join(entry['unused'])}")
+        if entry["undeclared"]:
+            print(f"UNDECLARED {name}: {', '.join(entry['undeclared'])}")
+    print(f"\nImport index written to {output}")
+
+
+def add_arguments(parser):
+    """Register the import index options on *parser*."""
+    parser.add_argument(
+        "--base-dir",
+        default=str(config.base_dir()),
+        help="Base directory for module repos",
+    )
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(config.REPORTS_DIR / "import_index.json"),
+        help="Output JSON path",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(CACHE_PATH),
+        help="Per-file import cache path",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of repos scanned in parallel",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index module imports and check deps")
+    add_arguments(parser)
+    main(parser.parse_args())
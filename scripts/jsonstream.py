@@ -0,0 +1,272 @@
+"""Incremental JSON reader that can skip values without materializing them.
+
+Used for files that are far bigger than the handful of fields we need
+from them (notebooks with saved outputs, conda ``repodata.json``).  The
+file is read in fixed-size chunks; skipped values are scanned with
+``bytes.find``/regex jumps and only their byte length is kept, so memory
+stays bounded by the chunk size plus whatever values are explicitly read.
+
+Example
+-------
+>>> import io
+>>> stream = JsonStream(io.BytesIO(b'{"a": [1, 2], "b": {"c": "big"}}'))
+>>> for key in stream.iter_object():
+...     if key == "a":
+...         print(key, stream.read_value())
+a [1, 2]
+
+Values the caller does not consume (``"b"`` above) are skipped.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterator
+from typing import IO, Any
+
+_WS_RE = re.compile(rb"[ \t\r\n]*")
+_STRUCT_RE = re.compile(rb'["{}\[\]]')
+_SCALAR_RE = re.compile(rb"[^,}\]\s]*")
+
+_OPEN = {ord("{"), ord("[")}
+_CLOSE = {ord("}"), ord("]")}
+_QUOTE = ord('"')
+_BACKSLASH = ord("\\")
+
+
+class ValueTooLarge(ValueError):
+    """Raised by :meth:`JsonStream.read_value` when a value exceeds its limit.
+
+    The value has been fully skipped, so the stream can still be used.
+    """
+
+    def __init__(self, size: int, limit: int) -> None:
+        super().__init__(f"JSON value of {size} bytes exceeds limit of {limit}")
+        self.size = size
+        self.limit = limit
+
+
+class JsonStream:
+    """Pull-style reader over a binary file containing one JSON document.
+
+    Parameters
+    ----------
+    f : IO[bytes]
+        Binary file object positioned at the start of the document.
+    chunk_size : int
+        Number of bytes read from *f* at a time.
+    """
+
+    def __init__(self, f: IO[bytes], chunk_size: int = 1 << 16) -> None:
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = b""
+        self._pos = 0
+        self._offset = 0  # absolute file offset of self._buf[0]
+        self._mark: int | None = None
+        self._mark_limit: int | None = None
+        self._mark_overflow = False
+
+    # -- buffer management ---------------------------------------------------
+
+    @property
+    def position(self) -> int:
+        """Absolute byte offset of the next unread byte."""
+        return self._offset + self._pos
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer, dropping consumed bytes.
+
+        Returns ``False`` at end of file.
+        """
+        if (
+            self._mark is not None
+            and self._mark_limit is not None
+            and self._pos - self._mark > self._mark_limit
+        ):
+            # The value scanned so far is already too large: stop
+            # retaining it; read_value() reports it as too large
+            self._mark = None
+            self._mark_overflow = True
+        keep = self._pos if self._mark is None else self._mark
+        if keep:
+            self._buf = self._buf[keep:]
+            self._offset += keep
+            self._pos -= keep
+            if self._mark is not None:
+                self._mark = 0
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            return False
+        self._buf += chunk
+        return True
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"{message} at byte {self.position}")
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character without consuming it.
+
+        Returns ``""`` at end of file.
+        """
+        while True:
+            self._pos = _WS_RE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return chr(self._buf[self._pos])
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self._error(f"expected {char!r}")
+        self._pos += 1
+
+    # -- skipping ------------------------------------------------------------
+
+    def _skip_string(self) -> None:
+        """Skip a string; the buffer must be positioned on its opening quote."""
+        self._pos += 1
+        while True:
+            start = self._pos
+            i = self._buf.find(b'"', start)
+            if i == -1:
+                # Keep a trailing run of backslashes: it may escape a quote
+                # at the start of the next chunk.
+                end = len(self._buf)
+                while end > start and self._buf[end - 1] == _BACKSLASH:
+                    end -= 1
+                self._pos = end
+                if not self._fill():
+                    raise self._error("unterminated string")
+                continue
+            backslashes = 0
+            j = i - 1
+            while j >= start and self._buf[j] == _BACKSLASH:
+                backslashes += 1
+                j -= 1
+            self._pos = i + 1
+            if backslashes % 2 == 0:
+                return
+
+    def _skip_scalar(self) -> None:
+        while True:
+            end = _SCALAR_RE.match(self._buf, self._pos).end()
+            self._pos = end
+            if end < len(self._buf) or not self._fill():
+                return
+
+    def _skip_container(self) -> None:
+        depth = 0
+        while True:
+            m = _STRUCT_RE.search(self._buf, self._pos)
+            if m is None:
+                self._pos = len(self._buf)
+                if not self._fill():
+                    raise self._error("unterminated container")
+                continue
+            self._pos = m.start()
+            char = self._buf[self._pos]
+            if char == _QUOTE:
+                self._skip_string()
+                continue
+            self._pos += 1
+            if char in _OPEN:
+                depth += 1
+            elif char in _CLOSE:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def skip_value(self) -> int:
+        """Skip the next value and return its size in bytes."""
+        char = self.peek()
+        if not char:
+            raise self._error("unexpected end of file")
+        start = self.position
+        if char == '"':
+            self._skip_string()
+        elif char in "{[":
+            self._skip_container()
+        else:
+            self._skip_scalar()
+        return self.position - start
+
+    # -- reading -------------------------------------------------------------
+
+    def read_value(self, limit: int | None = None) -> Any:
+        """Materialize and return the next value.
+
+        Parameters
+        ----------
+        limit : int, optional
+            Maximum size in bytes of the raw value.  Larger values are
+            skipped and :class:`ValueTooLarge` is raised.
+        """
+        if not self.peek():
+            raise self._error("unexpected end of file")
+        self._mark = self._pos
+        self._mark_limit = limit
+        self._mark_overflow = False
+        try:
+            size = self.skip_value()
+            if self._mark_overflow or (limit is not None and size > limit):
+                raise ValueTooLarge(size, limit)
+            raw = self._buf[self._mark : self._pos]
+        finally:
+            self._mark = None
+            self._mark_limit = None
+        return json.loads(raw)
+
+    def iter_object(self) -> Iterator[str]:
+        """Iterate over the keys of the next value, which must be an object.
+
+        After each key is yielded the caller may consume the value with
+        :meth:`read_value`, :meth:`skip_value`, :meth:`iter_object` or
+        :meth:`iter_array`; values left untouched are skipped.
+        """
+        self._expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self._error("expected object key")
+            key = self.read_value()
+            self._expect(":")
+            self.peek()
+            before = self.position
+            yield key
+            if self.position == before:
+                self.skip_value()
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self._error("expected ',' or '}'")
+
+    def iter_array(self) -> Iterator[int]:
+        """Iterate over the indices of the next value, which must be an array.
+
+        Works like :meth:`iter_object`: the caller consumes each element
+        after its index is yielded, untouched elements are skipped.
+        """
+        self._expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            self.peek()
+            before = self.position
+            yield index
+            if self.position == before:
+                self.skip_value()
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("expected ',' or ']'")
+            index += 1
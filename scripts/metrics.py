@@ -0,0 +1,190 @@
+"""Timing, HTTP and memory metrics for the module-monitor commands.
+
+Commands wrap their main phases in :func:`span`; HTTP calls are counted
+either through :func:`httpx_event_hooks` (httpx clients) or by calling
+:func:`record_request` directly.  The CLI resets the recorder before a
+command runs and writes :func:`summary` to
+``monitoring/reports/metrics/`` once it finishes, so every run leaves a
+JSON file that can be compared with earlier ones.
+
+Spans are cheap enough to leave in place when nothing writes the
+metrics out, e.g. when a script runs as ``python -m scripts.x``.
+
+Like :mod:`scripts.config`, this module must stay free of third-party
+imports.
+"""
+
+from __future__ import annotations
+
+import json
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from scripts import config
+
+_lock = threading.Lock()
+_local = threading.local()
+_run: dict = {}
+
+
+def reset(command: str = "", argv: list[str] | None = None) -> None:
+    """Start recording a new run of *command*."""
+    _run.clear()
+    _run.update(
+        command=command,
+        argv=list(argv or []),
+        started=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        clock=time.perf_counter(),
+        spans={},
+        counters={},
+        requests=[],
+    )
+
+
+reset()
+
+
+def _stack() -> list[str]:
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block under *name*.
+
+    Nested spans are recorded as ``outer/inner``; repeated spans with the
+    same path are aggregated (count, total and max seconds).
+    """
+    stack = _stack()
+    stack.append(name)
+    path = "/".join(stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        with _lock:
+            entry = _run["spans"].setdefault(path, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+
+def count(name: str, value: int = 1) -> None:
+    """Add *value* to the counter *name*."""
+    with _lock:
+        _run["counters"][name] = _run["counters"].get(name, 0) + value
+
+
+def record_request(url: str, seconds: float, nbytes: int, status: int | None) -> None:
+    """Record one HTTP request (``status`` is ``None`` when it failed)."""
+    with _lock:
+        _run["requests"].append((urlsplit(url).hostname or "", seconds, nbytes, status))
+
+
+def httpx_event_hooks() -> dict:
+    """Event hooks for an ``httpx.AsyncClient`` recording every request.
+
+    The response hook reads the body to count its bytes; callers that
+    decode the body anyway pay nothing extra.
+    """
+
+    async def on_request(request):
+        request.extensions["metrics_start"] = time.perf_counter()
+
+    async def on_response(response):
+        await response.aread()
+        start = response.request.extensions.get("metrics_start", time.perf_counter())
+        record_request(
+            str(response.request.url),
+            time.perf_counter() - start,
+            len(response.content),
+            response.status_code,
+        )
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process, or ``None`` if unknown."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summary() -> dict:
+    """Return the metrics of the current run as a JSON-serialisable dict."""
+    with _lock:
+        requests = list(_run["requests"])
+        spans = {
+            path: dict(entry, seconds=round(entry["seconds"], 4), max_seconds=round(entry["max_seconds"], 4))
+            for path, entry in _run["spans"].items()
+        }
+        counters = dict(_run["counters"])
+
+    latencies = [seconds for _host, seconds, _bytes, _status in requests]
+    hosts: dict[str, dict] = {}
+    for host, seconds, nbytes, status in requests:
+        entry = hosts.setdefault(host, {"requests": 0, "bytes": 0, "seconds": 0.0, "errors": 0})
+        entry["requests"] += 1
+        entry["bytes"] += nbytes
+        entry["seconds"] = round(entry["seconds"] + seconds, 4)
+        entry["errors"] += status is None or status >= 400
+
+    return {
+        "command": _run["command"],
+        "argv": _run["argv"],
+        "started": _run["started"],
+        "seconds": round(time.perf_counter() - _run["clock"], 4),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "spans": spans,
+        "counters": counters,
+        "http": {
+            "requests": len(requests),
+            "bytes": sum(nbytes for _host, _seconds, nbytes, _status in requests),
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 0.5) * 1000, 1),
+                "p95": round(_percentile(latencies, 0.95) * 1000, 1),
+                "max": round(max(latencies) * 1000, 1),
+            } if latencies else None,
+            "by_host": hosts,
+        },
+    }
+
+
+def metrics_dir() -> Path:
+    """Directory receiving the per-run metrics files."""
+    return config.REPORTS_DIR / "metrics"
+
+
+def write(path: Path | None = None) -> Path:
+    """Write :func:`summary` to *path* (default: one file per run).
+
+    Default file names carry a random suffix after the start time, so
+    runs started within the same second do not overwrite each other.
+    """
+    data = summary()
+    if path is None:
+        stamp = data["started"].replace(":", "").replace("+0000", "Z")
+        path = metrics_dir() / f"{data['command'] or 'run'}-{stamp}-{secrets.token_hex(3)}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n")
+    return path
@@ -0,0 +1,155 @@
+"""Streaming readers for Jupyter notebooks.
+
+Module notebooks can carry tens of megabytes of saved outputs, embedded
+images and widget state.  These helpers walk the notebook JSON with
+:class:`jsonstream.JsonStream` and only materialize the small fields they
+need, so reading a few code cells never loads the outputs.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+from scripts.jsonstream import JsonStream, ValueTooLarge
+
+# Largest single cell source kept in memory; bigger ones are replaced by a note
+MAX_SOURCE_BYTES = 1 << 20
+
+
+def _join_source(source) -> str:
+    """Notebook sources are either a string or a list of lines."""
+    if isinstance(source, list):
+        return "".join(source)
+    return source or ""
+
+
+def iter_code_sources(
+    path: Path,
+    max_source_bytes: int = MAX_SOURCE_BYTES,
+) -> Iterator[str]:
+    """Yield the source of every code cell in the notebook at *path*.
+
+    ``outputs``, ``attachments`` and cell metadata are skipped without
+    being decoded.  A source larger than *max_source_bytes* is yielded as
+    a ``[source too large: N bytes]`` placeholder.
+
+    Raises
+    ------
+    ValueError
+        If the file is not valid notebook JSON.
+    """
+    with open(path, "rb") as f:
+        stream = JsonStream(f)
+        for key in stream.iter_object():
+            if key != "cells":
+                continue
+            for _ in stream.iter_array():
+                cell_type = None
+                source = None
+                for cell_key in stream.iter_object():
+                    if cell_key == "cell_type":
+                        cell_type = stream.read_value()
+                    elif cell_key == "source":
+                        try:
+                            source = _join_source(stream.read_value(limit=max_source_bytes))
+                        except ValueTooLarge as exc:
+                            source = f"[source too large: {exc.size} bytes]"
+                if cell_type == "code" and source is not None:
+                    yield source
+
+
+# Metric thresholds (bytes) above which a notebook is flagged as heavy
+HEAVY_THRESHOLDS = {
+    "file_bytes": 5 * 1024 * 1024,
+    "output_bytes": 1024 * 1024,
+    "image_bytes": 512 * 1024,
+    "widget_state_bytes": 256 * 1024,
+}
+
+
+def _measure_outputs(stream: JsonStream, metrics: dict) -> None:
+    """Add the images found in a cell's ``outputs`` array to *metrics*."""
+    for _ in stream.iter_array():
+        if stream.peek() != "{":
+            continue
+        for key in stream.iter_object():
+            if key != "data" or stream.peek() != "{":
+                continue
+            for mime in stream.iter_object():
+                size = stream.skip_value()
+                if mime.startswith("image/"):
+                    metrics["image_count"] += 1
+                    metrics["image_bytes"] += size
+
+
+def _measure_attachments(stream: JsonStream, metrics: dict) -> None:
+    """Add the images embedded in a markdown cell's ``attachments`` to *metrics*."""
+    for _name in stream.iter_object():
+        if stream.peek() != "{":
+            continue
+        for mime in stream.iter_object():
+            size = stream.skip_value()
+            if mime.startswith("image/"):
+                metrics["image_count"] += 1
+                metrics["image_bytes"] += size
+
+
+def notebook_load_metrics(
+    path: Path,
+    thresholds: dict[str, int] = HEAVY_THRESHOLDS,
+) -> dict:
+    """Measure what makes the notebook at *path* slow to load.
+
+    Byte counts are sizes of the raw JSON values, measured while
+    streaming; nothing is decoded apart from dict keys.
+
+    Returns
+    -------
+    dict
+        ``file_bytes``, ``cell_count``, ``code_cell_count``,
+        ``source_bytes``, ``output_bytes``, ``attachment_bytes``,
+        ``image_count``, ``image_bytes`` (outputs and attachments),
+        ``widget_state_bytes``, plus ``flags`` listing every metric above
+        its threshold and ``heavy`` when there is at least one.
+    """
+    metrics = {
+        "file_bytes": Path(path).stat().st_size,
+        "cell_count": 0,
+        "code_cell_count": 0,
+        "source_bytes": 0,
+        "output_bytes": 0,
+        "attachment_bytes": 0,
+        "image_count": 0,
+        "image_bytes": 0,
+        "widget_state_bytes": 0,
+    }
+    with open(path, "rb") as f:
+        stream = JsonStream(f)
+        for key in stream.iter_object():
+            if key == "metadata" and stream.peek() == "{":
+                for meta_key in stream.iter_object():
+                    if meta_key == "widgets":
+                        metrics["widget_state_bytes"] += stream.skip_value()
+            elif key == "cells":
+                for _ in stream.iter_array():
+                    metrics["cell_count"] += 1
+                    for cell_key in stream.iter_object():
+                        start = stream.position
+                        if cell_key == "cell_type":
+                            if stream.read_value() == "code":
+                                metrics["code_cell_count"] += 1
+                        elif cell_key == "source":
+                            metrics["source_bytes"] += stream.skip_value()
+                        elif cell_key == "outputs" and stream.peek() == "[":
+                            _measure_outputs(stream, metrics)
+                            metrics["output_bytes"] += stream.position - start
+                        elif cell_key == "attachments" and stream.peek() == "{":
+                            _measure_attachments(stream, metrics)
+                            metrics["attachment_bytes"] += stream.position - start
+
+    metrics["flags"] = [
+        name for name, limit in thresholds.items() if metrics[name] > limit
+    ]
+    metrics["heavy"] = bool(metrics["flags"])
+    return metrics
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Find how long each module pin has been frozen, from git history.
+
+For every module found by :func:`check_deps.scan_module_deps`, one
+``git log --raw`` lists the commits that touched its dependency file and
+the blob ID of the file at each of them.  The blobs are read through a
+single ``git cat-file --batch`` process per repo, parsed with the same
+parsers as the scanner, and replayed oldest first to find the commit
+where each package's spec last changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from scripts import config, metrics
+from scripts.check_deps import DEP_FILE_PARSERS, scan_module_deps
+
+_NULL_OID = "0" * 40
+
+
+class CatFile:
+    """A long-lived ``git cat-file --batch`` process for one repo.
+
+    Use as a context manager; :meth:`read` returns the content of an
+    object, or ``None`` if it does not exist.
+    """
+
+    def __init__(self, repo: Path):
+        self.proc = subprocess.Popen(
+            ["git", "-C", str(repo), "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def read(self, oid: str) -> bytes | None:
+        self.proc.stdin.write(oid.encode() + b"\n")
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:  # "<oid> missing"
+            return None
+        size = int(header[2])
+        data = self.proc.stdout.read(size)
+        self.proc.stdout.read(1)  # trailing newline
+        return data
+
+    def close(self) -> None:
+        self.proc.stdin.close()
+        self.proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def file_history(repo: Path, path: str) -> list[tuple[str, int, str]]:
+    """Return ``(commit, commit time, blob oid)`` for each change of *path*, oldest first.
+
+    The blob oid is ``None`` for commits that deleted the file.
+    """
+    out = subprocess.run(
+        ["git", "-C", str(repo), "log", "--format=%x00%H %ct", "--raw", "--no-abbrev",
+         "--no-renames", "--", path],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    history = []
+    for record in out.split("\0")[1:]:
+        lines = record.strip().splitlines()
+        commit, timestamp = lines[0].split()
+        # ":100644 100644 <old oid> <new oid> M\t<path>"
+        raw = next((line for line in lines[1:] if line.startswith(":")), None)
+        if raw is None:
+            continue
+        new_oid = raw.split()[3]
+        history.append((commit, int(timestamp), None if new_oid == _NULL_OID else new_oid))
+    history.reverse()
+    return history
+
+
+def pin_ages(repo: Path, dep_file: str, now: float | None = None) -> dict:
+    """Replay the history of *dep_file* in *repo*.
+
+    Returns
+    -------
+    dict
+        Mapping of each package in the current file to ``spec``,
+        ``since`` (ISO date of the commit that set it), ``commit``,
+        ``age_days`` and ``changes`` (number of times the spec changed
+        after the package was added).
+    """
+    parse = DEP_FILE_PARSERS[dep_file]
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    history = file_history(repo, dep_file)
+
+    parsed: dict[str, dict] = {}
+    state: dict[str, dict] = {}
+    with CatFile(repo) as cat:
+        for commit, timestamp, oid in history:
+            if oid is None:
+                deps = {}
+            elif oid in parsed:
+                deps = parsed[oid]
+            else:
+                data = cat.read(oid)
+                try:
+                    deps = parsed[oid] = parse(data.decode()) if data is not None else {}
+                except (ValueError, UnicodeDecodeError):  # broken revision
+                    continue
+            for package, spec in deps.items():
+                current = state.get(package)
+                if current is None or current["spec"] != spec:
+                    state[package] = {
+                        "spec": spec,
+                        "timestamp": timestamp,
+                        "commit": commit,
+                        "changes": (current["changes"] + 1) if current else 0,
+                    }
+            for package in state.keys() - deps.keys():
+                del state[package]
+
+    return {
+        package: {
+            "spec": info["spec"],
+            "since": datetime.fromtimestamp(info["timestamp"], timezone.utc).date().isoformat(),
+            "commit": info["commit"],
+            "age_days": int((now - info["timestamp"]) // 86400),
+            "changes": info["changes"],
+        }
+        for package, info in sorted(state.items())
+    }
+
+
+def module_pin_ages(modules_json: Path, base: Path, workers: int = 8) -> dict:
+    """Run :func:`pin_ages` on the dependency file of every scanned module.
+
+    Returns
+    -------
+    dict
+        Mapping of module name to ``{"file": ..., "packages": ...}`` or
+        ``{"file": ..., "error": ...}``.
+    """
+    declared = scan_module_deps(modules_json, base)
+    data = json.loads(Path(modules_json).read_text())
+    local_dirs = {
+        mod["name"]: mod["local_dir"]
+        for cat in data["categories"]
+        for mod in cat["modules"]
+        if mod["name"] in declared
+    }
+
+    def run(name):
+        dep_file = declared[name]["file"]
+        try:
+            return {"file": dep_file, "packages": pin_ages(base / local_dirs[name], dep_file)}
+        except (OSError, subprocess.CalledProcessError) as exc:
+            stderr = getattr(exc, "stderr", "") or ""
+            return {"file": dep_file, "error": stderr.strip() or str(exc)}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(zip(local_dirs, pool.map(run, local_dirs)))
+
+
+def main(args: argparse.Namespace) -> None:
+    with metrics.span("history"):
+        ages = module_pin_ages(Path(args.modules_json), Path(args.base_dir), workers=args.workers)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(ages, indent=2) + "\n")
+
+    pins = [
+        (info["age_days"], module, package, info)
+        for module, entry in ages.items()
+        for package, info in entry.get("packages", {}).items()
+        if info["spec"]
+    ]
+    pins.sort(key=lambda pin: pin[0], reverse=True)
+    print(f"Oldest pins ({min(args.top, len(pins))} of {len(pins)}):")
+    for age, module, package, info in pins[: args.top]:
+        print(f"  {age:5d} days  {module:<30s} {package:<20s} {info['spec']:<16s} since {info['since']}")
+    for module, entry in ages.items():
+        if "error" in entry:
+            print(f"SKIP  {module}: {entry['error']}")
+    print(f"\nPin ages written to {output}")
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the pin age options on *parser*."""
+    parser.add_argument(
+        "--base-dir",
+        default=str(config.base_dir()),
+        help="Base directory for module repos",
+    )
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(config.REPORTS_DIR / "pin_age.json"),
+        help="Output JSON path",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=20,
+        help="Number of oldest pins printed",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Number of repos read in parallel",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report how long module pins have been frozen")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Run the nightly monitoring steps in dependency order.
+
+Each step declares the files it reads (``inputs``) and writes
+(``outputs``).  A step runs after every step whose outputs it reads;
+steps with no such link run concurrently.  Before a step starts, its
+inputs are hashed; if the hash matches the one recorded after its last
+successful run, its outputs still exist and the result is younger than
+the step's ``max_age``, the step is skipped.
+
+Steps that read from the network (PyPI, the SEPAL servers) carry a
+``max_age`` so that they still refresh once per night even when none of
+their local inputs changed.  A step may also carry a ``precondition``,
+called before it runs; when it returns a reason (the first run has no
+two snapshots to diff yet), the step is skipped instead of failing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+
+from scripts import config
+from scripts.snapshots import snapshot_files
+
+STATE_PATH = config.CACHE_DIR / "pipeline_state.json"
+
+# Network-backed steps are refreshed at least this often
+NIGHTLY = 20 * 3600
+
+# Dependency files read by check_deps.scan_module_deps, in priority order
+MODULE_DEP_FILES = ("pyproject.toml", "requirements.txt", "sepal_environment.yml")
+
+
+def module_dep_files(base: Path, modules_json: Path = config.MODULES_JSON) -> list[Path]:
+    """Return the dependency files of every checked-out module."""
+    data = json.loads(modules_json.read_text())
+    files = []
+    for cat in data["categories"]:
+        for mod in cat["modules"]:
+            if not mod.get("local_dir"):
+                continue
+            files.extend(base / mod["local_dir"] / name for name in MODULE_DEP_FILES)
+    return files
+
+
+def module_workflows(base: Path, modules_json: Path = config.MODULES_JSON) -> list[Path]:
+    """Return the CI workflow path of every checked-out module."""
+    from scripts.sync_ci import WORKFLOW_PATH, skip_reason
+
+    data = json.loads(modules_json.read_text())
+    return [
+        base / mod["local_dir"] / WORKFLOW_PATH
+        for cat in data["categories"]
+        for mod in cat["modules"]
+        if skip_reason(mod) is None and (base / mod["local_dir"]).is_dir()
+    ]
+
+
+def enough_snapshots() -> str | None:
+    """Precondition of the ``diff`` step: two snapshots to compare."""
+    if len(snapshot_files(config.SNAPSHOTS_DIR)) < 2:
+        return "fewer than two snapshots"
+    return None
+
+
+def default_steps(base: Path) -> list[dict]:
+    """The nightly chain.
+
+    ``inputs`` and ``outputs`` hold paths or callables returning paths;
+    callables are resolved when the step is about to run, so they see
+    the ``modules.json`` written by earlier steps.
+    """
+    return [
+        {
+            "name": "servers",
+            "command": ["servers"],
+            "inputs": [],
+            "outputs": [config.MODULES_JSON],
+            "max_age": NIGHTLY,
+        },
+        {
+            "name": "readme",
+            "command": ["readme"],
+            "inputs": [config.MODULES_JSON, config.SCRIPTS_DIR / "README.rst.j2"],
+            "outputs": [config.README],
+        },
+        {
+            "name": "deps",
+            "command": ["deps"],
+            "inputs": [config.WATCHLIST, config.MODULES_JSON, lambda: module_dep_files(base)],
+            "outputs": [config.SNAPSHOTS_DIR],
+            "max_age": NIGHTLY,
+        },
+        {
+            "name": "diff",
+            "command": ["diff"],
+            "inputs": [config.SNAPSHOTS_DIR],
+            "outputs": [config.DRAFT_ISSUES_DIR],
+            "precondition": enough_snapshots,
+        },
+        {
+            "name": "sync-ci",
+            "command": ["sync-ci", "--report", str(config.REPORTS_DIR / "ci_drift.json")],
+            "inputs": [config.MODULES_JSON, config.SCRIPTS_DIR / "ci.yaml.j2"],
+            "outputs": [lambda: module_workflows(base)],
+        },
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+
+
+def _resolve(paths) -> list[Path]:
+    resolved = []
+    for item in paths:
+        if callable(item):
+            resolved.extend(Path(p) for p in item())
+        else:
+            resolved.append(Path(item))
+    return resolved
+
+
+def step_dependencies(steps: list[dict]) -> dict[str, set[str]]:
+    """Map each step to the earlier steps whose outputs it reads.
+
+    Only literal paths are matched; callable inputs and outputs are not
+    known until run time.  A step never depends on itself.
+    """
+    deps = {}
+    for i, step in enumerate(steps):
+        inputs = {Path(p) for p in step["inputs"] if not callable(p)}
+        deps[step["name"]] = {
+            other["name"]
+            for other in steps[:i]
+            if inputs & {Path(p) for p in other["outputs"] if not callable(p)}
+        }
+    return deps
+
+
+def hash_inputs(paths: list[Path]) -> str:
+    """Hash the path and content of every input; directories recurse.
+
+    Missing inputs are hashed as such, so a file appearing or vanishing
+    also changes the hash.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(set(paths)):
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            digest.update(os.fsencode(file) + b"\0")
+            try:
+                digest.update(hashlib.sha256(file.read_bytes()).digest())
+            except OSError:
+                digest.update(b"missing")
+    return digest.hexdigest()
+
+
+def skip_reason(step: dict, inputs_hash: str, state: dict, now: float) -> str | None:
+    """Return why *step* can be skipped, or ``None`` if it must run."""
+    previous = state.get(step["name"])
+    if not previous or previous["inputs"] != inputs_hash:
+        return None
+    if "max_age" in step and now - previous["finished"] > step["max_age"]:
+        return None
+    if not all(p.exists() for p in _resolve(step["outputs"])):
+        return None
+    return "inputs unchanged"
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+
+def run_command(step: dict) -> tuple[bool, str]:
+    """Run *step* as a ``module-monitor`` subprocess; return (ok, output)."""
+    proc = subprocess.run(
+        [sys.executable, "-m", "scripts.cli", *step["command"]],
+        cwd=config.PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return proc.returncode == 0, proc.stdout + proc.stderr
+
+
+def run_pipeline(steps, state=None, workers=4, force=False, runner=run_command):
+    """Run *steps*, skipping those whose inputs did not change.
+
+    Parameters
+    ----------
+    steps : list of dict
+        Step definitions (see :func:`default_steps`).
+    state : dict, optional
+        Input hash and finish time of each step's last successful run;
+        updated in place.
+    workers : int
+        Maximum number of steps running at once.
+    force : bool
+        Run every step regardless of *state*.
+    runner : callable
+        Called with a step, returns ``(ok, output)``.
+
+    Yields
+    ------
+    dict
+        ``name``, ``status`` (``ran``, ``failed``, ``skipped`` or
+        ``blocked``), ``reason``, ``output`` and ``seconds`` of each step,
+        in completion order.
+    """
+    state = {} if state is None else state
+    by_name = {step["name"]: step for step in steps}
+    deps = step_dependencies(steps)
+    pending = dict(deps)
+    done: dict[str, str] = {}
+
+    def start(name):
+        step = by_name[name]
+        started = time.monotonic()
+        inputs_hash = hash_inputs(_resolve(step["inputs"]))
+        reason = None if force else skip_reason(step, inputs_hash, state, time.time())
+        if not reason and "precondition" in step:
+            reason = step["precondition"]()
+        if reason:
+            return {"name": name, "status": "skipped", "reason": reason, "output": "", "seconds": 0.0}
+        ok, output = runner(step)
+        if ok:
+            state[name] = {"inputs": inputs_hash, "finished": time.time()}
+        return {
+            "name": name,
+            "status": "ran" if ok else "failed",
+            "reason": None,
+            "output": output,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        running = {}
+        while pending or running:
+            for name in [n for n, needs in pending.items() if needs <= done.keys()]:
+                del pending[name]
+                upstream = sorted(d for d in deps[name] if done[d] in ("failed", "blocked"))
+                if upstream:
+                    done[name] = "blocked"
+                    yield {
+                        "name": name,
+                        "status": "blocked",
+                        "reason": f"{', '.join(upstream)} failed",
+                        "output": "",
+                        "seconds": 0.0,
+                    }
+                    continue
+                running[pool.submit(start, name)] = name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                done[running.pop(future)] = result["status"]
+                yield result
+
+
+def load_state(path=STATE_PATH) -> dict:
+    """Load the per-step run state, or ``{}``."""
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def main(args: argparse.Namespace) -> None:
+    if args.base_dir:
+        # Inherited by the step subprocesses through config.base_dir()
+        os.environ["MODULE_MONITOR_BASE_DIR"] = args.base_dir
+    steps = default_steps(config.base_dir())
+    if args.only:
+        unknown = set(args.only) - {step["name"] for step in steps}
+        if unknown:
+            raise SystemExit(f"Unknown step(s): {', '.join(sorted(unknown))}")
+        steps = [step for step in steps if step["name"] in args.only]
+
+    state_path = Path(args.state)
+    state = load_state(state_path)
+    started = time.monotonic()
+    failed = []
+    for result in run_pipeline(steps, state, workers=args.workers, force=args.force):
+        detail = result["reason"] or f"{result['seconds']:.1f}s"
+        print(f"== {result['name']}: {result['status']} ({detail})")
+        if result["output"]:
+            print(result["output"].rstrip())
+        if result["status"] in ("failed", "blocked"):
+            failed.append(result["name"])
+        # Saved after every step so an interrupted run keeps finished work
+        state_path.parent.mkdir(parents=True, exist_ok=True)
+        state_path.write_text(json.dumps(state, indent=2) + "\n")
+
+    print(
+        f"\nPipeline finished in {time.monotonic() - started:.1f}s "
+        f"({datetime.now(timezone.utc):%Y-%m-%d %H:%M} UTC)"
+    )
+    if failed:
+        raise SystemExit(f"Failed or blocked: {', '.join(failed)}")
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the pipeline options on *parser*."""
+    parser.add_argument(
+        "--base-dir",
+        help="Base directory for module repos (sets MODULE_MONITOR_BASE_DIR)",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        metavar="STEP",
+        help="Run only these steps (servers, readme, deps, diff, sync-ci)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run every step even if its inputs are unchanged",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Maximum number of steps running at once",
+    )
+    parser.add_argument(
+        "--state",
+        default=str(STATE_PATH),
+        help="Step state file (input hashes of the last successful runs)",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the nightly monitoring steps")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,166 @@
+"""Incremental PyPI fetching driven by the PyPI change log serial.
+
+Every event on PyPI (new release, new file, yank, removal...) gets a
+monotonically increasing serial.  Instead of asking PyPI about every
+watched package on each scan, ``check_deps --incremental`` keeps the
+last serial it saw and the info of every package in
+``monitoring/cache/pypi_state.json``, asks the XML-RPC
+``changelog_since_serial`` method once for the events since then, and
+re-fetches only the packages named in those events (plus any package
+missing from the state).  A routine scan costs one request for the
+change log plus one per package that actually changed.
+
+PyPI caps each ``changelog_since_serial`` answer at
+:data:`CHANGELOG_LIMIT` events, so a full answer is followed by another
+call from its newest serial until a shorter one comes back.  A gap that
+needs more than :data:`MAX_CHANGELOG_CALLS` calls is cheaper to close
+with a full fetch.
+
+The first run, or any run where the change log cannot be read completely,
+fetches every package and records the current serial
+(``changelog_last_serial``), taken before the fetch so no event in
+between is missed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import xmlrpc.client
+from pathlib import Path
+from typing import TYPE_CHECKING
+from xml.parsers.expat import ExpatError
+
+from scripts import config, metrics
+from scripts.check_deps import _normalise, fetch_pypi_info
+
+if TYPE_CHECKING:
+    import httpx
+
+XMLRPC_URL = "https://pypi.org/pypi"
+STATE_PATH = config.CACHE_DIR / "pypi_state.json"
+STATE_VERSION = 1
+
+# Most events PyPI returns from one changelog_since_serial call
+CHANGELOG_LIMIT = 50_000
+# Calls spent paging through the change log before falling back to a full fetch
+MAX_CHANGELOG_CALLS = 10
+
+
+class ChangelogTooLong(ValueError):
+    """Raised by :func:`changed_since` when the gap exceeds the call budget."""
+
+
+async def xmlrpc_call(client: httpx.AsyncClient, method: str, *params):
+    """Call the PyPI XML-RPC *method* and return its result.
+
+    Raises
+    ------
+    httpx.HTTPError
+        On transport errors or a non-2xx response.
+    xmlrpc.client.Fault
+        If PyPI returns a fault.
+    """
+    resp = await client.post(
+        XMLRPC_URL,
+        content=xmlrpc.client.dumps(params, method).encode(),
+        headers={"Content-Type": "text/xml"},
+    )
+    resp.raise_for_status()
+    (result,), _ = xmlrpc.client.loads(resp.content)
+    return result
+
+
+async def last_serial(client: httpx.AsyncClient) -> int:
+    """Return the serial of the latest PyPI event."""
+    return int(await xmlrpc_call(client, "changelog_last_serial"))
+
+
+async def changed_since(client: httpx.AsyncClient, serial: int) -> tuple[set[str], int]:
+    """Return the (normalised) projects changed after *serial* and the newest serial seen.
+
+    Answers truncated at :data:`CHANGELOG_LIMIT` events are followed up
+    from their newest serial.
+
+    Raises
+    ------
+    ChangelogTooLong
+        If the change log is not exhausted after
+        :data:`MAX_CHANGELOG_CALLS` calls.
+    """
+    names: set[str] = set()
+    for _ in range(MAX_CHANGELOG_CALLS):
+        events = await xmlrpc_call(client, "changelog_since_serial", serial)
+        # Each event is [name, version, timestamp, action, serial]
+        names.update(_normalise(event[0]) for event in events)
+        serial = max((int(event[4]) for event in events), default=serial)
+        if len(events) < CHANGELOG_LIMIT:
+            return names, serial
+    raise ChangelogTooLong(f"more than {MAX_CHANGELOG_CALLS * CHANGELOG_LIMIT} events since the last scan")
+
+
+def load_state(path: Path = STATE_PATH) -> dict:
+    """Load the incremental fetch state, or an empty one."""
+    try:
+        state = json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        state = {}
+    if state.get("version") != STATE_VERSION:
+        state = {"version": STATE_VERSION, "serial": None, "packages": {}}
+    return state
+
+
+def save_state(state: dict, path: Path = STATE_PATH) -> None:
+    """Write the incremental fetch state."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(state) + "\n")
+
+
+async def sync_packages(client: httpx.AsyncClient, packages: dict[str, str], state: dict) -> dict:
+    """Fetch the PyPI info of *packages*, re-using *state* where nothing changed.
+
+    Parameters
+    ----------
+    client : httpx.AsyncClient
+        Reusable HTTP client.
+    packages : dict
+        Mapping of normalised name to the name queried on PyPI.
+    state : dict
+        As returned by :func:`load_state`; updated in place with the new
+        serial and the info of *packages* (other packages are dropped).
+
+    Returns
+    -------
+    dict
+        Mapping of normalised name to :func:`check_deps.fetch_pypi_info`
+        results.
+    """
+    import httpx
+
+    cached = state["packages"]
+    serial = state["serial"]
+    changed = None
+    if serial is not None:
+        try:
+            changed, serial = await changed_since(client, serial)
+        except (httpx.HTTPError, xmlrpc.client.Error, ExpatError, ValueError):
+            changed = None
+    if changed is None:
+        try:
+            serial = await last_serial(client)
+        except (httpx.HTTPError, xmlrpc.client.Error, ExpatError, ValueError):
+            serial = None  # fetch everything again next time too
+        changed = set(packages)
+
+    stale = [key for key in packages if key in changed or key not in cached]
+    metrics.count("pypi_refetched", len(stale))
+    metrics.count("pypi_reused", len(packages) - len(stale))
+    results = await asyncio.gather(*(fetch_pypi_info(client, packages[key]) for key in stale))
+
+    data = {key: cached[key] for key in packages if key not in stale}
+    data.update(zip(stale, results))
+    # Errors are not kept, so those packages are retried on the next run
+    state["packages"] = {key: info for key, info in data.items() if "error" not in info}
+    state["serial"] = serial
+    return data
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""Serve module status and the latest dependency picture over HTTP.
+
+A small read-only JSON service for dashboards.  ``modules.json`` and the
+latest snapshot (found through the snapshot manifest, read with the lite
+schema) are loaded once into in-memory indexes; every request is a dict
+lookup.  Endpoints:
+
+- ``/modules``: every module with its category and deploy status;
+- ``/modules/<name>``: one module, its declared deps and the packages
+  its pins fall behind on;
+- ``/packages/<name>``: latest release of a package and the modules that
+  declare it, with their spec and jump;
+- ``/deploy`` and ``/deploy/<server>``: modules per deploy status on
+  ``prod`` and ``test``;
+- ``/jumps``: scan summary, packages per version jump and affected
+  modules per jump;
+- ``/health``: loaded files, reload count and the last reload error.
+
+At most once per ``--reload-interval`` seconds, a request stats
+``modules.json`` and the snapshot directory; only the side that changed
+on disk is re-indexed.  If the latest snapshot cannot be read (a file
+dropped in by hand that does not match the schema, say), the previous
+index keeps being served, ``/health`` reports the error and the load is
+retried on the next check.  Successful response bodies are cached until
+the next reload and carry an ``ETag`` (a hash of the body), so clients
+sending ``If-None-Match`` get a bodiless ``304`` while nothing changed.
+
+Names in paths are matched case-insensitively.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from scripts import config, metrics
+from scripts.snapshot_diff import index_affected, index_pins
+from scripts.snapshots import load_manifest, load_snapshot
+
+SERVERS = ("prod", "test")
+
+
+def _stamp(path: Path) -> tuple[int, int] | None:
+    """Modification time and size of *path*, or ``None`` if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def etag(body: bytes) -> str:
+    """Strong ETag of a response body."""
+    return f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+class MonitorIndex:
+    """In-memory indexes over ``modules.json`` and the latest snapshot.
+
+    Parameters
+    ----------
+    modules_json : Path
+        Module list.
+    snapshots_dir : Path
+        Snapshot store; the latest entry of its manifest is indexed.
+    reload_interval : float
+        Minimum number of seconds between two checks of the files.
+    """
+
+    def __init__(self, modules_json: Path, snapshots_dir: Path, reload_interval: float = 1.0):
+        self.modules_json = Path(modules_json)
+        self.snapshots_dir = Path(snapshots_dir)
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self.error: str | None = None
+        self._lock = threading.Lock()
+        self._checked = float("-inf")
+        self._modules_stamp = None
+        self._dir_stamp = None
+        self._snapshot_path: Path | None = None
+        self._snapshot_stamp = None
+        self._responses: dict[str, tuple[int, bytes, str]] = {}
+
+        self.modules: dict[str, dict] = {}
+        self.deploy: dict[str, dict[str, list[str]]] = {}
+        self.snapshot: dict = {}
+        self.pins: dict[str, dict[str, str]] = {}
+        self.dependents: dict[str, dict[str, str]] = {}
+        self.affected: dict[tuple[str, str], str] = {}
+
+    # -- loading --------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-index whatever changed on disk; return whether anything did."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked < self.reload_interval:
+                return False
+            self._checked = now
+            changed = False
+
+            stamp = _stamp(self.modules_json)
+            if stamp != self._modules_stamp:
+                with metrics.span("index_modules"):
+                    self._index_modules()
+                self._modules_stamp = stamp
+                changed = True
+
+            error = None
+            try:
+                changed |= self._refresh_snapshot()
+            except (OSError, ValueError) as exc:
+                # Keep serving the last good index; retried on the next check
+                error = f"{type(exc).__name__}: {exc}"
+                metrics.count("reload_errors")
+            if error != self.error:
+                self.error = error
+                self._responses = {}
+
+            if changed:
+                self._responses = {}
+                self.reloads += 1
+                metrics.count("reloads")
+            return changed
+
+    def _refresh_snapshot(self) -> bool:
+        """Re-index the latest snapshot if it changed; state is only updated on success."""
+        dir_stamp = _stamp(self.snapshots_dir)
+        path = self._snapshot_path
+        if dir_stamp != self._dir_stamp:
+            entries = load_manifest(self.snapshots_dir) if dir_stamp else []
+            path = self.snapshots_dir / entries[-1]["file"] if entries else None
+            dir_stamp = _stamp(self.snapshots_dir)  # the manifest may have been rewritten
+        stamp = _stamp(path) if path else None
+        changed = path != self._snapshot_path or stamp != self._snapshot_stamp
+        if changed:
+            with metrics.span("index_snapshot"):
+                self._index_snapshot(path)
+        self._dir_stamp = dir_stamp
+        self._snapshot_path = path
+        self._snapshot_stamp = stamp
+        return changed
+
+    def _index_modules(self) -> None:
+        try:
+            data = json.loads(self.modules_json.read_text())
+        except (OSError, ValueError):
+            data = {"categories": []}
+        modules = {}
+        deploy = {server: {} for server in SERVERS}
+        for cat in data["categories"]:
+            for mod in cat["modules"]:
+                modules[mod["name"].lower()] = dict(mod, category=cat["name"])
+                for server in SERVERS:
+                    status = mod.get(f"on_{server}") or "unknown"
+                    deploy[server].setdefault(status, []).append(mod["name"])
+        self.modules = modules
+        self.deploy = deploy
+
+    def _index_snapshot(self, path: Path | None) -> None:
+        snapshot = load_snapshot(path, lite=True).model_dump() if path else {}
+        pins = index_pins(snapshot)
+        by_module: dict[str, dict[str, str]] = {}
+        dependents: dict[str, dict[str, str]] = {}
+        for (module, package), spec in pins.items():
+            by_module.setdefault(module.lower(), {})[package] = spec
+            dependents.setdefault(package.lower(), {})[module] = spec
+        self.snapshot = snapshot
+        self.pins = by_module
+        self.dependents = dependents
+        self.affected = index_affected(snapshot, pins)
+
+    # -- queries --------------------------------------------------------------
+
+    def module_list(self) -> list[dict]:
+        return [
+            {"name": mod["name"], "category": mod["category"],
+             **{f"on_{server}": mod.get(f"on_{server}") for server in SERVERS}}
+            for mod in self.modules.values()
+        ]
+
+    def module(self, name: str) -> dict | None:
+        mod = self.modules.get(name.lower())
+        if mod is None:
+            return None
+        deps = self.snapshot.get("module_deps", {}).get(mod["name"], {})
+        behind = {
+            package: self.affected[mod["name"], package]
+            for package in self.pins.get(name.lower(), {})
+            if (mod["name"], package) in self.affected
+        }
+        return dict(mod, deps=deps, behind=behind)
+
+    def package(self, name: str) -> dict | None:
+        packages = self.snapshot.get("packages", {})
+        key = next((p for p in packages if p.lower() == name.lower()), None)
+        modules = self.dependents.get(name.lower(), {})
+        if key is None and not modules:
+            return None
+        package = key or name
+        return {
+            "package": package,
+            **packages.get(package, {}),
+            "modules": {
+                module: {"spec": spec, "jump": self.affected.get((module, package))}
+                for module, spec in sorted(modules.items())
+            },
+        }
+
+    def jumps(self) -> dict:
+        packages: dict[str, list[str]] = {}
+        for name, info in sorted(self.snapshot.get("packages", {}).items()):
+            packages.setdefault(info.get("version_jump", "unknown"), []).append(name)
+        modules: dict[str, dict[str, list[str]]] = {}
+        for (module, package), jump in sorted(self.affected.items()):
+            modules.setdefault(jump, {}).setdefault(module, []).append(package)
+        return {
+            "snapshot_id": self.snapshot.get("snapshot_id"),
+            "scan_date": self.snapshot.get("scan_date"),
+            "summary": self.snapshot.get("summary", {}),
+            "packages": packages,
+            "modules": modules,
+        }
+
+    def health(self) -> dict:
+        return {
+            "modules_json": str(self.modules_json),
+            "snapshot": str(self._snapshot_path) if self._snapshot_path else None,
+            "modules": len(self.modules),
+            "reloads": self.reloads,
+            "error": self.error,
+        }
+
+    def route(self, path: str) -> tuple[int, object]:
+        """Answer the request for *path* as ``(status, JSON payload)``."""
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        result = None
+        if parts == ["modules"]:
+            result = self.module_list()
+        elif len(parts) == 2 and parts[0] == "modules":
+            result = self.module(parts[1])
+        elif len(parts) == 2 and parts[0] == "packages":
+            result = self.package(parts[1])
+        elif parts == ["deploy"]:
+            result = self.deploy
+        elif len(parts) == 2 and parts[0] == "deploy":
+            result = self.deploy.get(parts[1])
+        elif parts == ["jumps"]:
+            result = self.jumps()
+        elif parts in ([], ["health"]):
+            result = self.health()
+        if result is None:
+            return HTTPStatus.NOT_FOUND, {"error": f"not found: /{'/'.join(parts)}"}
+        return HTTPStatus.OK, result
+
+    def response(self, path: str) -> tuple[int, bytes, str]:
+        """Status, body and ETag for *path*; successes are cached until the next reload."""
+        self.refresh()
+        responses = self._responses
+        cached = responses.get(path)
+        if cached is None:
+            status, payload = self.route(path)
+            body = json.dumps(payload, indent=1).encode() + b"\n"
+            cached = (status, body, etag(body))
+            if status == HTTPStatus.OK:
+                # Unknown paths are not kept: any client could fill the cache
+                responses[path] = cached
+        return cached
+
+
+def make_handler(index: MonitorIndex, verbose: bool = False) -> type[BaseHTTPRequestHandler]:
+    """Request handler class answering from *index*."""
+
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "module-monitor"
+
+        def do_GET(self):
+            self._reply(send_body=True)
+
+        def do_HEAD(self):
+            self._reply(send_body=False)
+
+        def _reply(self, send_body: bool) -> None:
+            status, body, tag = index.response(urlsplit(self.path).path)
+            metrics.count("requests")
+            if status == HTTPStatus.OK and tag in self.headers.get("If-None-Match", ""):
+                metrics.count("not_modified")
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", tag)
+                self.end_headers()
+                return
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", tag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            if verbose:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def main(args: argparse.Namespace) -> None:
+    index = MonitorIndex(Path(args.modules_json), Path(args.snapshots_dir), args.reload_interval)
+    index.refresh(force=True)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(index, args.verbose))
+    host, port = server.server_address[:2]
+    print(f"Serving {len(index.modules)} module(s) on http://{host}:{port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the query service options on *parser*."""
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--snapshots-dir",
+        default=str(config.SNAPSHOTS_DIR),
+        help="Snapshot directory",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="Port to listen on (0 picks a free one)",
+    )
+    parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between checks of the files for changes",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log every request",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve module status over HTTP")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Measure how heavy each module repo is from git's object database.
+
+For every ``local_dir`` in modules.json this lists the largest blobs in
+HEAD (one ``git ls-tree -r -l``), the largest blobs anywhere in history
+(one ``git cat-file --batch-all-objects --batch-check``) and the on-disk
+pack size (``git count-objects -v``).  Nothing walks the working tree, so
+a repo with a big history costs three subprocesses.
+"""
+
+import argparse
+import json
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from scripts import config
+from scripts.gather_repo_data import load_local_dirs
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+    ).stdout
+
+
+def head_blobs(repo):
+    """Return ``(path, size, oid)`` for every blob in HEAD, largest first."""
+    blobs = []
+    for record in _git(repo, "ls-tree", "-r", "-l", "-z", "HEAD").split(b"\0"):
+        if not record:
+            continue
+        meta, _, path = record.partition(b"\t")
+        _mode, obj_type, oid, size = meta.split()
+        if obj_type != b"blob":
+            continue
+        blobs.append((path.decode(errors="replace"), int(size), oid.decode()))
+    blobs.sort(key=lambda blob: blob[1], reverse=True)
+    return blobs
+
+
+def history_blobs(repo):
+    """Return ``(oid, size, disk_size)`` for every blob in the object database."""
+    out = _git(
+        repo,
+        "cat-file",
+        "--batch-all-objects",
+        "--batch-check=%(objecttype) %(objectname) %(objectsize) %(objectsize:disk)",
+    )
+    blobs = []
+    for line in out.splitlines():
+        obj_type, oid, size, disk_size = line.split()
+        if obj_type == b"blob":
+            blobs.append((oid.decode(), int(size), int(disk_size)))
+    return blobs
+
+
+def pack_stats(repo):
+    """Return ``git count-objects -v`` as a dict of ints (sizes in bytes)."""
+    stats = {}
+    for line in _git(repo, "count-objects", "-v").decode().splitlines():
+        key, _, value = line.partition(":")
+        value = int(value.strip())
+        # count-objects reports sizes in KiB
+        stats[key.strip()] = value * 1024 if key.startswith("size") else value
+    return stats
+
+
+def repo_weight(repo, top=10):
+    """Build the weight report for the git repo at *repo*.
+
+    Returns
+    -------
+    dict
+        ``head_files``, ``head_bytes``, ``largest_head_blobs``,
+        ``history_blobs``, ``history_blob_bytes``,
+        ``largest_history_blobs`` (``path`` is ``None`` for blobs no
+        longer in HEAD), ``pack_bytes`` and ``loose_bytes``; or
+        ``{"error": ...}`` when *repo* is not a readable git repo.
+    """
+    try:
+        head = head_blobs(repo)
+        history = history_blobs(repo)
+        stats = pack_stats(repo)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        stderr = getattr(exc, "stderr", b"") or b""
+        return {"error": stderr.decode(errors="replace").strip() or str(exc)}
+
+    head_paths = {oid: path for path, _size, oid in head}
+    history.sort(key=lambda blob: blob[1], reverse=True)
+
+    return {
+        "head_files": len(head),
+        "head_bytes": sum(size for _path, size, _oid in head),
+        "largest_head_blobs": [
+            {"path": path, "size": size} for path, size, _oid in head[:top]
+        ],
+        "history_blobs": len(history),
+        "history_blob_bytes": sum(size for _oid, size, _disk in history),
+        "largest_history_blobs": [
+            {"oid": oid, "path": head_paths.get(oid), "size": size, "disk_size": disk}
+            for oid, size, disk in history[:top]
+        ],
+        "pack_bytes": stats.get("size-pack", 0),
+        "loose_bytes": stats.get("size", 0),
+    }
+
+
+def main(args):
+    base = Path(args.base_dir)
+    local_dirs = load_local_dirs(Path(args.modules_json))
+
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        weights = dict(
+            zip(local_dirs, pool.map(lambda d: repo_weight(base / d, args.top), local_dirs))
+        )
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(weights, indent=2) + "\n")
+
+    ranked = sorted(
+        ((d, w) for d, w in weights.items() if "error" not in w),
+        key=lambda item: item[1]["pack_bytes"] + item[1]["loose_bytes"],
+        reverse=True,
+    )
+    for local_dir, weight in ranked:
+        largest = weight["largest_head_blobs"][:1]
+        biggest = f"{largest[0]['path']} ({largest[0]['size'] / 1e6:.1f} MB)" if largest else "-"
+        print(
+            f"{local_dir:<30s} pack {weight['pack_bytes'] / 1e6:7.1f} MB  "
+            f"HEAD {weight['head_bytes'] / 1e6:7.1f} MB  largest: {biggest}"
+        )
+    for local_dir, weight in weights.items():
+        if "error" in weight:
+            print(f"SKIP  {local_dir}: {weight['error']}")
+    print(f"\nWeight report written to {output}")
+
+
+def add_arguments(parser):
+    """Register the weight report options on *parser*."""
+    parser.add_argument(
+        "--base-dir",
+        default=str(config.base_dir()),
+        help="Base directory for module repos",
+    )
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(config.REPORTS_DIR / "repo_weight.json"),
+        help="Output JSON path",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Number of largest blobs listed per repo",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Number of repos measured in parallel",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report git object weight of module repos")
+    add_arguments(parser)
+    main(parser.parse_args())
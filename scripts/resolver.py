@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""Check offline whether modules could upgrade their watched packages.
+
+``classify_version_jump`` tells us that a new major release exists, not
+whether a module can move to it.  This resolver answers that from a local
+cache of PyPI metadata (``requires_dist`` and ``requires_python`` of each
+release) kept in ``monitoring/cache/metadata/``:
+
+- ``--fetch`` fills the cache for the latest releases of every watched
+  and declared package (the only step that needs the network);
+- for each module, a backtracking resolver picks the newest versions
+  that satisfy the module's own specs, the requirements of the chosen
+  releases and their ``requires_python``;
+- for each watched package the module depends on, the resolver is rerun
+  with the package pinned to its latest release; when that fails, the
+  conflicting constraints and where they come from are reported.
+
+Packages without cached metadata (conda-only packages, private ones)
+are left out of the resolution.  Candidate lists and parsed requirements
+are memoised, so modules sharing constraints resolve from the same
+cache and the whole fleet resolves in one run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+from scripts import config, metrics
+from scripts.check_deps import _normalise, load_watchlist, scan_module_deps
+
+METADATA_DIR = config.CACHE_DIR / "metadata"
+
+# Releases per package whose metadata is fetched
+FETCH_VERSIONS = 20
+
+# Candidate versions tried before a resolution is abandoned
+MAX_ATTEMPTS = 5000
+
+
+class MetadataCache:
+    """``requires_dist``/``requires_python`` per release, one JSON file per package."""
+
+    def __init__(self, path: Path = METADATA_DIR):
+        self.path = Path(path)
+        self._packages: dict[str, dict | None] = {}
+
+    def _file(self, package: str) -> Path:
+        return self.path / f"{_normalise(package)}.json"
+
+    def versions(self, package: str) -> dict | None:
+        """Return ``{version: {"requires_dist", "requires_python"}}`` or ``None``."""
+        package = _normalise(package)
+        if package not in self._packages:
+            try:
+                self._packages[package] = json.loads(self._file(package).read_text())["versions"]
+            except (OSError, ValueError, KeyError):
+                self._packages[package] = None
+        return self._packages[package]
+
+    def update(self, package: str, releases: dict) -> None:
+        """Merge *releases* into the cache file of *package*."""
+        package = _normalise(package)
+        versions = dict(self.versions(package) or {}, **releases)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._file(package).write_text(
+            json.dumps({"name": package, "versions": versions}, indent=1, sort_keys=True) + "\n"
+        )
+        self._packages[package] = versions
+
+
+# ---------------------------------------------------------------------------
+# Fetching (network)
+# ---------------------------------------------------------------------------
+
+
+async def fetch_metadata(cache: MetadataCache, packages: list[str], limit: int = FETCH_VERSIONS,
+                         concurrency: int = 16) -> int:
+    """Cache the metadata of the latest *limit* stable releases of *packages*.
+
+    Returns the number of releases fetched.
+    """
+    import httpx
+    import packaging.version
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def get(url):
+        async with semaphore:
+            return await client.get(url)
+
+    async def sync(package):
+        resp = await get(f"https://pypi.org/pypi/{package}/json")
+        if resp.status_code != 200:
+            return 0
+        releases = []
+        for version, files in resp.json()["releases"].items():
+            try:
+                parsed = packaging.version.Version(version)
+            except packaging.version.InvalidVersion:
+                continue
+            if files and not parsed.is_prerelease and not all(f.get("yanked") for f in files):
+                releases.append((parsed, version))
+        wanted = [v for _, v in sorted(releases)[-limit:] if v not in (cache.versions(package) or {})]
+        fetched = {}
+        for version, resp in zip(wanted, await asyncio.gather(
+            *(get(f"https://pypi.org/pypi/{package}/{version}/json") for version in wanted)
+        )):
+            if resp.status_code == 200:
+                info = resp.json()["info"]
+                fetched[version] = {
+                    "requires_dist": info.get("requires_dist") or [],
+                    "requires_python": info.get("requires_python"),
+                }
+        if fetched or cache.versions(package) is None:
+            cache.update(package, fetched)
+        return len(fetched)
+
+    async with httpx.AsyncClient(timeout=30.0, event_hooks=metrics.httpx_event_hooks()) as client:
+        return sum(await asyncio.gather(*(sync(package) for package in packages)))
+
+
+# ---------------------------------------------------------------------------
+# Resolution (offline)
+# ---------------------------------------------------------------------------
+
+
+def module_specifier(spec: str):
+    """Convert a module dependency spec to a ``SpecifierSet``.
+
+    Conda's ``=X.Y`` means ``X.Y.*``; unparsable specs constrain nothing.
+
+    >>> str(module_specifier("=3.8"))
+    '==3.8.*'
+    """
+    from packaging.specifiers import InvalidSpecifier, SpecifierSet
+
+    spec = spec.strip()
+    if spec.startswith("=") and not spec.startswith("=="):
+        spec = f"=={spec[1:]}.*"
+    try:
+        return SpecifierSet(spec)
+    except InvalidSpecifier:
+        return SpecifierSet()
+
+
+class Resolver:
+    """Backtracking resolver over a :class:`MetadataCache` for one Python version.
+
+    One instance is shared by all modules, so candidate lists and parsed
+    requirements are computed once per (package, constraints) and per
+    release.
+    """
+
+    def __init__(self, cache: MetadataCache, python: str):
+        from packaging.version import Version
+
+        self.cache = cache
+        self.python = Version(python)
+        self.environment = {"python_version": python, "python_full_version": f"{python}.0", "extra": ""}
+        self.candidates = lru_cache(maxsize=None)(self._candidates)
+        self.requirements = lru_cache(maxsize=None)(self._requirements)
+
+    def known(self, package: str) -> bool:
+        return bool(self.cache.versions(package))
+
+    def _candidates(self, package: str, specs: frozenset[str]) -> tuple:
+        """Versions of *package* allowed by *specs* and this Python, newest first."""
+        from packaging.specifiers import InvalidSpecifier, SpecifierSet
+        from packaging.version import InvalidVersion, Version
+
+        allowed = []
+        combined = SpecifierSet(",".join(sorted(s for s in specs if s)))
+        for version, meta in (self.cache.versions(package) or {}).items():
+            try:
+                parsed = Version(version)
+                requires_python = SpecifierSet(meta.get("requires_python") or "")
+            except (InvalidVersion, InvalidSpecifier):
+                continue
+            if combined.contains(parsed, prereleases=False) and requires_python.contains(self.python):
+                allowed.append(parsed)
+        return tuple(sorted(allowed, reverse=True))
+
+    def _requirements(self, package: str, version) -> tuple:
+        """``(dependency, specifier)`` of one release, markers evaluated."""
+        from packaging.requirements import InvalidRequirement, Requirement
+
+        meta = (self.cache.versions(package) or {}).get(str(version), {})
+        requirements = []
+        for line in meta.get("requires_dist") or []:
+            try:
+                req = Requirement(line)
+            except InvalidRequirement:
+                continue
+            if req.marker is not None and not req.marker.evaluate(self.environment):
+                continue
+            requirements.append((_normalise(req.name), str(req.specifier)))
+        return tuple(requirements)
+
+    def resolve(self, roots: dict[str, list[tuple[str, str]]]) -> dict:
+        """Find the newest versions satisfying *roots*.
+
+        Parameters
+        ----------
+        roots : dict
+            Mapping of package to ``(specifier, source)`` constraints.
+
+        Returns
+        -------
+        dict
+            ``versions`` (package -> version string) on success;
+            otherwise ``versions`` is ``None`` and ``conflict`` names the
+            package no release could satisfy and its constraints.
+        """
+        constraints = {pkg: list(specs) for pkg, specs in roots.items() if self.known(pkg)}
+        conflict: dict = {}
+        attempts = [0]
+
+        def search(queue, chosen, constraints):
+            while queue and queue[0] in chosen:
+                queue = queue[1:]
+            if not queue:
+                return chosen
+            package, rest = queue[0], queue[1:]
+            specs = constraints.get(package, [])
+            candidates = self.candidates(package, frozenset(spec for spec, _ in specs))
+            if not candidates:
+                conflict.clear()
+                conflict.update(package=package, constraints=[
+                    {"specifier": spec, "source": source} for spec, source in specs
+                ])
+            for version in candidates:
+                attempts[0] += 1
+                if attempts[0] > MAX_ATTEMPTS:
+                    return None
+                source = f"{package} {version}"
+                deps = [(dep, spec) for dep, spec in self.requirements(package, version) if self.known(dep)]
+                clash = next(
+                    (dep for dep, spec in deps
+                     if dep in chosen and not module_specifier(spec).contains(chosen[dep], prereleases=True)),
+                    None,
+                )
+                if clash:
+                    conflict.clear()
+                    conflict.update(package=clash, constraints=[
+                        {"specifier": spec, "source": src} for spec, src in constraints.get(clash, [])
+                    ] + [{"specifier": dict(deps)[clash], "source": source}])
+                    continue
+                merged = dict(constraints)
+                for dep, spec in deps:
+                    merged[dep] = merged.get(dep, []) + [(spec, source)]
+                result = search(rest + [dep for dep, _ in deps], {**chosen, package: version}, merged)
+                if result is not None:
+                    return result
+            return None
+
+        chosen = search(sorted(constraints), {}, constraints)
+        if chosen is None:
+            if attempts[0] > MAX_ATTEMPTS:
+                conflict = {"package": None, "constraints": [], "reason": "search limit reached"}
+            return {"versions": None, "conflict": conflict}
+        return {"versions": {pkg: str(v) for pkg, v in sorted(chosen.items())}}
+
+
+def module_python(packages: dict[str, str], default: str) -> str:
+    """Python version for a module: its own ``python`` pin, else *default*."""
+    from packaging.version import InvalidVersion, Version
+
+    spec = packages.get("python", "").lstrip("=<>~! ")
+    try:
+        release = Version(spec.split(",")[0].rstrip(".*")).release
+    except InvalidVersion:
+        return default
+    return ".".join(str(part) for part in (release + (0,))[:2])
+
+
+def check_module(resolver: Resolver, packages: dict[str, str], targets: set[str]) -> dict:
+    """Resolve one module and try to upgrade each watched package it uses.
+
+    Returns
+    -------
+    dict
+        ``resolved`` (newest compatible versions or ``None``),
+        ``conflict`` when even the current specs cannot be met, and
+        ``upgrades``: for each watched package, its ``latest`` release,
+        whether the module ``can_upgrade`` and, if not, ``blocked_by``
+        (constraints that exclude the latest release).
+    """
+    roots = {
+        package: [(str(module_specifier(spec)), "module")]
+        for package, spec in packages.items()
+        if package != "python"
+    }
+    base = resolver.resolve(roots)
+    result = {"resolved": base["versions"], "upgrades": {}}
+    if base["versions"] is None:
+        result["conflict"] = base["conflict"]
+        return result
+
+    for package in sorted(targets & roots.keys()):
+        candidates = resolver.candidates(package, frozenset())
+        if not candidates:
+            continue
+        latest = str(candidates[0])
+        if base["versions"].get(package) == latest:
+            result["upgrades"][package] = {"latest": latest, "can_upgrade": True}
+            continue
+        # Replace the module's own constraint: can it move if it edits this pin?
+        trial = dict(roots, **{package: [(f"=={latest}", "upgrade")]})
+        attempt = resolver.resolve(trial)
+        entry = {"latest": latest, "can_upgrade": attempt["versions"] is not None}
+        if attempt["versions"] is None:
+            entry["blocked_by"] = [
+                dict(c, package=attempt["conflict"].get("package"))
+                for c in attempt["conflict"].get("constraints", [])
+                if c["source"] != "upgrade"
+            ] or [{"package": None, "reason": attempt["conflict"].get("reason", "no compatible set")}]
+        result["upgrades"][package] = entry
+    return result
+
+
+def watched_packages(watchlist: Path) -> set[str]:
+    """Normalised PyPI names of the watched packages."""
+    return {
+        _normalise(pkg.get("pypi", pkg["name"]))
+        for pkgs in load_watchlist(watchlist).values()
+        for pkg in pkgs
+    }
+
+
+def main(args: argparse.Namespace) -> dict:
+    cache = MetadataCache(Path(args.cache))
+    targets = watched_packages(Path(args.watchlist))
+    with metrics.span("scan_modules"):
+        module_deps = scan_module_deps(Path(args.modules_json), Path(args.base_dir))
+
+    if args.fetch:
+        declared = {pkg for info in module_deps.values() for pkg in info["packages"]} - {"python"}
+        with metrics.span("fetch"):
+            fetched = asyncio.run(fetch_metadata(cache, sorted(targets | declared), limit=args.versions))
+        print(f"Fetched metadata for {fetched} release(s)")
+
+    resolvers: dict[str, Resolver] = {}
+    report = {}
+    with metrics.span("resolve"):
+        for module, info in sorted(module_deps.items()):
+            python = module_python(info["packages"], args.python)
+            resolver = resolvers.setdefault(python, Resolver(cache, python))
+            report[module] = {"python": python, **check_module(resolver, info["packages"], targets)}
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+
+    for module, entry in report.items():
+        if entry["resolved"] is None:
+            conflict = entry["conflict"]
+            print(f"CONFLICT  {module}: {conflict.get('package') or conflict.get('reason')}")
+            continue
+        for package, upgrade in entry["upgrades"].items():
+            if upgrade["can_upgrade"]:
+                continue
+            blockers = ", ".join(
+                f"{b['source']} requires {b['package']}{b['specifier']}" if b.get("source") else b["reason"]
+                for b in upgrade["blocked_by"]
+            )
+            print(f"BLOCKED   {module}: {package} {upgrade['latest']} ({blockers})")
+    print(f"\nResolution report written to {output}")
+    return report
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the resolver options on *parser*."""
+    parser.add_argument(
+        "--fetch",
+        action="store_true",
+        help="Fill the metadata cache from PyPI before resolving",
+    )
+    parser.add_argument(
+        "--versions",
+        type=int,
+        default=FETCH_VERSIONS,
+        help="Latest releases per package whose metadata is fetched",
+    )
+    parser.add_argument(
+        "--python",
+        default=f"{sys.version_info.major}.{sys.version_info.minor}",
+        help="Python version for modules that do not pin one",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(METADATA_DIR),
+        help="Metadata cache directory",
+    )
+    parser.add_argument(
+        "--watchlist",
+        default=str(config.WATCHLIST),
+        help="Watchlist JSON path",
+    )
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--base-dir",
+        default=str(config.base_dir()),
+        help="Base directory for module repos",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(config.REPORTS_DIR / "resolution.json"),
+        help="Output JSON path",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check module upgrade compatibility offline")
+    add_arguments(parser)
+    main(parser.parse_args())
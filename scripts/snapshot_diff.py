@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""Compare two dependency snapshots and draft issues for affected modules.
+
+Both snapshots are indexed once, by package and by ``(module, package)``
+pair, and every comparison is a dict lookup, so a diff costs time
+proportional to the size of the two snapshots.  The diff lists:
+
+- new releases: packages whose latest version changed (or that are new);
+- jump changes: packages whose ``version_jump`` classification changed;
+- newly affected: ``(module, package)`` pairs whose pin is now behind the
+  latest release but was not in the old snapshot;
+- pin changes: dependency specs added, removed or edited in a module.
+
+The diff is written as a Markdown report to ``monitoring/reports/`` and
+each newly affected module gets a draft issue in
+``monitoring/draft-issues/`` rendered from ``draft_issue.md.j2``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+from pathlib import Path
+
+from scripts import config, metrics
+from scripts.check_deps import pin_jump
+from scripts.snapshots import load_manifest
+from scripts.snapshots import load_snapshot as read_snapshot
+
+# Jumps that do not make a module "affected"
+_NO_UPDATE = (None, "none", "unknown")
+
+
+def load_snapshot(path: Path) -> dict:
+    """Load and validate a snapshot file."""
+    return read_snapshot(path).model_dump()
+
+
+def latest_snapshots(snapshots_dir: Path, count: int = 2) -> list[Path]:
+    """Return the *count* most recent snapshot files, oldest first."""
+    entries = load_manifest(snapshots_dir)[-count:]
+    return [Path(snapshots_dir) / entry["file"] for entry in entries]
+
+
+def index_pins(snapshot: dict) -> dict[tuple[str, str], str]:
+    """Map ``(module, package)`` to the dependency spec of every module."""
+    return {
+        (module, package): spec
+        for module, info in snapshot.get("module_deps", {}).items()
+        for package, spec in info.get("packages", {}).items()
+    }
+
+
+def index_affected(snapshot: dict, pins: dict | None = None) -> dict[tuple[str, str], str]:
+    """Map ``(module, package)`` to the jump between the pin and the latest release.
+
+    Only watched packages with a pinned version behind their latest
+    release are included.
+    """
+    packages = snapshot.get("packages", {})
+    pins = index_pins(snapshot) if pins is None else pins
+    affected = {}
+    for (module, package), spec in pins.items():
+        latest = packages.get(package, {}).get("latest")
+        if not latest:
+            continue
+        try:
+            jump = pin_jump(spec, latest)
+        except ValueError:  # unparsable version
+            continue
+        if jump not in _NO_UPDATE:
+            affected[module, package] = jump
+    return affected
+
+
+def diff_snapshots(old: dict, new: dict) -> dict:
+    """Diff two snapshots.
+
+    Returns
+    -------
+    dict
+        ``old`` and ``new`` scan dates, and the lists ``new_releases``,
+        ``jump_changes``, ``newly_affected``, ``resolved`` (pairs no
+        longer behind) and ``pin_changes``, each sorted by package or
+        module.
+    """
+    old_packages = old.get("packages", {})
+    new_packages = new.get("packages", {})
+
+    new_releases = []
+    jump_changes = []
+    for package, info in sorted(new_packages.items()):
+        before = old_packages.get(package)
+        if before is None or before.get("latest") != info.get("latest"):
+            known = set(before.get("all_versions", [])) if before else set()
+            new_releases.append({
+                "package": package,
+                "tier": info.get("tier"),
+                "previous": before.get("latest") if before else None,
+                "latest": info.get("latest"),
+                "latest_release_date": info.get("latest_release_date"),
+                "versions": [v for v in info.get("all_versions", []) if v not in known],
+                "changelog_url": info.get("changelog_url", ""),
+            })
+        if before is not None and before.get("version_jump") != info.get("version_jump"):
+            jump_changes.append({
+                "package": package,
+                "tier": info.get("tier"),
+                "previous": before.get("version_jump"),
+                "version_jump": info.get("version_jump"),
+            })
+
+    old_pins = index_pins(old)
+    new_pins = index_pins(new)
+    old_affected = index_affected(old, old_pins)
+    new_affected = index_affected(new, new_pins)
+
+    newly_affected = [
+        {
+            "module": module,
+            "package": package,
+            "spec": new_pins[module, package],
+            "latest": new_packages[package]["latest"],
+            "jump": jump,
+            "tier": new_packages[package].get("tier"),
+            "changelog_url": new_packages[package].get("changelog_url", ""),
+        }
+        for (module, package), jump in sorted(new_affected.items())
+        if old_affected.get((module, package)) != jump
+    ]
+    resolved = [
+        {"module": module, "package": package}
+        for module, package in sorted(old_affected.keys() - new_affected.keys())
+    ]
+    pin_changes = [
+        {
+            "module": module,
+            "package": package,
+            "previous": old_pins.get((module, package)),
+            "spec": new_pins.get((module, package)),
+        }
+        for module, package in sorted(old_pins.keys() | new_pins.keys())
+        if old_pins.get((module, package)) != new_pins.get((module, package))
+    ]
+
+    return {
+        "old": old.get("scan_date"),
+        "new": new.get("scan_date"),
+        "new_releases": new_releases,
+        "jump_changes": jump_changes,
+        "newly_affected": newly_affected,
+        "resolved": resolved,
+        "pin_changes": pin_changes,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+
+def _table(headers: list[str], rows: list[list]) -> list[str]:
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    lines += ["| " + " | ".join("" if c is None else str(c) for c in row) + " |" for row in rows]
+    return lines
+
+
+def render_report(diff: dict) -> str:
+    """Render *diff* as a Markdown report."""
+    lines = [f"# Dependency changes {diff['old']} → {diff['new']}", ""]
+
+    sections = [
+        (
+            "New releases",
+            ["Package", "Tier", "Previous", "Latest", "Released", "New versions"],
+            [
+                [
+                    f"[{r['package']}]({r['changelog_url']})" if r["changelog_url"] else r["package"],
+                    r["tier"], r["previous"] or "new", r["latest"], r["latest_release_date"],
+                    len(r["versions"]),
+                ]
+                for r in diff["new_releases"]
+            ],
+        ),
+        (
+            "Newly affected modules",
+            ["Module", "Package", "Spec", "Latest", "Jump"],
+            [
+                [r["module"], r["package"], f"`{r['spec']}`", r["latest"], r["jump"]]
+                for r in diff["newly_affected"]
+            ],
+        ),
+        (
+            "Version jump changes",
+            ["Package", "Tier", "Previous", "Now"],
+            [[r["package"], r["tier"], r["previous"], r["version_jump"]] for r in diff["jump_changes"]],
+        ),
+        (
+            "Pin changes",
+            ["Module", "Package", "Previous", "Now"],
+            [
+                [r["module"], r["package"], f"`{r['previous']}`" if r["previous"] is not None else "added",
+                 f"`{r['spec']}`" if r["spec"] is not None else "removed"]
+                for r in diff["pin_changes"]
+            ],
+        ),
+        (
+            "Resolved",
+            ["Module", "Package"],
+            [[r["module"], r["package"]] for r in diff["resolved"]],
+        ),
+    ]
+    for title, headers, rows in sections:
+        lines += [f"## {title} ({len(rows)})", ""]
+        lines += (_table(headers, rows) if rows else ["None."]) + [""]
+    return "\n".join(lines)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-").lower()
+
+
+def module_urls(modules_json: Path) -> dict[str, str]:
+    """Map module name to GitHub URL from modules.json."""
+    data = json.loads(Path(modules_json).read_text())
+    return {
+        mod["name"]: mod.get("github_url", "")
+        for cat in data["categories"]
+        for mod in cat["modules"]
+    }
+
+
+def render_issues(diff: dict, urls: dict[str, str] | None = None) -> dict[str, str]:
+    """Render one draft issue per newly affected module.
+
+    Returns
+    -------
+    dict
+        Mapping of module name to the issue Markdown.
+    """
+    from jinja2 import Environment, FileSystemLoader
+
+    urls = urls or {}
+    by_module: dict[str, list[dict]] = {}
+    for row in diff["newly_affected"]:
+        by_module.setdefault(row["module"], []).append(row)
+
+    env = Environment(loader=FileSystemLoader(config.SCRIPTS_DIR), keep_trailing_newline=True)
+    template = env.get_template("draft_issue.md.j2")
+    return {
+        module: template.render(
+            module=module,
+            github_url=urls.get(module, ""),
+            updates=updates,
+            old=diff["old"],
+            new=diff["new"],
+        )
+        for module, updates in by_module.items()
+    }
+
+
+def main(args: argparse.Namespace) -> dict:
+    snapshots = [Path(p) for p in args.snapshots] or latest_snapshots(Path(args.snapshots_dir))
+    if len(snapshots) != 2:
+        raise SystemExit(f"Need two snapshots to compare, found {len(snapshots)}")
+
+    with metrics.span("load"):
+        old, new = (load_snapshot(path) for path in snapshots)
+    with metrics.span("diff"):
+        diff = diff_snapshots(old, new)
+
+    stem = f"{snapshots[0].stem}_{snapshots[1].stem}"
+    reports_dir = Path(args.reports_dir)
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    with metrics.span("write"):
+        report_path = reports_dir / f"diff_{stem}.md"
+        report_path.write_text(render_report(diff))
+        (reports_dir / f"diff_{stem}.json").write_text(json.dumps(diff, indent=2) + "\n")
+
+        issues = {}
+        if not args.no_issues and diff["newly_affected"]:
+            issues_dir = Path(args.draft_issues_dir)
+            issues_dir.mkdir(parents=True, exist_ok=True)
+            for module, text in render_issues(diff, module_urls(args.modules_json)).items():
+                path = issues_dir / f"{snapshots[1].stem}_{_slug(module)}.md"
+                path.write_text(text)
+                issues[module] = path
+
+    print(
+        f"{snapshots[0].name} → {snapshots[1].name}: "
+        f"{len(diff['new_releases'])} new release(s), "
+        f"{len(diff['newly_affected'])} newly affected pin(s), "
+        f"{len(diff['pin_changes'])} pin change(s)"
+    )
+    for module, path in issues.items():
+        print(f"  draft issue for {module}: {path}")
+    print(f"Report written to {report_path}")
+    return diff
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the snapshot diff options on *parser*."""
+    parser.add_argument(
+        "snapshots",
+        nargs="*",
+        metavar="SNAPSHOT",
+        help="Old and new snapshot files (default: the two most recent)",
+    )
+    parser.add_argument(
+        "--snapshots-dir",
+        default=str(config.SNAPSHOTS_DIR),
+        help="Snapshot directory",
+    )
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path (for repo links in draft issues)",
+    )
+    parser.add_argument(
+        "--reports-dir",
+        default=str(config.REPORTS_DIR),
+        help="Directory for the Markdown and JSON diff reports",
+    )
+    parser.add_argument(
+        "--draft-issues-dir",
+        default=str(config.DRAFT_ISSUES_DIR),
+        help="Directory for the per-module draft issues",
+    )
+    parser.add_argument(
+        "--no-issues",
+        action="store_true",
+        help="Only write the report",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff two dependency snapshots")
+    add_arguments(parser)
+    main(parser.parse_args())
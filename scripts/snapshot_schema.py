@@ -0,0 +1,167 @@
+"""Pydantic schema of the dependency snapshots written by ``check_deps``.
+
+Snapshots are validated when they are saved and when they are read, so
+a field added, renamed or retyped on one side without the other fails
+loudly instead of silently turning into ``None`` in a report.  Files are
+written with pydantic's native JSON serializer and read with
+``model_validate_json`` straight from the file bytes.
+
+:class:`Snapshot` is the full document.  :class:`SnapshotLite` has the
+same fields minus the per-package ``all_versions`` and ``sizes``, which
+make up most of a snapshot.  With ``lite=True``, :func:`load_snapshot`
+streams the file with :class:`jsonstream.JsonStream` and skips those two
+keys without decoding them, then validates the rest; tools that read
+many snapshots for their summary, pins or latest versions use it.  Both
+models reject unknown keys and require every per-package field written
+since the first snapshots, so a renamed or dropped field fails either
+way.
+
+``schema_version`` is 1 for snapshots written before the schema existed
+(they validate as is) and :data:`SCHEMA_VERSION` for new ones; a file
+from a newer schema is rejected.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from scripts.jsonstream import JsonStream
+
+SCHEMA_VERSION = 2
+
+# Per-package keys a lite load skips unread
+LITE_SKIPPED = frozenset({"all_versions", "sizes"})
+
+
+class _Strict(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+
+class Summary(_Strict):
+    """Update counts per tier and footprint flags of one scan."""
+
+    critical_updates: int = 0
+    important_updates: int = 0
+    ecosystem_updates: int = 0
+    ai_ml_updates: int = 0
+    total_packages_scanned: int = 0
+    footprint_flags: int = 0
+
+
+class _PackageFields(_Strict):
+    # ``source`` (conda or PyPI) postdates the first snapshots
+    source: str = "pypi"
+    tier: str
+    latest: str
+    latest_release_date: str | None
+    version_jump: str
+    changelog_url: str
+
+
+class PackageSummary(_PackageFields):
+    """Latest release of a watched package, without its version history."""
+
+
+class PackageInfo(_PackageFields):
+    """A watched package, with every known version and release sizes."""
+
+    all_versions: list[str] = []
+    sizes: dict[str, int] = {}
+
+
+class ModuleDeps(_Strict):
+    """Dependencies declared by a module (see ``check_deps.scan_module_deps``)."""
+
+    file: str
+    packages: dict[str, str] = {}
+    conda: list[str] = []
+
+
+class FootprintGrowth(_Strict):
+    package: str
+    pinned: str | None
+    latest: str
+    pinned_bytes: int
+    latest_bytes: int
+
+
+class ModuleFootprint(_Strict):
+    """Install footprint of a module (see ``check_deps.module_footprints``)."""
+
+    pinned_bytes: int = 0
+    latest_bytes: int = 0
+    growth_ratio: float = 0.0
+    flagged: bool = False
+    growth: list[FootprintGrowth] = []
+    unknown: list[str] = []
+
+
+class CompactedScan(_Strict):
+    """A scan folded into a kept snapshot by ``snapshots compact``."""
+
+    snapshot_id: str
+    scan_date: str
+    summary: Summary = Summary()
+    latest: dict[str, str | None] = {}
+
+
+class _SnapshotFields(BaseModel):
+    schema_version: int = Field(1, le=SCHEMA_VERSION)
+    snapshot_id: str | None = None
+    scan_date: str
+    packages: dict = {}
+    module_deps: dict[str, ModuleDeps] = {}
+    footprint: dict[str, ModuleFootprint] = {}
+    summary: Summary = Summary()
+    compacted: list[CompactedScan] = []
+
+
+class Snapshot(_SnapshotFields, _Strict):
+    """A full snapshot."""
+
+    packages: dict[str, PackageInfo] = {}
+
+
+class SnapshotLite(_SnapshotFields, _Strict):
+    """A snapshot read without the per-package version lists and sizes."""
+
+    packages: dict[str, PackageSummary] = {}
+
+
+def _read_lite(path: Path) -> dict:
+    """Decode the snapshot at *path*, skipping the :data:`LITE_SKIPPED` keys."""
+    data: dict = {}
+    with open(path, "rb") as f:
+        stream = JsonStream(f)
+        for key in stream.iter_object():
+            if key != "packages":
+                data[key] = stream.read_value()
+                continue
+            packages = data[key] = {}
+            for name in stream.iter_object():
+                fields = packages[name] = {}
+                for field in stream.iter_object():
+                    if field not in LITE_SKIPPED:
+                        fields[field] = stream.read_value()
+    return data
+
+
+def load_snapshot(path: Path, lite: bool = False) -> Snapshot | SnapshotLite:
+    """Read and validate the snapshot at *path*.
+
+    Raises
+    ------
+    ValueError
+        If the file is not valid JSON (``pydantic.ValidationError``, a
+        subclass, if it does not match the schema).
+    """
+    if lite:
+        return SnapshotLite.model_validate(_read_lite(Path(path)))
+    return Snapshot.model_validate_json(Path(path).read_bytes())
+
+
+def dump_snapshot(snapshot: Snapshot) -> bytes:
+    """Serialize *snapshot* as indented JSON."""
+    return snapshot.model_dump_json(indent=2).encode() + b"\n"
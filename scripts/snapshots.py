@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Snapshot storage: unique IDs, a manifest index and retention.
+
+Every ``check_deps`` run is saved as ``<snapshot id>.json`` where the ID
+starts with the UTC scan time, so IDs sort chronologically and two runs
+on the same day no longer overwrite each other.  Snapshots written
+before IDs existed (``<date>.json``) use their file stem as ID.
+
+``manifest.json`` in the snapshot directory lists every snapshot with
+its scan date and the packages it covers.  History tools read the
+manifest, pick the snapshots in the time range (and with the package)
+they need and only open those files.  The manifest is updated on save
+and reconciled with a directory listing on load, so files added or
+removed by hand are picked up without reopening the others.  Files are
+written and read through :mod:`snapshot_schema`; indexing only parses
+the lite form of a snapshot.
+
+:func:`plan_retention` keeps one snapshot per day for recent scans, one
+per ISO week after that and one per month for the oldest.  Compaction
+folds each pruned snapshot into the next kept one: the kept snapshot
+gains a ``compacted`` entry with the pruned scan's date, summary and
+latest version of every package, then the pruned file is deleted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import secrets
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from scripts import config
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Default retention: daily for 4 weeks, weekly up to 26 weeks, monthly after
+KEEP_DAILY_WEEKS = 4
+KEEP_WEEKLY_WEEKS = 26
+
+
+def new_snapshot_id(scan_date: str) -> str:
+    """Return a unique, chronologically sortable ID for a scan.
+
+    >>> new_snapshot_id("2026-01-12T06:00:00Z")[:17]
+    '20260112T060000Z-'
+    """
+    stamp = scan_date.replace("-", "").replace(":", "")
+    return f"{stamp}-{secrets.token_hex(3)}"
+
+
+def snapshot_files(snapshots_dir: Path) -> list[Path]:
+    """Return the snapshot files in *snapshots_dir* (the manifest excluded)."""
+    return sorted(p for p in Path(snapshots_dir).glob("*.json") if p.name != MANIFEST_NAME)
+
+
+def load_snapshot(path: Path, lite: bool = False):
+    """Read a snapshot through :func:`snapshot_schema.load_snapshot`."""
+    from scripts.snapshot_schema import load_snapshot
+
+    return load_snapshot(path, lite=lite)
+
+
+def _parse_date(scan_date: str) -> datetime:
+    return datetime.fromisoformat(scan_date.replace("Z", "+00:00"))
+
+
+# ---------------------------------------------------------------------------
+# Manifest
+# ---------------------------------------------------------------------------
+
+
+def manifest_entry(path: Path, snapshot: dict) -> dict:
+    """Build the manifest entry of the snapshot stored at *path*."""
+    packages = set(snapshot.get("packages", {}))
+    for compacted in snapshot.get("compacted", []):
+        packages.update(compacted.get("latest", {}))
+    return {
+        "id": snapshot.get("snapshot_id") or path.stem,
+        "file": path.name,
+        "scan_date": snapshot["scan_date"],
+        "packages": sorted(packages),
+        "modules": len(snapshot.get("module_deps", {})),
+        "merged": [c["snapshot_id"] for c in snapshot.get("compacted", [])],
+    }
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write *data* to *path* so readers never see a partial file."""
+    tmp = path.with_name(f"{path.name}.tmp")  # not matched by the ``*.json`` glob
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def _manifest_path(snapshots_dir: Path) -> Path:
+    return Path(snapshots_dir) / MANIFEST_NAME
+
+
+def save_manifest(snapshots_dir: Path, entries: list[dict]) -> None:
+    """Write the manifest, entries sorted by scan date."""
+    entries = sorted(entries, key=lambda e: (e["scan_date"], e["id"]))
+    _write_atomic(
+        _manifest_path(snapshots_dir),
+        (json.dumps({"version": MANIFEST_VERSION, "snapshots": entries}, indent=1) + "\n").encode(),
+    )
+
+
+def load_manifest(snapshots_dir: Path) -> list[dict]:
+    """Return the manifest entries of *snapshots_dir*, oldest first.
+
+    Entries whose file is gone are dropped and files missing from the
+    manifest are indexed; only those new files are opened.  The manifest
+    is rewritten when anything changed.
+    """
+    snapshots_dir = Path(snapshots_dir)
+    try:
+        data = json.loads(_manifest_path(snapshots_dir).read_text())
+        entries = data["snapshots"] if data.get("version") == MANIFEST_VERSION else []
+    except (OSError, ValueError, KeyError):
+        entries = []
+
+    on_disk = {p.name: p for p in snapshot_files(snapshots_dir)}
+    kept = [e for e in entries if e["file"] in on_disk]
+    indexed = {e["file"] for e in kept}
+    added = [
+        manifest_entry(path, load_snapshot(path, lite=True).model_dump())
+        for name, path in on_disk.items()
+        if name not in indexed
+    ]
+    if added or len(kept) != len(entries):
+        save_manifest(snapshots_dir, kept + added)
+    return sorted(kept + added, key=lambda e: (e["scan_date"], e["id"]))
+
+
+def select(entries: list[dict], since: str | None = None, until: str | None = None,
+           package: str | None = None) -> list[dict]:
+    """Return the entries scanned in ``[since, until]`` that cover *package*.
+
+    *since* and *until* are ISO dates or timestamps; a bare date for
+    *until* includes that whole day.  *entries* must be sorted by scan
+    date, as returned by :func:`load_manifest`.
+    """
+    dates = [e["scan_date"] for e in entries]
+    lo = bisect.bisect_left(dates, since) if since else 0
+    if until and len(until) == 10:
+        until += "T99"  # sorts after every time of that day
+    hi = bisect.bisect_right(dates, until) if until else len(entries)
+    selected = entries[lo:hi]
+    if package:
+        selected = [e for e in selected if package in e["packages"]]
+    return selected
+
+
+def save_snapshot(snapshot: dict, snapshots_dir: Path) -> Path:
+    """Store *snapshot* under a new unique ID and add it to the manifest.
+
+    Raises
+    ------
+    pydantic.ValidationError
+        If *snapshot* does not match :class:`snapshot_schema.Snapshot`.
+    """
+    from scripts.snapshot_schema import SCHEMA_VERSION, Snapshot, dump_snapshot
+
+    snapshots_dir = Path(snapshots_dir)
+    snapshots_dir.mkdir(parents=True, exist_ok=True)
+    snapshot.setdefault("schema_version", SCHEMA_VERSION)
+    snapshot.setdefault("snapshot_id", new_snapshot_id(snapshot["scan_date"]))
+    model = Snapshot.model_validate(snapshot)
+    path = snapshots_dir / f"{snapshot['snapshot_id']}.json"
+    _write_atomic(path, dump_snapshot(model))
+
+    entries = [e for e in load_manifest(snapshots_dir) if e["file"] != path.name]
+    save_manifest(snapshots_dir, entries + [manifest_entry(path, model.model_dump())])
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Retention and compaction
+# ---------------------------------------------------------------------------
+
+
+def _bucket(scan: datetime, now: datetime, daily_weeks: int, weekly_weeks: int) -> tuple:
+    age = now - scan
+    if age < timedelta(weeks=daily_weeks):
+        return ("day", scan.date().isoformat())
+    if age < timedelta(weeks=weekly_weeks):
+        return ("week", *scan.isocalendar()[:2])
+    return ("month", scan.year, scan.month)
+
+
+def plan_retention(entries: list[dict], now: datetime | None = None,
+                   daily_weeks: int = KEEP_DAILY_WEEKS,
+                   weekly_weeks: int = KEEP_WEEKLY_WEEKS) -> dict[str, list[dict]]:
+    """Decide which snapshots to keep and where pruned ones are merged.
+
+    The latest snapshot of each day, week or month bucket (depending on
+    its age) is kept.
+
+    Returns
+    -------
+    dict
+        Mapping of each kept snapshot ID to the pruned entries merged
+        into it (empty for snapshots that absorb nothing).
+    """
+    now = now or datetime.now(timezone.utc)
+    plan: dict[str, list[dict]] = {}
+    pending: list[dict] = []
+    ordered = sorted(entries, key=lambda e: (e["scan_date"], e["id"]))
+    for i, entry in enumerate(ordered):
+        bucket = _bucket(_parse_date(entry["scan_date"]), now, daily_weeks, weekly_weeks)
+        following = ordered[i + 1] if i + 1 < len(ordered) else None
+        last_in_bucket = following is None or bucket != _bucket(
+            _parse_date(following["scan_date"]), now, daily_weeks, weekly_weeks
+        )
+        if last_in_bucket:
+            plan[entry["id"]] = pending
+            pending = []
+        else:
+            pending.append(entry)
+    return plan
+
+
+def _compacted_record(snapshot: dict, entry: dict) -> dict:
+    return {
+        "snapshot_id": entry["id"],
+        "scan_date": snapshot["scan_date"],
+        "summary": snapshot.get("summary", {}),
+        "latest": {name: info.get("latest") for name, info in snapshot.get("packages", {}).items()},
+    }
+
+
+def compact(snapshots_dir: Path, plan: dict[str, list[dict]], entries: list[dict]) -> int:
+    """Apply a retention *plan*; return the number of snapshots removed."""
+    from scripts.snapshot_schema import Snapshot, dump_snapshot
+
+    snapshots_dir = Path(snapshots_dir)
+    by_id = {e["id"]: e for e in entries}
+    removed = 0
+    for kept_id, pruned in plan.items():
+        if not pruned:
+            continue
+        kept_path = snapshots_dir / by_id[kept_id]["file"]
+        kept = load_snapshot(kept_path).model_dump()
+        records = []
+        for entry in pruned:
+            snapshot = load_snapshot(snapshots_dir / entry["file"], lite=True).model_dump()
+            records.extend(snapshot.get("compacted", []))
+            records.append(_compacted_record(snapshot, entry))
+        kept["compacted"] = sorted(
+            kept.get("compacted", []) + records, key=lambda r: r["scan_date"]
+        )
+        kept["snapshot_id"] = kept["snapshot_id"] or kept_id
+        _write_atomic(kept_path, dump_snapshot(Snapshot.model_validate(kept)))
+        by_id[kept_id] = manifest_entry(kept_path, kept)
+        # Delete only once the merged snapshot is safely written
+        for entry in pruned:
+            (snapshots_dir / entry["file"]).unlink()
+            del by_id[entry["id"]]
+            removed += 1
+    save_manifest(snapshots_dir, list(by_id.values()))
+    return removed
+
+
+def main(args: argparse.Namespace) -> None:
+    snapshots_dir = Path(args.snapshots_dir)
+    entries = load_manifest(snapshots_dir)
+
+    if args.action == "list":
+        for entry in select(entries, args.since, args.until, args.package):
+            merged = f"  (+{len(entry['merged'])} merged)" if entry["merged"] else ""
+            print(f"{entry['scan_date']}  {entry['id']:<28s} {len(entry['packages']):4d} packages{merged}")
+        return
+
+    plan = plan_retention(
+        entries, daily_weeks=args.keep_daily_weeks, weekly_weeks=args.keep_weekly_weeks
+    )
+    pruned = sum(len(p) for p in plan.values())
+    if args.dry_run:
+        for kept_id, merged in plan.items():
+            for entry in merged:
+                print(f"merge {entry['id']} -> {kept_id}")
+        print(f"{pruned} of {len(entries)} snapshot(s) would be compacted")
+        return
+    removed = compact(snapshots_dir, plan, entries)
+    print(f"Compacted {removed} of {len(entries)} snapshot(s); {len(entries) - removed} kept")
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the snapshot store options on *parser*."""
+    parser.add_argument(
+        "action",
+        choices=("list", "compact"),
+        help="List snapshots from the manifest, or apply the retention policy",
+    )
+    parser.add_argument(
+        "--snapshots-dir",
+        default=str(config.SNAPSHOTS_DIR),
+        help="Snapshot directory",
+    )
+    parser.add_argument("--since", help="list: first scan date (ISO)")
+    parser.add_argument("--until", help="list: last scan date (ISO)")
+    parser.add_argument("--package", help="list: only snapshots covering this package")
+    parser.add_argument(
+        "--keep-daily-weeks",
+        type=int,
+        default=KEEP_DAILY_WEEKS,
+        help="compact: keep one snapshot per day for this many weeks",
+    )
+    parser.add_argument(
+        "--keep-weekly-weeks",
+        type=int,
+        default=KEEP_WEEKLY_WEEKS,
+        help="compact: keep one snapshot per week up to this age, monthly after",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="compact: print the plan without changing any file",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the dependency snapshot store")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -4,23 +4,45 @@
 Reads modules.json and renders ci.yaml.j2 for each eligible
 Jupyter/Conda module, writing the result to
 <repo>/.github/workflows/ci.yaml.
+
+Workflows are rendered concurrently and a file is only rewritten when
+its content hash differs from the one already in the repo.  Each run
+produces a drift report (changed, unchanged, missing, skipped) that can
+be dumped as JSON; ``--dry-run`` builds the report without writing.
+
+With ``--commit-branch`` an optional post-sync stage creates that branch
+in every repo whose workflow was written and commits the file there.
+Only local git is touched; pushing stays manual.
 """
 
+from __future__ import annotations
+
+import argparse
+import hashlib
 import json
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import jinja2
+from scripts import config, metrics
 
-BASE = Path("/home/dguerrero/1_modules")
-SCRIPTS = Path(__file__).parent
-MODULES_JSON = SCRIPTS.parent / "modules.json"
+# jinja2 is only imported once a template is actually rendered
+if TYPE_CHECKING:
+    import jinja2
 
 SKIP_STATUSES = {"done", "skip"}
 
+WORKFLOW_PATH = Path(".github") / "workflows" / "ci.yaml"
+
+# Drift states reported for each module, in display order
+DRIFT_STATES = ("changed", "missing", "unchanged", "skipped")
+
 
-def load_modules():
+def load_modules(modules_json: Path = config.MODULES_JSON):
     """Return the Jupyter/Conda Modules list from modules.json."""
-    with open(MODULES_JSON) as f:
+    with open(modules_json) as f:
         data = json.load(f)
     for cat in data["categories"]:
         if cat["name"] == "Jupyter/Conda Modules":
@@ -28,61 +50,362 @@ def load_modules():
     return []
 
 
-def main():
+def make_template() -> jinja2.Template:
+    """Load the ``ci.yaml.j2`` template."""
+    import jinja2
+
     env = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(str(SCRIPTS)),
+        loader=jinja2.FileSystemLoader(str(config.SCRIPTS_DIR)),
         keep_trailing_newline=True,
     )
-    template = env.get_template("ci.yaml.j2")
+    return env.get_template("ci.yaml.j2")
 
-    modules = load_modules()
-    written = []
-    skipped = []
 
-    for mod in modules:
-        name = mod["name"]
-        local_dir = mod.get("local_dir")
-        migration = mod.get("migration", {})
-        ci = mod.get("ci", {})
+def skip_reason(mod: dict) -> str | None:
+    """Return why *mod* gets no workflow, or ``None`` if it is eligible."""
+    migration = mod.get("migration", {})
+    if not mod.get("local_dir"):
+        return "no local_dir"
+    if mod.get("ci", {}).get("skip"):
+        return "ci.skip=true"
+    if migration.get("status") in SKIP_STATUSES:
+        return f"status={migration['status']}"
+    return None
 
-        # Skip criteria
-        if not local_dir:
-            skipped.append((name, "no local_dir"))
-            continue
-        if ci.get("skip"):
-            skipped.append((name, "ci.skip=true"))
-            continue
-        if migration.get("status") in SKIP_STATUSES:
-            skipped.append((name, f"status={migration['status']}"))
-            continue
 
-        # Derive expected kernel name from GitHub repo name
-        github_url = mod.get("github_url", "")
-        repo_name = github_url.rstrip("/").split("/")[-1] if github_url else ""
-        expected_kernel = f"venv-{repo_name}" if repo_name else ""
-
-        # Render template
-        rendered = template.render(
-            notebook=ci.get("notebook", "ui.ipynb"),
-            secrets=ci.get("secrets", []),
-            ee_fork_version=ci.get("ee_fork_version", ""),
-            expected_kernel=expected_kernel,
-        )
+def render_workflow(template: jinja2.Template, mod: dict) -> str:
+    """Render the CI workflow for a single module."""
+    ci = mod.get("ci", {})
+
+    # Derive expected kernel name from GitHub repo name
+    github_url = mod.get("github_url", "")
+    repo_name = github_url.rstrip("/").split("/")[-1] if github_url else ""
+    expected_kernel = f"venv-{repo_name}" if repo_name else ""
+
+    return template.render(
+        notebook=ci.get("notebook", "ui.ipynb"),
+        secrets=ci.get("secrets", []),
+        ee_fork_version=ci.get("ee_fork_version", ""),
+        expected_kernel=expected_kernel,
+    )
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sync_module(
+    template: jinja2.Template,
+    mod: dict,
+    base: Path,
+    dry_run: bool = False,
+) -> dict:
+    """Render the workflow for *mod* and write it only if it drifted.
 
-        # Write to repo
-        dest = BASE / local_dir / ".github" / "workflows" / "ci.yaml"
+    Returns
+    -------
+    dict
+        Drift entry with ``name``, ``local_dir``, ``path``, ``status``
+        (``"changed"``, ``"missing"`` or ``"unchanged"``), ``sha256`` of
+        the rendered file, ``previous_sha256`` of the file on disk (or
+        ``None``) and ``written``.
+    """
+    rendered = render_workflow(template, mod).encode()
+    dest = base / mod["local_dir"] / WORKFLOW_PATH
+
+    try:
+        previous = _sha256(dest.read_bytes())
+    except FileNotFoundError:
+        previous = None
+
+    new = _sha256(rendered)
+    if previous is None:
+        status = "missing"
+    elif previous != new:
+        status = "changed"
+    else:
+        status = "unchanged"
+
+    written = False
+    if status != "unchanged" and not dry_run:
         dest.parent.mkdir(parents=True, exist_ok=True)
-        dest.write_text(rendered)
+        dest.write_bytes(rendered)
+        written = True
+
+    return {
+        "name": mod["name"],
+        "local_dir": mod["local_dir"],
+        "path": str(dest),
+        "status": status,
+        "sha256": new,
+        "previous_sha256": previous,
+        "written": written,
+    }
+
+
+def sync_modules(
+    modules: list[dict],
+    base: Path,
+    dry_run: bool = False,
+    workers: int = 8,
+    template: jinja2.Template | None = None,
+) -> dict:
+    """Sync workflows for all *modules* and return the drift report.
+
+    Eligible modules are rendered and compared concurrently on a thread
+    pool; the report keeps the order of *modules*.
+
+    Returns
+    -------
+    dict
+        ``base_dir``, ``dry_run``, ``modules`` (one entry per module,
+        skipped ones carrying a ``reason``) and ``summary`` with a count
+        per drift state.
+    """
+    template = template or make_template()
+
+    eligible = []
+    entries: dict[int, dict] = {}
+    for i, mod in enumerate(modules):
+        reason = skip_reason(mod)
+        if reason:
+            entries[i] = {
+                "name": mod["name"],
+                "local_dir": mod.get("local_dir"),
+                "status": "skipped",
+                "reason": reason,
+            }
+        else:
+            eligible.append((i, mod))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = pool.map(
+            lambda item: sync_module(template, item[1], base, dry_run), eligible
+        )
+        for (i, _mod), entry in zip(eligible, results):
+            entries[i] = entry
+
+    ordered = [entries[i] for i in sorted(entries)]
+    summary = {state: 0 for state in DRIFT_STATES}
+    for entry in ordered:
+        summary[entry["status"]] += 1
+
+    return {
+        "base_dir": str(base),
+        "dry_run": dry_run,
+        "modules": ordered,
+        "summary": summary,
+    }
+
+
+def _git(repo: Path, *args: str) -> str:
+    """Run a git command in *repo* and return its stripped stdout."""
+    proc = subprocess.run(
+        ["git", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return proc.stdout.strip()
 
-        written.append(name)
-        print(f"WROTE {local_dir}/.github/workflows/ci.yaml")
+
+def commit_workflow(repo: str, branch: str, message: str) -> dict:
+    """Create *branch* in *repo* and commit the CI workflow on it.
+
+    The branch is (re)created from the current ``HEAD``, so a rerun
+    replaces the commit of an earlier run instead of failing on the
+    existing branch.  Repos with changes outside the workflow file are
+    refused rather than carrying those changes onto the branch.  Runs in
+    a worker process.
+
+    Returns
+    -------
+    dict
+        ``repo``, ``branch``, ``status`` (``"committed"`` or ``"error"``),
+        ``commit`` or ``error``, and ``seconds`` spent in git.
+    """
+    start = time.perf_counter()
+    repo_path = Path(repo)
+    workflow = WORKFLOW_PATH.as_posix()
+    result = {"repo": repo, "branch": branch}
+    try:
+        other = _git(repo_path, "status", "--porcelain", "-uall", "--", ".", f":!{workflow}")
+        if other:
+            raise RuntimeError(f"working tree has changes besides {workflow}:\n{other}")
+        if _git(repo_path, "branch", "--show-current") != branch:
+            _git(repo_path, "switch", "-C", branch)
+        _git(repo_path, "add", "--", workflow)
+        _git(repo_path, "commit", "-q", "-m", message, "--", workflow)
+        result["status"] = "committed"
+        result["commit"] = _git(repo_path, "rev-parse", "HEAD")
+    except (OSError, RuntimeError, subprocess.CalledProcessError) as exc:
+        result["status"] = "error"
+        result["error"] = (getattr(exc, "stderr", None) or str(exc)).strip()
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def commit_changes(
+    report: dict,
+    branch: str,
+    message: str,
+    workers: int = 4,
+) -> dict:
+    """Commit every workflow written by a sync run on its own branch.
+
+    Repos are processed in a bounded process pool; unchanged and skipped
+    modules are left alone.
+
+    Returns
+    -------
+    dict
+        ``branch``, ``results`` (one entry per repo, see
+        :func:`commit_workflow`) and ``summary`` with the number of
+        ``committed`` and ``error`` repos.
+    """
+    base = Path(report["base_dir"])
+    repos = [
+        str(base / entry["local_dir"])
+        for entry in report["modules"]
+        if entry.get("written")
+    ]
+
+    results = []
+    if repos:
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(repos)))) as pool:
+            futures = [
+                pool.submit(commit_workflow, repo, branch, message) for repo in repos
+            ]
+            results = [f.result() for f in futures]
+
+    summary = {"committed": 0, "error": 0}
+    for result in results:
+        summary[result["status"]] += 1
+
+    return {"branch": branch, "results": results, "summary": summary}
+
+
+def print_commits(commits: dict) -> None:
+    """Print a human-readable version of a :func:`commit_changes` result."""
+    for result in commits["results"]:
+        if result["status"] == "committed":
+            print(
+                f"COMMIT {result['repo']} {result['commit'][:8]} "
+                f"({result['seconds']:.2f}s)"
+            )
+        else:
+            print(f"ERROR  {result['repo']}: {result['error']}")
+    print(
+        f"\nBranch {commits['branch']}: {commits['summary']['committed']} committed, "
+        f"{commits['summary']['error']} failed"
+    )
+
+
+def print_report(report: dict) -> None:
+    """Print a human-readable version of the drift *report*."""
+    verb = "WOULD WRITE" if report["dry_run"] else "WROTE"
+    for entry in report["modules"]:
+        status = entry["status"]
+        if status == "skipped":
+            continue
+        target = f"{entry['local_dir']}/{WORKFLOW_PATH.as_posix()}"
+        if status == "unchanged":
+            print(f"OK    {target}")
+        else:
+            print(f"{verb} {target} ({status})")
 
     # Summary
-    for name, reason in skipped:
-        print(f"SKIP  {name}: {reason}")
+    for entry in report["modules"]:
+        if entry["status"] == "skipped":
+            print(f"SKIP  {entry['name']}: {entry['reason']}")
 
-    print(f"\nTotal: {len(written)} written, {len(skipped)} skipped")
+    counts = ", ".join(f"{report['summary'][s]} {s}" for s in DRIFT_STATES)
+    print(f"\nTotal: {counts}")
+
+
+def main(args: argparse.Namespace) -> dict:
+    with metrics.span("load_modules"):
+        modules = load_modules(Path(args.modules_json))
+    with metrics.span("sync"):
+        report = sync_modules(
+            modules,
+            Path(args.base_dir),
+            dry_run=args.dry_run,
+            workers=args.workers,
+        )
+    for state, n in report["summary"].items():
+        metrics.count(state, n)
+
+    if args.commit_branch and not args.dry_run:
+        with metrics.span("commit"):
+            report["git"] = commit_changes(
+                report,
+                args.commit_branch,
+                args.commit_message,
+                workers=args.git_workers,
+            )
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2) + "\n")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        if "git" in report:
+            print_commits(report["git"])
+    return report
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the CI sync options on *parser*."""
+    parser.add_argument(
+        "--base-dir",
+        default=str(config.base_dir()),
+        help="Base directory for module repos",
+    )
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report drift without writing any file",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=8,
+        help="Number of concurrent render/compare workers",
+    )
+    parser.add_argument(
+        "--report",
+        help="Write the JSON drift report to this path",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the drift report as JSON instead of text",
+    )
+    parser.add_argument(
+        "--commit-branch",
+        help="Create this branch and commit the workflow in each changed repo",
+    )
+    parser.add_argument(
+        "--commit-message",
+        default="ci: sync workflow from module_monitor",
+        help="Commit message used with --commit-branch",
+    )
+    parser.add_argument(
+        "--git-workers",
+        type=int,
+        default=4,
+        help="Number of repos committed in parallel",
+    )
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Sync CI workflows to module repos")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""Propose watchlist changes from the dependencies modules actually declare.
+
+``monitoring/watchlist.json`` is curated by hand.  This command counts,
+for every package declared by a module (see
+:func:`check_deps.scan_module_deps`), how many modules use it and how
+tightly they pin it, and proposes a tier for it:
+
+- ``critical``: used by :data:`CRITICAL_MIN_MODULES` modules or more, or
+  tightly pinned by :data:`IMPORTANT_MIN_MODULES` modules or more;
+- ``important``: used by :data:`IMPORTANT_MIN_MODULES` modules or more,
+  or tightly pinned by any module;
+- ``ecosystem``: everything else that is used.
+
+A pin is tight when it names an exact version or an upper bound, since
+those are the pins an upgrade breaks.  The proposal lists unwatched
+packages to add, watched packages whose tier no longer matches their
+usage (the hand-picked ``ai_ml`` tier is left alone) and watched
+packages no module uses.  ``--write`` applies the additions and moves to
+the watchlist; unused packages are only reported.
+
+``module-monitor deps --used-only`` uses the same counts to fetch only
+the packages modules declare.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from scripts import config, metrics
+from scripts.check_deps import _normalise, load_watchlist, scan_module_deps
+
+CRITICAL_MIN_MODULES = 5
+IMPORTANT_MIN_MODULES = 2
+
+# Tiers assigned from usage; other watchlist tiers are curated by topic
+USAGE_TIERS = ("critical", "important", "ecosystem")
+
+# Declared deps that provide a runtime or tooling rather than a library
+RUNTIME_ONLY = {"python", "pip", "setuptools", "wheel"}
+
+
+def pin_tightness(spec: str) -> str:
+    """Classify how tightly *spec* pins a package.
+
+    Returns ``"exact"``, ``"bounded"`` (upper bound, compatible release
+    or wildcard), ``"floor"`` (lower bounds only) or ``"none"``.
+
+    >>> [pin_tightness(s) for s in ("==2.1", ">=1,<2", "=3.8", ">=1.0", "")]
+    ['exact', 'bounded', 'bounded', 'floor', 'none']
+    """
+    spec = spec.strip()
+    if not spec:
+        return "none"
+    if spec.startswith("=") and not spec.startswith("=="):  # conda "=3.8" means 3.8.*
+        return "bounded"
+    if "<" in spec or "~=" in spec or "*" in spec:
+        return "bounded"
+    if "==" in spec:
+        return "exact"
+    return "floor"
+
+
+def usage_counts(module_deps: dict) -> dict[str, dict]:
+    """Count module usage of every declared package.
+
+    Returns
+    -------
+    dict
+        Mapping of package name to ``modules`` (sorted module names),
+        ``tight`` (number of modules with an exact or bounded pin),
+        ``tightness`` (count per :func:`pin_tightness` class) and
+        ``conda_only`` (declared only as a conda dep).
+    """
+    usage: dict[str, dict] = {}
+    for module, info in sorted(module_deps.items()):
+        conda = set(info.get("conda", []))
+        for package, spec in info.get("packages", {}).items():
+            entry = usage.setdefault(
+                package, {"modules": [], "tight": 0, "tightness": {}, "conda_only": True}
+            )
+            entry["modules"].append(module)
+            tightness = pin_tightness(spec)
+            entry["tightness"][tightness] = entry["tightness"].get(tightness, 0) + 1
+            if tightness in ("exact", "bounded"):
+                entry["tight"] += 1
+            if package not in conda:
+                entry["conda_only"] = False
+    return dict(sorted(usage.items()))
+
+
+def proposed_tier(entry: dict) -> str:
+    """Tier for a package from its :func:`usage_counts` entry."""
+    used = len(entry["modules"])
+    if used >= CRITICAL_MIN_MODULES or entry["tight"] >= IMPORTANT_MIN_MODULES:
+        return "critical"
+    if used >= IMPORTANT_MIN_MODULES or entry["tight"]:
+        return "important"
+    return "ecosystem"
+
+
+def used_packages(module_deps: dict) -> set[str]:
+    """Names of the library packages any module declares through pip."""
+    return {
+        package
+        for package, entry in usage_counts(module_deps).items()
+        if not entry["conda_only"] and package not in RUNTIME_ONLY
+    }
+
+
+def watched_tiers(watchlist: dict[str, list[dict]]) -> dict[str, str]:
+    """Map each watched package (normalised) to its tier."""
+    return {
+        _normalise(pkg["name"]): tier
+        for tier, packages in watchlist.items()
+        for pkg in packages
+    }
+
+
+def propose(watchlist: dict[str, list[dict]], usage: dict[str, dict]) -> dict:
+    """Compare the watchlist with module usage.
+
+    Returns
+    -------
+    dict
+        ``add`` (unwatched packages used through pip, with their proposed
+        tier; conda-only packages are left out as the watchlist is
+        checked against PyPI),
+        ``move`` (watched packages whose usage tier differs) and
+        ``unused`` (watched packages no module declares).
+    """
+    watched = watched_tiers(watchlist)
+    add, move = [], []
+    for package, entry in usage.items():
+        if package in RUNTIME_ONLY:
+            continue
+        tier = proposed_tier(entry)
+        row = {"package": package, "tier": tier, "modules": len(entry["modules"]),
+               "tight": entry["tight"]}
+        current = watched.get(package)
+        if current is None:
+            if not entry["conda_only"]:
+                add.append(row)
+        elif current in USAGE_TIERS and current != tier:
+            move.append({**row, "from": current})
+    return {
+        "add": add,
+        "move": move,
+        "unused": sorted(package for package in watched if package not in usage),
+    }
+
+
+def apply_proposal(data: dict, proposal: dict) -> dict:
+    """Return watchlist JSON *data* with the proposal's additions and moves applied."""
+    data = json.loads(json.dumps(data))
+    tiers = data["tiers"]
+    for row in proposal["move"]:
+        source = tiers[row["from"]]["packages"]
+        pkg = next(p for p in source if _normalise(p["name"]) == row["package"])
+        source.remove(pkg)
+        tiers[row["tier"]]["packages"].append(pkg)
+    for row in proposal["add"]:
+        tiers[row["tier"]]["packages"].append({
+            "name": row["package"],
+            "pypi": row["package"],
+            "github": "",
+            "reason": f"used by {row['modules']} module{'s' if row['modules'] != 1 else ''}",
+        })
+    return data
+
+
+def main(args: argparse.Namespace) -> dict:
+    with metrics.span("scan_modules"):
+        module_deps = scan_module_deps(Path(args.modules_json), Path(args.base_dir))
+        usage = usage_counts(module_deps)
+    proposal = propose(load_watchlist(Path(args.watchlist)), usage)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"usage": usage, **proposal}, indent=2) + "\n")
+
+    print(f"{len(usage)} package(s) declared by {len(module_deps)} module(s)")
+    for row in proposal["add"]:
+        print(f"  ADD    {row['package']:<24s} {row['tier']:<10s} "
+              f"{row['modules']} module(s), {row['tight']} tight")
+    for row in proposal["move"]:
+        print(f"  MOVE   {row['package']:<24s} {row['from']} -> {row['tier']}  "
+              f"{row['modules']} module(s), {row['tight']} tight")
+    for package in proposal["unused"]:
+        print(f"  UNUSED {package}")
+
+    if args.write:
+        path = Path(args.watchlist)
+        data = apply_proposal(json.loads(path.read_text()), proposal)
+        path.write_text(json.dumps(data, indent=2) + "\n")
+        print(f"\nWatchlist updated: {path}")
+    print(f"Proposal written to {output}")
+    return proposal
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register the watchlist proposal options on *parser*."""
+    parser.add_argument(
+        "--watchlist",
+        default=str(config.WATCHLIST),
+        help="Watchlist JSON path",
+    )
+    parser.add_argument(
+        "--modules-json",
+        default=str(config.MODULES_JSON),
+        help="modules.json path",
+    )
+    parser.add_argument(
+        "--base-dir",
+        default=str(config.base_dir()),
+        help="Base directory for module repos",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(config.REPORTS_DIR / "watchlist_proposal.json"),
+        help="Output JSON path",
+    )
+    parser.add_argument(
+        "--write",
+        action="store_true",
+        help="Apply the proposed additions and tier moves to the watchlist",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Propose watchlist changes from module usage")
+    add_arguments(parser)
+    main(parser.parse_args())
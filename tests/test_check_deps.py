@@ -128,3 +128,96 @@ def test_build_snapshot_structure():
     assert "summary" in snapshot
     assert snapshot["packages"]["solara"]["tier"] == "critical"
     assert snapshot["packages"]["solara"]["latest"] == "1.44.0"
+
+
+def test_release_size_prefers_linux_wheel():
+    """The x86_64 Linux wheel wins over other wheels and the sdist."""
+    from scripts.check_deps import release_size
+
+    files = [
+        {"filename": "gdal-3.8.3.tar.gz", "packagetype": "sdist", "size": 900},
+        {"filename": "pkg-1.0-cp312-cp312-win_amd64.whl", "packagetype": "bdist_wheel", "size": 10},
+        {"filename": "pkg-1.0-cp312-cp312-manylinux_2_17_aarch64.whl", "packagetype": "bdist_wheel", "size": 20},
+        {"filename": "pkg-1.0-cp312-cp312-manylinux_2_17_x86_64.whl", "packagetype": "bdist_wheel", "size": 30},
+    ]
+    assert release_size(files) == 30
+    assert release_size(files[:2]) == 900
+    assert release_size([]) is None
+
+
+def test_footprint_growth_is_flagged():
+    """Modules whose watched deps grow past the threshold are flagged."""
+    from scripts.check_deps import build_snapshot
+
+    pypi_data = {
+        "solara": {
+            "latest": "2.0.0",
+            "all_versions": ["1.40.0", "2.0.0"],
+            "release_sizes": {"1.39.0": 1, "1.40.0": 1_000_000, "2.0.0": 1_500_000},
+        },
+        "ipyleaflet": {
+            "latest": "0.19.0",
+            "all_versions": ["0.19.0"],
+            "release_sizes": {"0.19.0": 2_000_000},
+        },
+    }
+    module_deps = {
+        "gfc": {"file": "requirements.txt", "packages": {"solara": "==1.40", "ipyleaflet": ""}},
+        "alerts": {"file": "requirements.txt", "packages": {"solara": ">=2.0"}},
+    }
+    snapshot = build_snapshot(pypi_data, module_deps, {}, footprint_threshold=0.1)
+
+    assert snapshot["packages"]["solara"]["sizes"] == {"1.40.0": 1_000_000, "2.0.0": 1_500_000}
+    gfc = snapshot["footprint"]["gfc"]
+    assert gfc["pinned_bytes"] == 3_000_000
+    assert gfc["latest_bytes"] == 3_500_000
+    assert gfc["flagged"] is True
+    assert gfc["growth"][0]["package"] == "solara"
+    assert snapshot["footprint"]["alerts"]["flagged"] is False
+    assert snapshot["summary"]["footprint_flags"] == 1
+
+
+def test_footprint_sizes_floors_at_latest():
+    """Open floors install the latest release; upper bounds the highest one they allow."""
+    from scripts.check_deps import module_footprints
+
+    packages = {"numpy": {"latest": "2.0", "sizes": {"1.0": 1_000, "1.26": 1_500, "2.0": 2_000}}}
+    footprints = module_footprints(packages, {
+        "floor": {"packages": {"numpy": ">=1.0"}},
+        "capped": {"packages": {"numpy": ">=1.0,<2"}},
+        "pinned": {"packages": {"numpy": "==1.0"}},
+        "missing": {"packages": {"numpy": "==1.5"}},
+    }, threshold=0.1)
+
+    assert footprints["floor"]["pinned_bytes"] == 2_000
+    assert footprints["floor"]["growth"] == [] and footprints["floor"]["flagged"] is False
+    assert footprints["capped"]["growth"][0]["pinned"] == "1.26"
+    assert footprints["pinned"]["growth_ratio"] == 1.0 and footprints["pinned"]["flagged"] is True
+    assert footprints["missing"]["unknown"] == ["numpy"]
+
+
+def test_conda_pins_keep_their_source():
+    """Conda deps are listed separately and conda info keeps its source."""
+    from scripts.check_deps import build_snapshot, split_environment_yml
+
+    conda, pip = split_environment_yml(
+        "dependencies:\n  - gdal=3.8.3\n  - tzdata=2024a\n  - pip:\n    - solara>=1.0\n"
+    )
+    assert conda == {"gdal": "=3.8.3", "tzdata": "=2024a"}
+    assert pip == {"solara": ">=1.0"}
+
+    module_deps = {
+        "clip_time_series": {
+            "file": "sepal_environment.yml",
+            "packages": {**conda, **pip},
+            "conda": sorted(conda),
+        },
+    }
+    conda_data = {
+        "gdal": {"latest": "3.10.1", "all_versions": ["3.8.3", "3.10.1"], "source": "conda-forge"},
+        "tzdata": {"latest": "2025b", "all_versions": ["2024a", "2025b"], "source": "conda-forge"},
+    }
+    snapshot = build_snapshot(conda_data, module_deps, {})
+    assert snapshot["packages"]["gdal"]["source"] == "conda-forge"
+    assert snapshot["packages"]["gdal"]["version_jump"] == "minor"
+    assert snapshot["packages"]["tzdata"]["version_jump"] == "unknown"
@@ -0,0 +1,72 @@
+"""Tests for ci_status.py, against a local stand-in for the GitHub API."""
+
+import asyncio
+
+
+def _fake_github(requests, remaining=100):
+    """MockTransport handler serving one completed run per workflow."""
+    import httpx
+
+    def handler(request):
+        requests.append(request)
+        repo = request.url.path.split("/")[3]
+        etag = f'W/"{repo}-1"'
+        headers = {"x-ratelimit-remaining": str(remaining), "x-ratelimit-reset": "1767225600"}
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers=headers)
+        run = {
+            "status": "completed",
+            "conclusion": "failure" if repo == "broken" else "success",
+            "head_branch": "main",
+            "run_number": 7,
+            "updated_at": "2026-01-01T00:00:00Z",
+            "html_url": f"https://github.com/org/{repo}/actions/runs/1",
+        }
+        return httpx.Response(200, json={"workflow_runs": [run]}, headers={**headers, "etag": etag})
+
+    return handler
+
+
+def test_collect_uses_etags():
+    """A second collection sends If-None-Match and reuses cached results on 304."""
+    import httpx
+
+    from scripts.ci_status import collect
+
+    workflows = {"org/ok": ["ci.yaml"], "org/broken": ["ci.yaml", "unit.yaml"]}
+    cache = {}
+
+    requests = []
+    transport = httpx.MockTransport(_fake_github(requests))
+    status, limit = asyncio.run(collect(workflows, cache, token="t", transport=transport))
+    assert status["org/ok"]["ci.yaml"]["state"] == "passing"
+    assert status["org/broken"]["unit.yaml"]["state"] == "failing"
+    assert limit.remaining == 100
+    assert requests[0].headers["authorization"] == "Bearer t"
+
+    requests = []
+    again, _ = asyncio.run(collect(workflows, cache, transport=transport))
+    assert again == status
+    assert all(r.headers.get("if-none-match") for r in requests)
+
+
+def test_collect_stops_at_rate_limit():
+    """Once the budget is spent, workflows keep their cached state, marked stale."""
+    import httpx
+
+    from scripts.ci_status import collect
+    from scripts.generate_readme import ci_label
+
+    workflows = {f"org/repo{i}": ["ci.yaml"] for i in range(5)}
+    cache = {}
+    requests = []
+    transport = httpx.MockTransport(_fake_github(requests, remaining=0))
+    status, limit = asyncio.run(collect(workflows, cache, concurrency=1, transport=transport))
+
+    assert len(requests) == 1
+    assert limit.exhausted
+    assert status["org/repo0"]["ci.yaml"]["state"] == "passing"
+    assert status["org/repo4"]["ci.yaml"] == {"state": "unknown"}
+
+    assert ci_label({"ci_status": status["org/repo0"]}, "ci.yaml") == "✓ ci passing"
+    assert ci_label({}, "ci.yaml") == "? ci"
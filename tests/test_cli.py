@@ -0,0 +1,50 @@
+"""Tests for the module-monitor CLI."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Time allowed to import the CLI and list the modules, interpreter startup excluded
+IMPORT_BUDGET_SECONDS = 0.15
+
+_PROBE = """
+import contextlib, io, json, sys, time
+start = time.perf_counter()
+from scripts.cli import main
+with contextlib.redirect_stdout(io.StringIO()):
+    main(["modules"])
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("httpx", "pydantic", "jinja2", "packaging") if m in sys.modules]
+print(json.dumps({"elapsed": elapsed, "heavy": heavy}))
+"""
+
+
+def test_modules_command_import_budget():
+    """Listing modules loads no heavy dependency and stays within budget."""
+    root = Path(__file__).parent.parent
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=root, check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(out.splitlines()[-1])
+    assert result["heavy"] == []
+    assert result["elapsed"] < IMPORT_BUDGET_SECONDS
+
+
+def test_subcommand_options_are_registered_lazily():
+    """Only the selected subcommand gets its options."""
+    from scripts.cli import build_parser
+
+    args = build_parser("sync-ci").parse_args(["sync-ci", "--dry-run", "--workers", "2"])
+    assert args.command == "sync-ci"
+    assert args.dry_run is True
+    assert args.workers == 2
+
+
+def test_modules_command_lists_modules(capsys):
+    """The built-in modules command prints every module."""
+    from scripts.cli import main
+
+    main(["modules", "--json"])
+    modules = json.loads(capsys.readouterr().out)
+    assert any(mod["name"] == "sepal_ui" and mod["category"] == "Core Library" for mod in modules)
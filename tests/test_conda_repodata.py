@@ -0,0 +1,93 @@
+"""Tests for conda_repodata.py."""
+
+import json
+
+
+def _repodata(records, key="packages"):
+    return {
+        "info": {"subdir": "linux-64"},
+        key: {
+            f"{name}-{version}-{i}.tar.bz2": {
+                "build": f"h{i}",
+                "depends": ["python >=3.10", "libgcc-ng >=12"],
+                "name": name,
+                "version": version,
+                "timestamp": timestamp,
+                "sha256": "0" * 64,
+            }
+            for i, (name, version, timestamp) in enumerate(records)
+        },
+        "removed": [],
+    }
+
+
+def test_index_repodata_streams_records(tmp_path):
+    """Versions are deduplicated across builds and sorted; pre-releases are not latest."""
+    from scripts.conda_repodata import index_repodata, merge_indexes
+
+    path = tmp_path / "repodata.json"
+    path.write_text(json.dumps(_repodata([
+        ("gdal", "3.8.3", 1704067200000),
+        ("gdal", "3.10.0", 1730000000000),
+        ("gdal", "3.10.0", 1731000000000),  # second build
+        ("gdal", "3.11.0rc1", 1740000000000),
+        ("GeoPandas", "0.14.1", None),
+    ])))
+
+    index = index_repodata(path)
+    assert index["gdal"] == {
+        "versions": ["3.8.3", "3.10.0", "3.11.0rc1"],
+        "latest": "3.10.0",
+        "latest_release_date": "2024-11-07",
+    }
+    assert index["geopandas"]["latest"] == "0.14.1"
+    assert index["geopandas"]["latest_release_date"] is None
+
+    noarch = tmp_path / "noarch.json"
+    noarch.write_text(json.dumps(_repodata([("gdal", "3.10.1", 1735000000000)], "packages.conda")))
+    merged = merge_indexes([index, index_repodata(noarch)])
+    assert merged["gdal"]["latest"] == "3.10.1"
+    assert merged["gdal"]["versions"][-2:] == ["3.10.1", "3.11.0rc1"]
+
+
+def test_load_index_caches_by_hash(tmp_path, monkeypatch):
+    """An unchanged repodata file is served from the cache without parsing."""
+    from scripts import conda_repodata
+
+    path = tmp_path / "repodata.json"
+    path.write_text(json.dumps(_repodata([("gdal", "3.8.3", 1704067200000)])))
+    cache = tmp_path / "cache"
+
+    first = conda_repodata.load_index(path, cache)
+    assert (cache / f"{conda_repodata.file_digest(path)}.json").exists()
+
+    def fail(_path):
+        raise AssertionError("repodata parsed again")
+
+    monkeypatch.setattr(conda_repodata, "index_repodata", fail)
+    assert conda_repodata.load_index(path, cache) == first
+
+    info = conda_repodata.conda_info([path], {"gdal", "pip"}, cache_dir=cache)
+    assert info == {"gdal": {
+        "latest": "3.8.3",
+        "latest_release_date": "2024-01-01",
+        "all_versions": ["3.8.3"],
+        "source": "conda-forge",
+    }}
+
+
+def test_non_pep440_versions_sort_deterministically(tmp_path):
+    """Versions packaging cannot parse still sort the same way on every run."""
+    import itertools
+
+    from scripts.conda_repodata import index_repodata
+
+    versions = ["1.1.1u", "1.1.1v", "1.1.1w", "1.1.1t"]
+    results = []
+    for order in itertools.islice(itertools.permutations(versions), 6):
+        path = tmp_path / "repodata.json"
+        path.write_text(json.dumps(_repodata([("openssl", v, 1700000000000) for v in order])))
+        results.append(index_repodata(path)["openssl"])
+    assert all(result == results[0] for result in results)
+    assert results[0]["versions"] == ["1.1.1t", "1.1.1u", "1.1.1v", "1.1.1w"]
+    assert results[0]["latest"] == "1.1.1w"
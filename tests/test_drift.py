@@ -0,0 +1,114 @@
+"""Tests for drift.py columnar pin-drift store."""
+
+import json
+import time
+
+import numpy as np
+
+
+def _snapshot(date, latest, versions, pins):
+    return {
+        "snapshot_id": f"{date.replace('-', '')}T060000Z-000000",
+        "scan_date": f"{date}T06:00:00Z",
+        "packages": {"sepal-ui": {
+            "tier": "critical", "latest": latest, "latest_release_date": None,
+            "version_jump": "unknown", "changelog_url": "", "all_versions": versions,
+        }},
+        "module_deps": {
+            module: {"file": "requirements.txt", "packages": {"sepal-ui": spec}}
+            for module, spec in pins.items()
+        },
+    }
+
+
+def test_update_and_query(tmp_path):
+    """Rows are appended incrementally and aggregated per scan."""
+    from scripts.drift import load_store, module_series, package_series, update_store
+    from scripts.snapshots import save_snapshot
+
+    snapshots, store_dir = tmp_path / "snapshots", tmp_path / "drift"
+    versions = ["2.20.0", "2.21.0", "2.22.0rc1", "2.22.0"]
+    save_snapshot(_snapshot("2026-01-05", "2.21.0", versions[:2], {"gfc": "==2.20.0", "alerts": ">=2.21"}), snapshots)
+    assert update_store(snapshots, store_dir) == 1
+
+    save_snapshot(_snapshot("2026-01-12", "2.22.0", versions, {"gfc": "==2.20.0", "alerts": ">=2.21"}), snapshots)
+    assert update_store(snapshots, store_dir) == 1
+    assert update_store(snapshots, store_dir) == 0
+
+    store = load_store(store_dir)
+    assert store["rows"] == 4
+
+    gfc = module_series(store, "gfc")
+    assert gfc["max_behind"].tolist() == [1, 2]
+    assert gfc["jumps"]["minor"].tolist() == [1, 1]
+
+    sepal_ui = package_series(store, "sepal-ui")
+    assert sepal_ui["pins"].tolist() == [2, 2]
+    assert sepal_ui["behind_pins"].tolist() == [1, 2]
+    assert sepal_ui["total_behind"].tolist() == [1, 3]
+    assert str(sepal_ui["scan_date"][-1]) == "2026-01-12T06:00:00"
+    assert module_series(store, "unknown-module")["pins"].size == 0
+
+
+def test_queries_are_vectorised(tmp_path):
+    """Ten years of weekly scans over a large fleet query in well under a second."""
+    from scripts.drift import COLUMNS, STORE_VERSION, fleet_series, load_store, module_series
+
+    scans, modules, packages = 520, 60, 15
+    rows = scans * modules * packages
+    rng = np.random.default_rng(0)
+    values = {
+        "scan": np.repeat(np.arange(scans), modules * packages),
+        "module": np.tile(np.repeat(np.arange(modules), packages), scans),
+        "package": np.tile(np.arange(packages), scans * modules),
+        "behind": rng.integers(0, 30, rows),
+        "jump": rng.integers(0, 5, rows),
+    }
+    tmp_path.mkdir(exist_ok=True)
+    for name, dtype in COLUMNS.items():
+        values[name].astype(dtype).tofile(tmp_path / f"{name}.bin")
+    (tmp_path / "meta.json").write_text(json.dumps({
+        "version": STORE_VERSION,
+        "rows": rows,
+        "scans": [{"id": str(i), "scan_date": f"{2016 + i // 52}-01-01T00:00:00Z"} for i in range(scans)],
+        "modules": [f"module-{i}" for i in range(modules)],
+        "packages": [f"package-{i}" for i in range(packages)],
+    }))
+
+    store = load_store(tmp_path)
+    start = time.perf_counter()
+    fleet = fleet_series(store)
+    module_series(store, "module-7", "package-3")
+    elapsed = time.perf_counter() - start
+    assert fleet["pins"].tolist() == [modules * packages] * scans
+    assert elapsed < 1.0
+
+
+def test_late_snapshot_keeps_compacted_history(tmp_path):
+    """An older snapshot is merged in order; rows of compacted scans survive."""
+    import pytest
+
+    from scripts.drift import load_store, module_series, update_store
+    from scripts.snapshots import compact, load_manifest, save_snapshot
+
+    snapshots, store_dir = tmp_path / "snapshots", tmp_path / "drift"
+    versions = ["2.19.0", "2.20.0", "2.21.0", "2.22.0"]
+    for date, latest, spec in [("2026-01-05", "2.20.0", "==2.19.0"),
+                               ("2026-01-12", "2.21.0", "==2.20.0"),
+                               ("2026-01-19", "2.22.0", "==2.20.0")]:
+        save_snapshot(_snapshot(date, latest, versions, {"gfc": spec}), snapshots)
+    assert update_store(snapshots, store_dir) == 3
+
+    entries = load_manifest(snapshots)
+    assert compact(snapshots, {entries[1]["id"]: [entries[0]]}, entries) == 1
+    save_snapshot(_snapshot("2026-01-01", "2.20.0", versions, {"gfc": "==2.20.0"}), snapshots)
+    assert update_store(snapshots, store_dir) == 1
+
+    store = load_store(store_dir)
+    gfc = module_series(store, "gfc")
+    assert [str(d)[:10] for d in gfc["scan_date"]] == ["2026-01-01", "2026-01-05", "2026-01-12", "2026-01-19"]
+    assert gfc["max_behind"].tolist() == [0, 1, 1, 2]
+
+    with pytest.raises(ValueError, match="1 scan"):
+        update_store(snapshots, store_dir, rebuild=True)
+    assert load_store(store_dir)["rows"] == 4
@@ -0,0 +1,80 @@
+"""Tests for env_planner.py."""
+
+import json
+
+MODULE_DEPS = {
+    "bundle": {"file": "pyproject.toml", "packages": {"solara": ">=1.40", "earthengine-api": ">=1.0"}},
+    "gfc": {"file": "requirements.txt", "packages": {"solara": "==1.44.0", "earthengine-api": ""}},
+    "legacy": {
+        "file": "sepal_environment.yml",
+        "packages": {"python": "=3.10", "solara": "<1.40", "gdal": "=3.8.3"},
+        "conda": ["gdal", "python"],
+    },
+    "planner": {"file": "requirements.txt", "packages": {"python": "=3.10", "gdal": ">=3.8"}},
+}
+
+
+def test_plan_groups_and_base_layer():
+    """Compatible modules share an environment; the conflicting one gets its own."""
+    from scripts.env_planner import base_layer, conflicts, known_versions, plan_groups
+
+    versions = known_versions(MODULE_DEPS)
+    groups = plan_groups(MODULE_DEPS, versions)
+    assert sorted(g["modules"] for g in groups) == [["bundle", "gfc"], ["legacy", "planner"]]
+
+    by_first = {g["modules"][0]: g for g in groups}
+    assert base_layer(by_first["bundle"], MODULE_DEPS, versions) == {
+        "earthengine-api": "==1.0", "solara": "==1.44.0",
+    }
+    assert base_layer(by_first["legacy"], MODULE_DEPS, versions) == {
+        "gdal": "==3.8.3", "python": "==3.10",
+    }
+
+    clash = conflicts({"solara": ["<1.40"]}, {"solara": ["==1.44.0"]}, versions)
+    assert clash == [{"package": "solara", "left": ["<1.40"], "right": ["==1.44.0"]}]
+
+
+def test_plan_reports_merge_conflicts(tmp_path):
+    """Pending merges list their conflicts; finished merges are left out of the plan."""
+    from scripts.env_planner import known_versions, merge_targets, plan
+
+    modules = {"categories": [{"name": "apps", "modules": [
+        {"name": "bundle", "github_url": "https://github.com/org/bundle"},
+        {"name": "gfc", "github_url": "https://github.com/org/gfc",
+         "migration": {"status": "done", "merge_target": "org/bundle"}},
+        {"name": "legacy", "github_url": "https://github.com/org/legacy",
+         "migration": {"status": "audited", "merge_target": "org/bundle"}},
+        {"name": "planner", "github_url": "https://github.com/org/planner"},
+    ]}]}
+    path = tmp_path / "modules.json"
+    path.write_text(json.dumps(modules))
+
+    report = plan(MODULE_DEPS, merge_targets(path), known_versions(MODULE_DEPS))
+    assert report["merged"] == ["gfc"]
+    assert report["merge_targets"]["legacy"]["target"] == "bundle"
+    assert [c["package"] for c in report["merge_targets"]["legacy"]["conflicts"]] == ["solara"]
+    assert len(report["groups"]) == 2
+    assert report["blocked"][0]["conflicts"][0]["package"] == "solara"
+
+
+def test_spec_only_conflicts_intersect_specifiers():
+    """Without cached releases, specs conflict only if they cannot intersect."""
+    from packaging.version import Version
+
+    from scripts.env_planner import conflicts, plan_groups
+
+    assert conflicts({"solara": ["<2"]}, {"solara": [""]}, {}) == []
+    assert conflicts({"solara": [">1.0"]}, {"solara": ["<2"]}, {}) == []
+    assert conflicts({"solara": ["~=1.4"]}, {"solara": [">=1.9,<3"]}, {}) == []
+    assert conflicts({"solara": ["==1.4.*"]}, {"solara": [">=1.5"]}, {})[0]["package"] == "solara"
+    assert conflicts({"solara": ["<1.40"]}, {"solara": ["==1.44.0"]}, {})[0]["package"] == "solara"
+
+    # Real release lists decide when they exist
+    releases = {"solara": [Version("2.0"), Version("1.0")]}
+    assert conflicts({"solara": [">1.0"]}, {"solara": ["<2"]}, releases)[0]["package"] == "solara"
+
+    deps = {
+        "a": {"file": "requirements.txt", "packages": {"solara": "<2"}},
+        "b": {"file": "requirements.txt", "packages": {"solara": ""}},
+    }
+    assert [g["modules"] for g in plan_groups(deps, {})] == [["a", "b"]]
@@ -0,0 +1,162 @@
+"""Tests for gather_repo_data.py audit gatherer."""
+
+
+def _make_repo(root):
+    (root / "component" / "tile").mkdir(parents=True)
+    (root / "component" / "tile" / "__init__.py").write_text("")
+    (root / "component" / "tile" / "map_tile.py").write_text("import ee\nee.Initialize()\n")
+    (root / "component" / "model").mkdir()
+    (root / "component" / "model" / "model.py").write_text("x = 1\n")
+    (root / "component" / "parameter.py").write_text("")
+    (root / "node_modules" / "pkg").mkdir(parents=True)
+    (root / "node_modules" / "pkg" / "planet.py").write_text("from planet import api\n")
+    (root / ".git").mkdir()
+    (root / "README.md").write_text("# module\n")
+    return root
+
+
+def test_walk_repo_prunes_skip_dirs(tmp_path):
+    """Skip dirs are neither listed nor scanned by detectors."""
+    from scripts.gather_repo_data import walk_repo
+
+    repo = _make_repo(tmp_path / "repo")
+    walk = walk_repo(str(repo))
+
+    assert walk["flags"] == {"uses_gee": True, "uses_planet": False}
+    names = [name for name, _ in walk["listing"][str(repo)]]
+    assert names == ["README.md", "component"]
+    assert not any("node_modules" in path for path in walk["listing"])
+
+
+def test_render_tree_and_component_counts(tmp_path):
+    """Tree and component counts are derived from the single walk."""
+    from scripts.gather_repo_data import count_component_files, render_tree, walk_repo
+
+    repo = _make_repo(tmp_path / "repo")
+    listing = walk_repo(str(repo))["listing"]
+
+    assert render_tree(listing, str(repo), max_depth=2) == [
+        "├── README.md",
+        "└── component",
+        "    ├── model",
+        "    ├── parameter.py",
+        "    └── tile",
+    ]
+    counts = count_component_files(listing, str(repo / "component"))
+    assert counts == {"tiles": 1, "models": 1, "widgets": 0, "scripts": 0, "other": 1}
+
+
+def test_load_local_dirs(tmp_path):
+    """Repo list comes from every local_dir in modules.json, deduplicated."""
+    import json
+
+    from scripts.gather_repo_data import load_local_dirs
+
+    modules_json = tmp_path / "modules.json"
+    modules_json.write_text(json.dumps({
+        "categories": [
+            {"name": "A", "modules": [{"name": "a", "local_dir": "a"}, {"name": "x", "local_dir": None}]},
+            {"name": "B", "modules": [{"name": "b", "local_dir": "b"}, {"name": "a2", "local_dir": "a"}]},
+        ]
+    }))
+    assert load_local_dirs(modules_json) == ["a", "b"]
+
+
+def test_audit_repos_parallel(tmp_path):
+    """Parallel audit yields every repo, including missing ones, with timings."""
+    from scripts.gather_repo_data import audit_repos
+
+    _make_repo(tmp_path / "repo_a")
+    _make_repo(tmp_path / "repo_b")
+
+    results = {d: (data, s) for d, data, s in audit_repos(["repo_a", "repo_b", "gone"], tmp_path, workers=2)}
+    assert set(results) == {"repo_a", "repo_b", "gone"}
+    assert results["repo_a"][0]["uses_gee"] is True
+    assert results["repo_a"][0]["component_counts"]["tiles"] == 1
+    assert "error" in results["gone"][0]
+    assert all(seconds >= 0 for _, seconds in results.values())
+
+
+def test_audit_cache_keyed_on_repo_state(tmp_path, monkeypatch):
+    """Unchanged repos come from the cache; commits and edits invalidate it."""
+    import subprocess
+
+    from scripts.gather_repo_data import audit_repos
+
+    for var in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(var, "monitor")
+    for var in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(var, "monitor@example.org")
+    repo = _make_repo(tmp_path / "repo")
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    subprocess.run(["git", "-C", str(repo), "add", "README.md"], check=True)
+    subprocess.run(["git", "-C", str(repo), "commit", "-q", "-m", "init"], check=True)
+
+    def run(**kwargs):
+        return {d: data for d, data, _ in audit_repos(["repo"], tmp_path, cache=cache, **kwargs)}
+
+    cache = {}
+    assert not run()["repo"].get("audit_cached")
+    assert run()["repo"]["audit_cached"] is True
+    assert not run(force=True)["repo"].get("audit_cached")
+
+    (repo / "README.md").write_text("# edited\n")
+    assert not run()["repo"].get("audit_cached")
+    assert run()["repo"]["audit_cached"] is True
+
+    subprocess.run(["git", "-C", str(repo), "commit", "-q", "-am", "edit"], check=True)
+    assert not run()["repo"].get("audit_cached")
+
+
+def test_repo_state_key_sees_untracked_files_renames_and_options(tmp_path, monkeypatch):
+    """Edits inside untracked directories, renames and the entry notebook change the key."""
+    import os
+    import subprocess
+
+    from scripts.gather_repo_data import repo_state_key
+
+    for var in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(var, "monitor")
+    for var in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(var, "monitor@example.org")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "README.md").write_text("# module\n")
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    subprocess.run(["git", "-C", str(repo), "add", "README.md"], check=True)
+    subprocess.run(["git", "-C", str(repo), "commit", "-q", "-m", "init"], check=True)
+
+    (repo / "component").mkdir()
+    (repo / "component" / "tile.py").write_text("x = 1\n")
+    key = repo_state_key(repo)
+    assert repo_state_key(repo, notebook="app.ipynb") != key
+
+    # Same size, new mtime: only visible if the file itself is listed
+    (repo / "component" / "tile.py").write_text("x = 2\n")
+    stat = (repo / "component" / "tile.py").stat()
+    os.utime(repo / "component" / "tile.py", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert repo_state_key(repo) != key
+
+    subprocess.run(["git", "-C", str(repo), "mv", "README.md", "README.rst"], check=True)
+    key = repo_state_key(repo)
+    (repo / "README.rst").write_text("# renamed\n")
+    assert repo_state_key(repo) != key
+
+
+def test_walk_repo_parses_each_file_once(tmp_path, monkeypatch):
+    """All detectors share one parse of each .py file."""
+    import ast
+
+    from scripts import gather_repo_data
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.py").write_text("import os\n")
+    (repo / "b.py").write_text("from planet import api\n")
+    parsed = []
+    real_parse = ast.parse
+    monkeypatch.setattr(gather_repo_data.ast, "parse", lambda src: parsed.append(src) or real_parse(src))
+
+    walk = gather_repo_data.walk_repo(str(repo))
+    assert walk["flags"] == {"uses_gee": False, "uses_planet": True}
+    assert len(parsed) == 2
@@ -0,0 +1,64 @@
+"""Tests for import_index.py AST import scanner."""
+
+import json
+
+
+def _module(root):
+    (root / "component" / "scripts").mkdir(parents=True)
+    (root / "component" / "scripts" / "process.py").write_text(
+        "import os\n"
+        "import ee\n"
+        "from osgeo import gdal\n"
+        "from component import widget\n"
+        "from . import sibling\n"
+        "def f():\n"
+        "    import rasterio.features\n"
+    )
+    (root / "helpers.py").write_text("# 'planet' api mention only\nimport helpers\n")
+    (root / "ui.ipynb").write_text(json.dumps({
+        "cells": [{"cell_type": "code", "metadata": {}, "outputs": [],
+                   "source": ["%matplotlib inline\n", "from sepal_ui import sepalwidgets\n"]}],
+        "metadata": {}, "nbformat": 4, "nbformat_minor": 5,
+    }))
+    (root / "requirements.txt").write_text("sepal_ui\nearthengine-api\nrasterio\ngeopandas\nvoila\n")
+    return root
+
+
+def test_index_repo_and_cross_check(tmp_path):
+    """Third-party imports are found and compared with declared deps."""
+    from scripts.import_index import cross_check, index_repo
+
+    repo = _module(tmp_path / "mod")
+    result = index_repo(repo)
+    assert result["imports"] == ["ee", "osgeo", "rasterio", "sepal_ui"]
+    assert result["files"] == 3
+
+    declared = {"sepal-ui": "", "earthengine-api": "", "rasterio": "", "geopandas": "", "voila": ""}
+    check = cross_check(result["imports"], declared)
+    assert check["undeclared"] == ["gdal"]
+    assert check["unused"] == ["geopandas"]
+
+    # Second pass is served entirely from the per-file cache
+    again = index_repo(repo, known=result["new"])
+    assert again["new"] == {}
+    assert again["imports"] == result["imports"]
+
+
+def test_build_index(tmp_path):
+    """Modules from modules.json are indexed in parallel."""
+    from scripts.import_index import build_index
+
+    _module(tmp_path / "mod")
+    modules_json = tmp_path / "modules.json"
+    modules_json.write_text(json.dumps({
+        "categories": [{"name": "A", "modules": [
+            {"name": "mod", "local_dir": "mod"},
+            {"name": "absent", "local_dir": "absent"},
+        ]}]
+    }))
+    cache = {}
+    index = build_index(modules_json, tmp_path, cache=cache, workers=2)
+    assert set(index) == {"mod"}
+    assert index["mod"]["declared_file"] == "requirements.txt"
+    assert index["mod"]["unused"] == ["geopandas"]
+    assert len(cache) == 3
@@ -0,0 +1,75 @@
+"""Tests for jsonstream.py incremental reader."""
+
+import io
+import json
+
+import pytest
+
+DOC = {
+    "plain": "text",
+    "escapes": 'quote \" backslash \\ \\\\" tail \\',
+    "unicode": "café ✓",
+    "nested": {"list": [1, -2.5e3, True, False, None, {"deep": ["x", []]}], "empty": {}},
+    "big": "A" * 5000,
+    "last": [],
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 16])
+def test_stream_matches_json(chunk_size):
+    """Reading and skipping give the same values and sizes as the json module."""
+    from scripts.jsonstream import JsonStream
+
+    raw = json.dumps(DOC, indent=1).encode()
+    stream = JsonStream(io.BytesIO(raw), chunk_size=chunk_size)
+    read = {}
+    for key in stream.iter_object():
+        if key == "big":
+            assert stream.skip_value() == len(json.dumps(DOC["big"]))
+        elif key == "nested":
+            for sub in stream.iter_object():
+                if sub == "list":
+                    read["list"] = [stream.read_value() for _ in stream.iter_array()]
+        elif key != "last":
+            read[key] = stream.read_value()
+
+    assert read == {
+        "plain": DOC["plain"],
+        "escapes": DOC["escapes"],
+        "unicode": DOC["unicode"],
+        "list": DOC["nested"]["list"],
+    }
+    assert stream.peek() == ""
+
+
+def test_read_value_limit():
+    """Oversized values raise ValueTooLarge but leave the stream usable."""
+    from scripts.jsonstream import JsonStream, ValueTooLarge
+
+    raw = json.dumps({"a": "x" * 1000, "b": 1}).encode()
+    stream = JsonStream(io.BytesIO(raw), chunk_size=16)
+    keys = stream.iter_object()
+    assert next(keys) == "a"
+    with pytest.raises(ValueTooLarge) as exc_info:
+        stream.read_value(limit=100)
+    assert exc_info.value.size == 1002
+    assert next(keys) == "b"
+    assert stream.read_value(limit=100) == 1
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 16, 1 << 16])
+def test_read_value_limit_boundary(chunk_size):
+    """Only the value's own bytes count against the limit, not read-ahead."""
+    from scripts.jsonstream import JsonStream, ValueTooLarge
+
+    raw = json.dumps({"a": "x" * 48, "pad": "y" * 500}).encode()
+    for limit, fits in [(50, True), (49, False)]:
+        stream = JsonStream(io.BytesIO(raw), chunk_size=chunk_size)
+        keys = stream.iter_object()
+        assert next(keys) == "a"
+        if fits:
+            assert stream.read_value(limit=limit) == "x" * 48
+        else:
+            with pytest.raises(ValueTooLarge):
+                stream.read_value(limit=limit)
+        assert next(keys) == "pad"
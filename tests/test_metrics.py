@@ -0,0 +1,77 @@
+"""Tests for metrics.py run instrumentation."""
+
+import asyncio
+import json
+
+
+def test_spans_and_counters():
+    """Nested spans aggregate by path and counters add up."""
+    from scripts import metrics
+
+    metrics.reset("test")
+    for _ in range(3):
+        with metrics.span("outer"), metrics.span("inner"):
+            pass
+    metrics.count("modules", 2)
+    metrics.count("modules", 3)
+
+    summary = metrics.summary()
+    assert summary["command"] == "test"
+    assert summary["spans"]["outer"]["count"] == 3
+    assert summary["spans"]["outer/inner"]["count"] == 3
+    assert summary["counters"] == {"modules": 5}
+    assert summary["http"]["requests"] == 0
+    assert summary["peak_rss_bytes"] > 0
+
+
+def test_httpx_event_hooks():
+    """Requests made through the hooks are counted with their body size."""
+    import httpx
+
+    from scripts import metrics
+
+    def handler(request):
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(200, content=b"x" * 100)
+
+    async def fetch():
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), event_hooks=metrics.httpx_event_hooks()
+        ) as client:
+            await client.get("https://pypi.org/pypi/numpy/json")
+            await client.get("https://pypi.org/missing")
+
+    metrics.reset("test")
+    asyncio.run(fetch())
+    http = metrics.summary()["http"]
+    assert http["requests"] == 2
+    assert http["bytes"] == 100
+    assert http["by_host"]["pypi.org"]["errors"] == 1
+    assert http["latency_ms"]["max"] >= http["latency_ms"]["p50"]
+
+
+def test_cli_writes_metrics_and_profile(tmp_path, monkeypatch):
+    """A CLI run leaves a metrics file and, with --profile, cProfile stats."""
+    from scripts import config
+    from scripts.cli import main
+
+    monkeypatch.setattr(config, "REPORTS_DIR", tmp_path / "reports")
+    main(["--profile", "readme", "--output", str(tmp_path / "README.rst")])
+
+    (path,) = (tmp_path / "reports" / "metrics").glob("readme-*.json")
+    data = json.loads(path.read_text())
+    assert data["command"] == "readme"
+    assert {"load_modules", "render", "write"} <= data["spans"].keys()
+    assert path.with_suffix(".prof").stat().st_size > 0
+
+
+def test_write_names_are_unique(tmp_path, monkeypatch):
+    """Runs started in the same second get distinct metrics files."""
+    from scripts import config, metrics
+
+    monkeypatch.setattr(config, "REPORTS_DIR", tmp_path)
+    metrics.reset("deps")
+    first, second = metrics.write(), metrics.write()
+    assert first != second and first.name.startswith("deps-")
+    assert len(list((tmp_path / "metrics").glob("deps-*.json"))) == 2
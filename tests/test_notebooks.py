@@ -0,0 +1,66 @@
+"""Tests for notebooks.py streaming readers."""
+
+import json
+
+
+def _notebook(path):
+    nb = {
+        "cells": [
+            {"cell_type": "markdown", "metadata": {}, "source": ["# Title"]},
+            {
+                "cell_type": "code",
+                "execution_count": 1,
+                "metadata": {},
+                "outputs": [
+                    {
+                        "output_type": "display_data",
+                        "data": {"image/png": "iVBOR" * 20000, "text/plain": ["<Figure>"]},
+                        "metadata": {},
+                    }
+                ],
+                "source": ["from component import tile\n", "tile.map_tile"],
+            },
+            {"cell_type": "code", "metadata": {}, "outputs": [], "source": "x = 1"},
+        ],
+        "metadata": {"kernelspec": {"name": "venv-test"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    path.write_text(json.dumps(nb, indent=1))
+    return path
+
+
+def test_iter_code_sources(tmp_path):
+    """Only code cell sources are yielded, joined into strings."""
+    from scripts.notebooks import iter_code_sources
+
+    path = _notebook(tmp_path / "ui.ipynb")
+    assert list(iter_code_sources(path)) == [
+        "from component import tile\ntile.map_tile",
+        "x = 1",
+    ]
+    assert list(iter_code_sources(path, max_source_bytes=10))[0].startswith("[source too large: ")
+
+
+def test_notebook_load_metrics(tmp_path):
+    """Outputs, images and widget state are measured and flagged."""
+    import json as _json
+
+    from scripts.notebooks import notebook_load_metrics
+
+    path = _notebook(tmp_path / "ui.ipynb")
+    nb = _json.loads(path.read_text())
+    nb["metadata"]["widgets"] = {"application/vnd.jupyter.widget-state+json": {"state": {"k": "v" * 300}}}
+    nb["cells"][0]["attachments"] = {"logo.png": {"image/png": "Zm9v"}}
+    path.write_text(_json.dumps(nb))
+
+    metrics = notebook_load_metrics(path, thresholds={"output_bytes": 50_000, "widget_state_bytes": 1000})
+    assert metrics["cell_count"] == 3
+    assert metrics["code_cell_count"] == 2
+    assert metrics["image_count"] == 2
+    assert metrics["image_bytes"] == len('"' + "iVBOR" * 20000 + '"') + len('"Zm9v"')
+    assert metrics["output_bytes"] > metrics["image_bytes"] - 10
+    assert metrics["source_bytes"] == sum(len(_json.dumps(c["source"])) for c in nb["cells"])
+    assert 300 < metrics["widget_state_bytes"] < 1000
+    assert metrics["flags"] == ["output_bytes"]
+    assert metrics["heavy"] is True
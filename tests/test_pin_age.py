@@ -0,0 +1,49 @@
+"""Tests for pin_age.py git history replay."""
+
+import subprocess
+
+
+def _git(repo, *args, env=None):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, env=env)
+
+
+def test_pin_ages(tmp_path, monkeypatch):
+    """Each package's age is the date its spec last changed."""
+    from scripts.pin_age import CatFile, pin_ages
+
+    for var in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(var, "monitor")
+    for var in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(var, "monitor@example.org")
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    requirements = repo / "requirements.txt"
+    revisions = [
+        ("2025-01-01", "sepal_ui==2.20.0\nsolara\n"),
+        ("2025-03-01", "sepal_ui==2.20.0\nsolara>=1.40\nearthengine-api\n"),
+        ("2025-06-01", "sepal_ui==2.21.0\nsolara>=1.40\nearthengine-api\n"),
+        ("2025-09-01", "sepal_ui==2.21.0\nsolara>=1.40\n"),
+    ]
+    for date, text in revisions:
+        requirements.write_text(text)
+        (repo / "app.py").write_text(date)
+        monkeypatch.setenv("GIT_AUTHOR_DATE", f"{date}T12:00:00Z")
+        monkeypatch.setenv("GIT_COMMITTER_DATE", f"{date}T12:00:00Z")
+        _git(repo, "add", ".")
+        _git(repo, "commit", "-q", "-m", date)
+    # A commit not touching the dependency file does not count
+    (repo / "app.py").write_text("later")
+    _git(repo, "commit", "-q", "-am", "unrelated")
+
+    ages = pin_ages(repo, "requirements.txt", now=1_767_225_600)  # 2026-01-01
+    assert set(ages) == {"sepal-ui", "solara"}
+    assert ages["sepal-ui"]["since"] == "2025-06-01"
+    assert ages["sepal-ui"]["changes"] == 1
+    assert ages["solara"]["since"] == "2025-03-01"
+    assert ages["solara"]["spec"] == ">=1.40"
+    assert ages["solara"]["age_days"] == 305
+
+    with CatFile(repo) as cat:
+        assert cat.read("0" * 40) is None
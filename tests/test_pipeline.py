@@ -0,0 +1,109 @@
+"""Tests for pipeline.py step scheduling and input-hash caching."""
+
+import itertools
+import threading
+
+
+def _steps(tmp_path):
+    source = tmp_path / "modules.json"
+    source.write_text("{}")
+    return [
+        {"name": "a", "command": [], "inputs": [source], "outputs": [tmp_path / "a.txt"]},
+        {"name": "b", "command": [], "inputs": [source], "outputs": [tmp_path / "b.txt"]},
+        {"name": "c", "command": [], "inputs": [tmp_path / "a.txt"], "outputs": [tmp_path / "c.txt"]},
+    ]
+
+
+def _writer(calls):
+    runs = itertools.count()
+
+    def runner(step):
+        calls.append(step["name"])
+        for path in step["outputs"]:
+            path.write_text(f"{step['name']} {next(runs)}")
+        return True, ""
+
+    return runner
+
+
+def test_dependencies_and_concurrency(tmp_path):
+    """Independent steps overlap; a step waits for the producer of its inputs."""
+    from scripts.pipeline import run_pipeline, step_dependencies
+
+    steps = _steps(tmp_path)
+    assert step_dependencies(steps) == {"a": set(), "b": set(), "c": {"a"}}
+
+    # a and b only get past the barrier if they run at the same time
+    barrier = threading.Barrier(2, timeout=5)
+    calls = []
+    write = _writer(calls)
+
+    def runner(step):
+        if step["name"] in ("a", "b"):
+            barrier.wait()
+        return write(step)
+
+    results = list(run_pipeline(steps, workers=2, runner=runner))
+    assert {r["name"]: r["status"] for r in results} == {"a": "ran", "b": "ran", "c": "ran"}
+    assert calls.index("c") > calls.index("a")
+
+
+def test_skip_unchanged_inputs(tmp_path):
+    """Steps are skipped until an input changes; dependents rerun with it."""
+    from scripts.pipeline import run_pipeline
+
+    steps = _steps(tmp_path)
+    state, calls = {}, []
+    runner = _writer(calls)
+    list(run_pipeline(steps, state, runner=runner))
+    assert sorted(calls) == ["a", "b", "c"]
+
+    calls.clear()
+    results = list(run_pipeline(steps, state, runner=runner))
+    assert calls == []
+    assert {r["status"] for r in results} == {"skipped"}
+
+    # Changing the shared input reruns a and b; a rewrites a.txt so c reruns too
+    (tmp_path / "modules.json").write_text('{"changed": true}')
+    list(run_pipeline(steps, state, runner=runner))
+    assert sorted(calls) == ["a", "b", "c"]
+
+    # A missing output forces its step to run again
+    calls.clear()
+    (tmp_path / "b.txt").unlink()
+    list(run_pipeline(steps, state, runner=runner))
+    assert calls == ["b"]
+
+
+def test_failed_step_blocks_dependents(tmp_path):
+    """Dependents of a failed step are blocked and the failure is not cached."""
+    from scripts.pipeline import run_pipeline
+
+    steps = _steps(tmp_path)
+    state = {}
+    results = {
+        r["name"]: r
+        for r in run_pipeline(steps, state, runner=lambda step: (step["name"] != "a", "boom"))
+    }
+    assert results["a"]["status"] == "failed"
+    assert results["b"]["status"] == "ran"
+    assert results["c"]["status"] == "blocked"
+    assert set(state) == {"b"}
+
+
+def test_unmet_precondition_skips_step(tmp_path):
+    """A step whose precondition is unmet is skipped, not failed, and not cached."""
+    from scripts.pipeline import run_pipeline
+
+    steps = _steps(tmp_path)
+    reasons = ["fewer than two snapshots"]
+    steps[2]["precondition"] = lambda: reasons[0]
+    state, calls = {}, []
+    results = {r["name"]: r for r in run_pipeline(steps, state, runner=_writer(calls))}
+    assert results["c"]["status"] == "skipped"
+    assert results["c"]["reason"] == "fewer than two snapshots"
+    assert "c" not in calls and "c" not in state
+
+    reasons[0] = None
+    results = {r["name"]: r for r in run_pipeline(steps, state, runner=_writer(calls))}
+    assert results["c"]["status"] == "ran"
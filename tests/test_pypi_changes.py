@@ -0,0 +1,118 @@
+"""Tests for pypi_changes.py, against a local stand-in for PyPI."""
+
+import asyncio
+import json
+import xmlrpc.client
+
+
+def _fake_pypi(events, requests, fault=False, cap=None):
+    """MockTransport handler serving the XML-RPC change log and the JSON API.
+
+    *cap* truncates change log answers like PyPI's event limit.
+    """
+    import httpx
+
+    def handler(request):
+        requests.append(request)
+        if request.method == "POST":
+            (params, method) = xmlrpc.client.loads(request.content)
+            if fault:
+                body = xmlrpc.client.dumps(xmlrpc.client.Fault(-32500, "unavailable"))
+            elif method == "changelog_last_serial":
+                body = xmlrpc.client.dumps((100,), methodresponse=True)
+            else:
+                since = params[0]
+                found = [e for e in events if e[4] > since][:cap]
+                body = xmlrpc.client.dumps((found,), methodresponse=True)
+            return httpx.Response(200, content=body.encode(), headers={"Content-Type": "text/xml"})
+        releases = {"1.0": [{"upload_time_iso_8601": "2026-01-01T00:00:00Z"}]}
+        return httpx.Response(200, json={"info": {"version": "1.0"}, "releases": releases})
+
+    return handler
+
+
+def _sync(handler, packages, state):
+    import httpx
+
+    from scripts.pypi_changes import sync_packages
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await sync_packages(client, packages, state)
+
+    return asyncio.run(run())
+
+
+def test_incremental_sync_refetches_only_changed(tmp_path):
+    """After a full first run, only packages named in the change log are fetched."""
+    from scripts.pypi_changes import load_state, save_state
+
+    packages = {"solara": "solara", "ipyleaflet": "ipyleaflet", "sepal-ui": "sepal_ui"}
+    events = [
+        ["Solara", "1.1", 1767225600, "new release", 101],
+        ["unwatched", "0.2", 1767225601, "new release", 102],
+    ]
+    state_path = tmp_path / "state.json"
+
+    requests = []
+    state = load_state(state_path)
+    data = _sync(_fake_pypi(events, requests), packages, state)
+    assert set(data) == set(packages)
+    assert state["serial"] == 100
+    assert len(requests) == 1 + len(packages)
+    save_state(state, state_path)
+
+    requests = []
+    state = load_state(state_path)
+    data = _sync(_fake_pypi(events, requests), packages, state)
+    assert [r.url.path for r in requests[1:]] == ["/pypi/solara/json"]
+    assert data["ipyleaflet"]["latest"] == "1.0"
+    assert state["serial"] == 102
+    assert json.loads(state_path.read_text())["serial"] == 100  # caller saves
+
+
+def test_change_log_failure_falls_back_to_full_fetch():
+    """A failing change log re-fetches everything and keeps no serial."""
+    from scripts.pypi_changes import load_state
+
+    state = load_state("/nonexistent/state.json")
+    state["serial"] = 50
+    state["packages"] = {"solara": {"latest": "0.9"}}
+
+    requests = []
+    data = _sync(_fake_pypi([], requests, fault=True), {"solara": "solara"}, state)
+    assert data["solara"]["latest"] == "1.0"
+    assert state["serial"] is None
+    assert [r.method for r in requests] == ["POST", "POST", "GET"]
+
+
+def test_truncated_change_log_is_paged(monkeypatch):
+    """Capped answers are followed up; a gap past the call budget falls back to a full fetch."""
+    from scripts import pypi_changes
+
+    monkeypatch.setattr(pypi_changes, "CHANGELOG_LIMIT", 2)
+    packages = {"solara": "solara", "ipyleaflet": "ipyleaflet", "sepal-ui": "sepal_ui"}
+    events = [
+        ["other", "0.1", 1767225600, "new release", 101],
+        ["other", "0.2", 1767225601, "new release", 102],
+        ["ipyleaflet", "0.20", 1767225602, "new release", 103],
+        ["other", "0.3", 1767225603, "new release", 104],
+        ["sepal_ui", "3.1", 1767225604, "new release", 105],
+    ]
+    cached = {key: {"latest": "0.9"} for key in packages}
+
+    requests = []
+    state = {"version": 1, "serial": 100, "packages": dict(cached)}
+    data = _sync(_fake_pypi(events, requests, cap=2), packages, state)
+    assert [r.method for r in requests] == ["POST"] * 3 + ["GET"] * 2
+    assert data["solara"]["latest"] == "0.9"
+    assert data["sepal-ui"]["latest"] == "1.0"
+    assert state["serial"] == 105
+
+    monkeypatch.setattr(pypi_changes, "MAX_CHANGELOG_CALLS", 2)
+    requests = []
+    state = {"version": 1, "serial": 100, "packages": dict(cached)}
+    data = _sync(_fake_pypi(events, requests, cap=2), packages, state)
+    assert [r.method for r in requests] == ["POST"] * 3 + ["GET"] * 3
+    assert all(info["latest"] == "1.0" for info in data.values())
+    assert state["serial"] == 100  # changelog_last_serial, taken before the full fetch
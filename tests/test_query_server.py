@@ -0,0 +1,125 @@
+"""Tests for query_server.py."""
+
+import json
+import os
+import threading
+
+
+def _write_modules(path, on_prod="active"):
+    path.write_text(json.dumps({"categories": [{"name": "apps", "modules": [
+        {"name": "gfc", "github_url": "https://github.com/org/gfc", "on_prod": on_prod, "on_test": "active"},
+        {"name": "Planner", "github_url": "https://github.com/org/planner", "on_prod": "missing"},
+    ]}]}))
+
+
+def _snapshot():
+    return {
+        "scan_date": "2026-03-02T06:00:00Z",
+        "packages": {
+            "solara": {"tier": "critical", "latest": "1.44.0", "latest_release_date": "2026-02-20",
+                       "version_jump": "minor", "changelog_url": "", "all_versions": ["1.44.0", "1.43.0"]},
+        },
+        "module_deps": {
+            "gfc": {"file": "requirements.txt", "packages": {"solara": "==1.43.0"}},
+            "Planner": {"file": "requirements.txt", "packages": {"solara": ">=1.44"}},
+        },
+        "summary": {"critical_updates": 1, "total_packages_scanned": 1},
+    }
+
+
+def test_index_queries_and_reload(tmp_path):
+    """Endpoints answer from the indexes; a changed file is re-indexed."""
+    from scripts.query_server import MonitorIndex
+    from scripts.snapshots import save_snapshot
+
+    modules = tmp_path / "modules.json"
+    _write_modules(modules)
+    save_snapshot(_snapshot(), tmp_path / "snapshots")
+    index = MonitorIndex(modules, tmp_path / "snapshots", reload_interval=0)
+    assert index.refresh()
+
+    status, gfc = index.route("/modules/GFC")
+    assert status == 200
+    assert gfc["category"] == "apps" and gfc["behind"] == {"solara": "minor"}
+    assert index.route("/packages/solara")[1]["modules"] == {
+        "Planner": {"spec": ">=1.44", "jump": None},
+        "gfc": {"spec": "==1.43.0", "jump": "minor"},
+    }
+    assert index.route("/deploy/prod")[1] == {"active": ["gfc"], "missing": ["Planner"]}
+    assert index.route("/jumps")[1]["modules"] == {"minor": {"gfc": ["solara"]}}
+    assert index.route("/modules/nope")[0] == 404
+
+    status, body, tag = index.response("/deploy/prod")
+    assert index.response("/deploy/prod")[2] == tag
+    assert not index.refresh()
+
+    _write_modules(modules, on_prod="hidden")
+    stat = modules.stat()
+    os.utime(modules, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert index.response("/deploy/prod")[2] != tag
+    assert index.route("/deploy/prod")[1] == {"hidden": ["gfc"], "missing": ["Planner"]}
+    assert index.reloads == 2
+
+
+def test_server_sends_etags(tmp_path):
+    """A request repeating the ETag in If-None-Match gets a bodiless 304."""
+    from http.client import HTTPConnection
+    from http.server import ThreadingHTTPServer
+
+    from scripts.query_server import MonitorIndex, make_handler
+
+    modules = tmp_path / "modules.json"
+    _write_modules(modules)
+    index = MonitorIndex(modules, tmp_path / "snapshots")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(index))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        conn = HTTPConnection(*server.server_address[:2])
+        conn.request("GET", "/modules")
+        resp = conn.getresponse()
+        names = [m["name"] for m in json.loads(resp.read())]
+        assert resp.status == 200 and names == ["gfc", "Planner"]
+
+        conn.request("GET", "/modules", headers={"If-None-Match": resp.getheader("ETag")})
+        again = conn.getresponse()
+        assert again.status == 304 and again.read() == b""
+
+        conn.request("GET", "/packages/numpy")
+        missing = conn.getresponse()
+        assert missing.status == 404 and "error" in json.loads(missing.read())
+        conn.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_bad_snapshot_keeps_last_index(tmp_path):
+    """An unreadable latest snapshot is reported in /health, the old index stays."""
+    from scripts.query_server import MonitorIndex
+    from scripts.snapshots import save_snapshot
+
+    modules = tmp_path / "modules.json"
+    _write_modules(modules)
+    snapshots = tmp_path / "snapshots"
+    save_snapshot(_snapshot(), snapshots)
+    index = MonitorIndex(modules, snapshots, reload_interval=0)
+    index.refresh()
+    assert index.health()["error"] is None
+    assert not list(snapshots.glob("*.tmp"))
+
+    broken = snapshots / "20260309T060000Z-abcdef.json"
+    broken.write_text('{"scan_date": "2026-03-09T06:00:00Z", "packages": {')
+    status, body, _ = index.response("/modules/gfc")
+    assert status == 200 and json.loads(body)["behind"] == {"solara": "minor"}
+    assert "ValueError" in json.loads(index.response("/health")[1])["error"]
+
+    broken.unlink()
+    save_snapshot(dict(_snapshot(), scan_date="2026-03-09T06:00:00Z"), snapshots)
+    index.refresh()
+    assert index.health()["error"] is None
+    assert index.snapshot["scan_date"] == "2026-03-09T06:00:00Z"
+
+    # Not-found answers are rebuilt each time instead of filling the cache
+    assert index.response("/packages/numpy")[0] == 404
+    assert "/packages/numpy" not in index._responses
@@ -0,0 +1,46 @@
+"""Tests for repo_weight.py git object weight report."""
+
+import subprocess
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def test_repo_weight(tmp_path, monkeypatch):
+    """Largest HEAD and history blobs are listed from the object database."""
+    from scripts.repo_weight import repo_weight
+
+    for var in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(var, "monitor")
+    for var in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(var, "monitor@example.org")
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    (repo / "data").mkdir()
+    (repo / "data" / "raster.tif").write_bytes(bytes(range(256)) * 400)
+    (repo / "README.md").write_text("# module\n")
+    (repo / "app.py").write_text("print('hi')\n" * 10)
+    _git(repo, "add", ".")
+    _git(repo, "commit", "-q", "-m", "init")
+    _git(repo, "rm", "-q", "data/raster.tif")
+    _git(repo, "commit", "-q", "-m", "drop raster")
+
+    weight = repo_weight(repo, top=2)
+    assert weight["head_files"] == 2
+    assert weight["head_bytes"] == 120 + 9
+    assert [b["path"] for b in weight["largest_head_blobs"]] == ["app.py", "README.md"]
+    largest = weight["largest_history_blobs"][0]
+    assert largest["size"] == 256 * 400
+    assert largest["path"] is None
+    assert weight["history_blobs"] == 3
+    assert weight["pack_bytes"] + weight["loose_bytes"] > 0
+
+
+def test_repo_weight_not_a_repo(tmp_path):
+    """Directories that are not git repos produce an error entry."""
+    from scripts.repo_weight import repo_weight
+
+    assert "error" in repo_weight(tmp_path)
@@ -0,0 +1,53 @@
+"""Tests for resolver.py offline upgrade checks."""
+
+
+def _cache(tmp_path):
+    from scripts.resolver import MetadataCache
+
+    cache = MetadataCache(tmp_path / "metadata")
+    cache.update("sepal-ui", {
+        "2.21.0": {"requires_dist": ["solara<2", "ipyleaflet"], "requires_python": ">=3.9"},
+        "3.0.0": {"requires_dist": ["solara>=2", "pytest; extra == 'dev'"], "requires_python": ">=3.10"},
+    })
+    cache.update("solara", {
+        "1.40.0": {"requires_dist": [], "requires_python": None},
+        "2.0.0": {"requires_dist": [], "requires_python": ">=3.9"},
+    })
+    cache.update("ipyleaflet", {
+        "0.19.0": {"requires_dist": [], "requires_python": ">=3.8"},
+        "0.20.0": {"requires_dist": [], "requires_python": ">=3.13"},
+    })
+    return MetadataCache(tmp_path / "metadata")
+
+
+def test_resolve_newest_compatible(tmp_path):
+    """The newest versions honour pins, release requirements and requires_python."""
+    from scripts.resolver import Resolver
+
+    resolver = Resolver(_cache(tmp_path), "3.11")
+    result = resolver.resolve({"sepal-ui": [("==2.21.0", "module")], "gdal": [("==3.8.*", "module")]})
+    assert result["versions"] == {"ipyleaflet": "0.19.0", "sepal-ui": "2.21.0", "solara": "1.40.0"}
+
+    result = resolver.resolve({"sepal-ui": [("", "module")]})
+    assert result["versions"] == {"sepal-ui": "3.0.0", "solara": "2.0.0"}
+
+
+def test_upgrade_blockers(tmp_path):
+    """Blocked upgrades name the constraints that exclude the latest release."""
+    from scripts.resolver import Resolver, check_module
+
+    resolver = Resolver(_cache(tmp_path), "3.11")
+    targets = {"sepal-ui", "solara"}
+
+    pinned_ui = check_module(resolver, {"sepal-ui": "==2.21.0", "solara": ""}, targets)
+    assert pinned_ui["upgrades"]["sepal-ui"] == {"latest": "3.0.0", "can_upgrade": True}
+    solara = pinned_ui["upgrades"]["solara"]
+    assert solara["can_upgrade"] is False
+    assert solara["blocked_by"] == [{"specifier": "<2", "source": "sepal-ui 2.21.0", "package": "solara"}]
+
+    pinned_solara = check_module(resolver, {"sepal-ui": "", "solara": "==1.40.0", "python": "=3.11"}, targets)
+    blockers = pinned_solara["upgrades"]["sepal-ui"]["blocked_by"]
+    assert {"specifier": "==1.40.0", "source": "module", "package": "solara"} in blockers
+
+    # Both modules were resolved from shared, memoised candidate lists
+    assert resolver.candidates.cache_info().hits > 0
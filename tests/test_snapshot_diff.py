@@ -0,0 +1,98 @@
+"""Tests for snapshot_diff.py."""
+
+import json
+
+
+def _snapshot(date, packages, module_deps):
+    return {
+        "scan_date": f"{date}T06:00:00Z",
+        "packages": {
+            name: {
+                "tier": "critical",
+                "latest": latest,
+                "latest_release_date": date,
+                "version_jump": jump,
+                "changelog_url": f"https://github.com/org/{name}/releases",
+                "all_versions": versions,
+            }
+            for name, (latest, jump, versions) in packages.items()
+        },
+        "module_deps": {
+            module: {"file": "requirements.txt", "packages": pins}
+            for module, pins in module_deps.items()
+        },
+        "summary": {},
+    }
+
+
+OLD = _snapshot(
+    "2026-01-05",
+    {"solara": ("1.40.0", "none", ["1.39.0", "1.40.0"]), "sepal-ui": ("2.21.0", "none", ["2.21.0"])},
+    {"gfc": {"solara": "==1.40.0", "sepal-ui": ">=2.21"}, "alerts": {"sepal-ui": "==2.21.0"}},
+)
+NEW = _snapshot(
+    "2026-01-12",
+    {
+        "solara": ("2.0.0", "major", ["1.39.0", "1.40.0", "1.41.0", "2.0.0"]),
+        "sepal-ui": ("2.21.0", "none", ["2.21.0"]),
+        "ipyleaflet": ("0.19.0", "unknown", ["0.19.0"]),
+    },
+    {"gfc": {"solara": "==1.40.0", "sepal-ui": ">=2.21", "ipyleaflet": ""}, "alerts": {"sepal-ui": "==2.20.0"}},
+)
+
+
+def test_diff_snapshots():
+    """Releases, jumps, affected modules and pin edits are all reported."""
+    from scripts.snapshot_diff import diff_snapshots
+
+    diff = diff_snapshots(OLD, NEW)
+    releases = {r["package"]: r for r in diff["new_releases"]}
+    assert releases.keys() == {"solara", "ipyleaflet"}
+    assert releases["solara"]["versions"] == ["1.41.0", "2.0.0"]
+    assert releases["ipyleaflet"]["previous"] is None
+    assert diff["jump_changes"] == [
+        {"package": "solara", "tier": "critical", "previous": "none", "version_jump": "major"}
+    ]
+    assert [(r["module"], r["package"], r["jump"]) for r in diff["newly_affected"]] == [
+        ("alerts", "sepal-ui", "minor"),
+        ("gfc", "solara", "major"),
+    ]
+    assert diff["resolved"] == []
+    assert [(r["module"], r["package"], r["previous"], r["spec"]) for r in diff["pin_changes"]] == [
+        ("alerts", "sepal-ui", "==2.21.0", "==2.20.0"),
+        ("gfc", "ipyleaflet", None, ""),
+    ]
+
+
+def test_main_writes_report_and_issues(tmp_path):
+    """The CLI writes the Markdown report and one draft issue per module."""
+    import argparse
+
+    from scripts.snapshot_diff import add_arguments, main
+
+    snapshots = tmp_path / "snapshots"
+    snapshots.mkdir()
+    (snapshots / "2026-01-05.json").write_text(json.dumps(OLD))
+    (snapshots / "2026-01-12.json").write_text(json.dumps(NEW))
+    modules_json = tmp_path / "modules.json"
+    modules_json.write_text(json.dumps({"categories": [{"name": "c", "modules": [
+        {"name": "gfc", "github_url": "https://github.com/sepal-contrib/gfc_wrapper_dpi"},
+    ]}]}))
+
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    main(parser.parse_args([
+        "--snapshots-dir", str(snapshots),
+        "--modules-json", str(modules_json),
+        "--reports-dir", str(tmp_path / "reports"),
+        "--draft-issues-dir", str(tmp_path / "issues"),
+    ]))
+
+    report = (tmp_path / "reports" / "diff_2026-01-05_2026-01-12.md").read_text()
+    assert "## Newly affected modules (2)" in report
+    assert "| gfc | solara | `==1.40.0` | 2.0.0 | major |" in report
+    issues = sorted(p.name for p in (tmp_path / "issues").iterdir())
+    assert issues == ["2026-01-12_alerts.md", "2026-01-12_gfc.md"]
+    gfc = (tmp_path / "issues" / "2026-01-12_gfc.md").read_text()
+    assert "https://github.com/sepal-contrib/gfc_wrapper_dpi" in gfc
+    assert "major release, expect breaking changes" in gfc
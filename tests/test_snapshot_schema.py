@@ -0,0 +1,101 @@
+"""Tests for snapshot_schema.py."""
+
+import json
+
+
+def _snapshot():
+    return {
+        "scan_date": "2026-03-02T06:00:00Z",
+        "packages": {
+            "solara": {
+                "tier": "critical",
+                "latest": "1.44.0",
+                "latest_release_date": "2026-02-20",
+                "version_jump": "minor",
+                "changelog_url": "https://pypi.org/project/solara/",
+                "all_versions": ["1.44.0", "1.43.0"],
+                "sizes": {"1.44.0": 1200, "1.43.0": 1100},
+            },
+        },
+        "module_deps": {"gfc": {"file": "requirements.txt", "packages": {"solara": "==1.43.0"}}},
+        "summary": {"critical_updates": 1, "total_packages_scanned": 1},
+    }
+
+
+def test_round_trip_and_lite_load(tmp_path, capsys):
+    """Saved snapshots are stamped and read back whole, or without version lists."""
+    from scripts.check_deps import print_summary
+    from scripts.snapshot_schema import SCHEMA_VERSION
+    from scripts.snapshots import load_snapshot, save_snapshot
+
+    path = save_snapshot(_snapshot(), tmp_path)
+    full = load_snapshot(path)
+    assert full.schema_version == SCHEMA_VERSION
+    assert full.snapshot_id == path.stem
+    assert full.packages["solara"].sizes["1.43.0"] == 1100
+
+    lite = load_snapshot(path, lite=True)
+    assert lite.packages["solara"].latest == "1.44.0"
+    assert "all_versions" not in lite.model_dump()["packages"]["solara"]
+
+    print_summary(lite, path)
+    assert "solara" in capsys.readouterr().out
+
+
+def test_rejects_unknown_fields_and_newer_versions(tmp_path):
+    """Schema drift fails on load instead of passing through silently."""
+    import pytest
+    from pydantic import ValidationError
+
+    from scripts.snapshot_schema import SCHEMA_VERSION, load_snapshot
+
+    # Snapshots written before the schema existed validate as version 1
+    path = tmp_path / "2026-01-01.json"
+    path.write_text(json.dumps(_snapshot()))
+    assert load_snapshot(path).schema_version == 1
+
+    renamed = _snapshot()
+    renamed["packages"]["solara"]["latest_version"] = renamed["packages"]["solara"].pop("latest")
+    path.write_text(json.dumps(renamed))
+    for lite in (False, True):
+        with pytest.raises(ValidationError):
+            load_snapshot(path, lite=lite)
+
+    # The lite model only tolerates the heavy keys it leaves out
+    extra = _snapshot()
+    extra["packages"]["solara"]["downloads"] = 12
+    path.write_text(json.dumps(extra))
+    with pytest.raises(ValidationError):
+        load_snapshot(path, lite=True)
+
+    path.write_text(json.dumps(dict(_snapshot(), schema_version=SCHEMA_VERSION + 1)))
+    with pytest.raises(ValidationError):
+        load_snapshot(path, lite=True)
+
+
+def test_lite_load_skips_version_history(tmp_path):
+    """Lite loads never decode the version lists and sizes, so they stay cheap."""
+    import tracemalloc
+
+    from scripts.snapshot_schema import load_snapshot
+
+    data = _snapshot()
+    versions = [f"1.{i}.0" for i in range(20_000)]
+    data["packages"]["solara"]["all_versions"] = versions
+    data["packages"]["solara"]["sizes"] = dict.fromkeys(versions, 1000)
+    path = tmp_path / "2026-03-02.json"
+    path.write_text(json.dumps(data))
+
+    peaks = {}
+    for lite in (False, True):
+        tracemalloc.start()
+        snapshot = load_snapshot(path, lite=lite)
+        peaks[lite] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert snapshot.packages["solara"].latest == "1.44.0"
+    assert peaks[True] * 10 < peaks[False]
+
+    # Malformed history is not even looked at
+    data["packages"]["solara"]["sizes"] = "n/a"
+    path.write_text(json.dumps(data))
+    assert load_snapshot(path, lite=True).packages["solara"].version_jump == "minor"
@@ -0,0 +1,73 @@
+"""Tests for snapshots.py storage, manifest and retention."""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+
+def _snapshot(when, packages=("solara",)):
+    return {
+        "scan_date": when.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "packages": {
+            name: {
+                "tier": "critical",
+                "latest": f"1.{when.day}.0",
+                "latest_release_date": None,
+                "version_jump": "unknown",
+                "changelog_url": "",
+            }
+            for name in packages
+        },
+        "module_deps": {"gfc": {"file": "requirements.txt", "packages": {}}},
+        "summary": {"total_packages_scanned": len(packages)},
+    }
+
+
+def test_save_and_select(tmp_path):
+    """Same-day runs get distinct IDs; the manifest answers range queries."""
+    from scripts.snapshots import load_manifest, save_snapshot, select
+
+    day = datetime(2026, 1, 12, 6, tzinfo=timezone.utc)
+    first = save_snapshot(_snapshot(day), tmp_path)
+    second = save_snapshot(_snapshot(day + timedelta(hours=1), ("solara", "numpy")), tmp_path)
+    save_snapshot(_snapshot(day + timedelta(days=7)), tmp_path)
+    assert first != second and first.stem < second.stem
+
+    # A legacy date-named file dropped in by hand is indexed on load
+    (tmp_path / "2026-01-01.json").write_text(json.dumps(_snapshot(day - timedelta(days=11))))
+    entries = load_manifest(tmp_path)
+    assert [e["file"] for e in entries][0] == "2026-01-01.json"
+    assert len(entries) == 4
+
+    assert len(select(entries, since="2026-01-12", until="2026-01-12")) == 2
+    assert [e["file"] for e in select(entries, package="numpy")] == [second.name]
+    assert len(select(entries, since="2026-01-13")) == 1
+
+
+def test_retention_and_compaction(tmp_path):
+    """Old snapshots thin out to weekly and monthly; pruned ones are merged."""
+    from scripts.snapshots import compact, load_manifest, plan_retention, save_snapshot
+
+    now = datetime(2026, 6, 30, 12, tzinfo=timezone.utc)
+    # Two scans a day over the last 10 days, and daily scans a year ago
+    for days in range(10):
+        for hour in (1, 13):
+            save_snapshot(_snapshot(now - timedelta(days=days, hours=hour)), tmp_path)
+    for days in range(365, 395):
+        save_snapshot(_snapshot(now - timedelta(days=days)), tmp_path)
+
+    entries = load_manifest(tmp_path)
+    plan = plan_retention(entries, now=now, daily_weeks=4, weekly_weeks=26)
+    # The recent scans span 11 calendar days; the old ones all fall in June 2025
+    assert len(plan) == 11 + 1
+    assert sum(len(pruned) for pruned in plan.values()) == len(entries) - 12
+
+    removed = compact(tmp_path, plan, entries)
+    assert removed == len(entries) - 12
+    kept = load_manifest(tmp_path)
+    assert len(kept) == 12
+    assert sum(len(e["merged"]) for e in kept) == removed
+
+    merged = max(kept, key=lambda e: len(e["merged"]))
+    snapshot = json.loads((tmp_path / merged["file"]).read_text())
+    assert [c["snapshot_id"] for c in snapshot["compacted"]] == merged["merged"]
+    assert snapshot["compacted"][0]["latest"]["solara"].startswith("1.")
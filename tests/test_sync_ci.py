@@ -0,0 +1,150 @@
+"""Tests for sync_ci.py workflow sync."""
+
+
+def _modules():
+    return [
+        {
+            "name": "mod_a",
+            "github_url": "https://github.com/sepal-contrib/mod_a",
+            "local_dir": "mod_a",
+            "ci": {"secrets": ["EARTHENGINE_TOKEN"], "notebook": "ui.ipynb"},
+        },
+        {
+            "name": "mod_b",
+            "github_url": "https://github.com/sepal-contrib/mod_b",
+            "local_dir": "mod_b",
+            "ci": {"secrets": []},
+        },
+        {"name": "external", "local_dir": None},
+        {"name": "mod_c", "local_dir": "mod_c", "ci": {"skip": True}},
+        {"name": "mod_d", "local_dir": "mod_d", "migration": {"status": "done"}},
+    ]
+
+
+def test_sync_writes_missing_then_unchanged(tmp_path):
+    """First sync creates workflows, second sync leaves them alone."""
+    from scripts.sync_ci import sync_modules
+
+    report = sync_modules(_modules(), tmp_path)
+    assert report["summary"] == {"changed": 0, "missing": 2, "unchanged": 0, "skipped": 3}
+    dest = tmp_path / "mod_a" / ".github" / "workflows" / "ci.yaml"
+    assert "EARTHENGINE_TOKEN" in dest.read_text()
+    assert "venv-mod_a" in dest.read_text()
+
+    mtime = dest.stat().st_mtime_ns
+    report = sync_modules(_modules(), tmp_path)
+    assert report["summary"]["unchanged"] == 2
+    assert not any(e.get("written") for e in report["modules"])
+    assert dest.stat().st_mtime_ns == mtime
+
+
+def test_sync_detects_changed(tmp_path):
+    """An edited workflow is reported as changed and rewritten."""
+    from scripts.sync_ci import sync_modules
+
+    sync_modules(_modules(), tmp_path)
+    dest = tmp_path / "mod_b" / ".github" / "workflows" / "ci.yaml"
+    dest.write_text("name: CI\n")
+
+    report = sync_modules(_modules(), tmp_path)
+    by_name = {e["name"]: e for e in report["modules"]}
+    assert by_name["mod_b"]["status"] == "changed"
+    assert by_name["mod_b"]["written"] is True
+    assert by_name["mod_a"]["status"] == "unchanged"
+    assert dest.read_text() != "name: CI\n"
+
+
+def test_sync_dry_run_does_not_write(tmp_path):
+    """Dry run reports drift without touching the repos."""
+    from scripts.sync_ci import sync_modules
+
+    report = sync_modules(_modules(), tmp_path, dry_run=True)
+    assert report["dry_run"] is True
+    assert report["summary"]["missing"] == 2
+    assert not (tmp_path / "mod_a").exists()
+    skipped = {e["name"]: e["reason"] for e in report["modules"] if e["status"] == "skipped"}
+    assert skipped == {
+        "external": "no local_dir",
+        "mod_c": "ci.skip=true",
+        "mod_d": "status=done",
+    }
+
+
+def _git_repo(path):
+    import subprocess
+
+    path.mkdir()
+    subprocess.run(["git", "init", "-q", "-b", "main", str(path)], check=True)
+    (path / "README.md").write_text("module\n")
+    subprocess.run(["git", "-C", str(path), "add", "README.md"], check=True)
+    subprocess.run(["git", "-C", str(path), "commit", "-q", "-m", "init"], check=True)
+
+
+def test_commit_changes_branches_and_commits(tmp_path, monkeypatch):
+    """Only repos whose workflow was written get a branch and a commit."""
+    import subprocess
+
+    from scripts.sync_ci import commit_changes, sync_modules
+
+    for var in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(var, "monitor")
+    for var in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(var, "monitor@example.org")
+    _git_repo(tmp_path / "mod_a")
+    _git_repo(tmp_path / "mod_b")
+
+    sync_modules(_modules()[:1], tmp_path)
+    report = sync_modules(_modules(), tmp_path)
+    commits = commit_changes(report, "ci-sync", "ci: sync workflow")
+
+    assert commits["summary"] == {"committed": 1, "error": 0}
+    (result,) = commits["results"]
+    assert result["repo"].endswith("mod_b")
+    assert result["seconds"] >= 0
+
+    def git(repo, *args):
+        return subprocess.run(
+            ["git", "-C", str(tmp_path / repo), *args],
+            check=True, capture_output=True, text=True,
+        ).stdout.strip()
+
+    assert git("mod_b", "branch", "--show-current") == "ci-sync"
+    assert git("mod_b", "log", "-1", "--format=%s") == "ci: sync workflow"
+    assert git("mod_b", "show", "--name-only", "--format=", "HEAD") == ".github/workflows/ci.yaml"
+    assert git("mod_a", "branch", "--show-current") == "main"
+
+
+def test_commit_workflow_reruns_and_refuses_dirty_trees(tmp_path, monkeypatch):
+    """A rerun reuses the existing branch; unrelated changes block the commit."""
+    import subprocess
+
+    from scripts.sync_ci import commit_workflow, sync_modules
+
+    for var in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(var, "monitor")
+    for var in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(var, "monitor@example.org")
+    repo = tmp_path / "mod_b"
+    _git_repo(repo)
+
+    def git(*args):
+        return subprocess.run(
+            ["git", "-C", str(repo), *args], check=True, capture_output=True, text=True,
+        ).stdout.strip()
+
+    sync_modules(_modules()[1:], tmp_path)
+    assert commit_workflow(str(repo), "ci-sync", "ci: sync workflow")["status"] == "committed"
+
+    # Earlier run left the branch behind; the repo is back on main
+    git("switch", "-q", "main")
+    sync_modules(_modules()[1:], tmp_path)
+    rerun = commit_workflow(str(repo), "ci-sync", "ci: sync workflow")
+    assert rerun["status"] == "committed"
+    assert git("rev-list", "--count", "main..ci-sync") == "1"
+
+    git("switch", "-q", "main")
+    sync_modules(_modules()[1:], tmp_path)
+    (repo / "notes.txt").write_text("local work\n")
+    refused = commit_workflow(str(repo), "ci-sync", "ci: sync workflow")
+    assert refused["status"] == "error" and "notes.txt" in refused["error"]
+    assert git("branch", "--show-current") == "main"
@@ -0,0 +1,56 @@
+"""Tests for watchlist_usage.py."""
+
+MODULE_DEPS = {
+    "alos_mosaics": {"file": "requirements.txt", "packages": {"solara": "==1.40.0", "rasterio": ""}},
+    "clip_time_series": {
+        "file": "sepal_environment.yml",
+        "packages": {"python": "=3.10", "gdal": "=3.8.3", "nodejs": "", "solara": "<2", "rasterio": ">=1.3"},
+        "conda": ["gdal", "nodejs", "python"],
+    },
+    "se.plan": {"file": "pyproject.toml", "packages": {"xarray": ">=2024.1"}},
+}
+
+
+def test_usage_counts_and_tiers():
+    """Usage and pin tightness drive the proposed tier."""
+    from scripts.watchlist_usage import proposed_tier, usage_counts, used_packages
+
+    usage = usage_counts(MODULE_DEPS)
+    assert usage["solara"]["modules"] == ["alos_mosaics", "clip_time_series"]
+    assert usage["solara"]["tight"] == 2
+    assert usage["gdal"]["conda_only"] is True
+    assert proposed_tier(usage["solara"]) == "critical"
+    assert proposed_tier(usage["rasterio"]) == "important"
+    assert proposed_tier(usage["gdal"]) == "important"
+    assert proposed_tier(usage["xarray"]) == "ecosystem"
+    assert used_packages(MODULE_DEPS) == {"solara", "rasterio", "xarray"}
+
+
+def test_propose_and_apply():
+    """Unwatched pip packages are added, mis-tiered ones moved, unused ones reported."""
+    from scripts.watchlist_usage import apply_proposal, propose, usage_counts
+
+    data = {
+        "meta": {"last_scan": None},
+        "tiers": {
+            "critical": {"packages": [{"name": "planet", "pypi": "planet", "github": "planetlabs/p"}]},
+            "important": {"packages": []},
+            "ecosystem": {"packages": [{"name": "Rasterio", "pypi": "rasterio", "github": "rasterio/rasterio"}]},
+            "ai_ml": {"packages": [{"name": "xarray", "pypi": "xarray", "github": ""}]},
+        },
+    }
+    watchlist = {tier: info["packages"] for tier, info in data["tiers"].items()}
+
+    proposal = propose(watchlist, usage_counts(MODULE_DEPS))
+    # Conda-only packages (gdal, nodejs) are not on PyPI and never proposed
+    assert [(r["package"], r["tier"]) for r in proposal["add"]] == [("solara", "critical")]
+    assert [(r["package"], r["from"], r["tier"]) for r in proposal["move"]] == [
+        ("rasterio", "ecosystem", "important"),
+    ]
+    assert proposal["unused"] == ["planet"]
+
+    updated = apply_proposal(data, proposal)
+    assert [p["name"] for p in updated["tiers"]["important"]["packages"]] == ["Rasterio"]
+    assert updated["tiers"]["ecosystem"]["packages"] == []
+    assert updated["tiers"]["critical"]["packages"][-1]["reason"] == "used by 2 modules"
+    assert data["tiers"]["ecosystem"]["packages"]  # input left untouched